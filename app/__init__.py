@@ -6,10 +6,13 @@ from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
 from core.configuration.configuration import get_app_version
+from core.managers.analytics_manager import AnalyticsManager
+from core.managers.compression_manager import CompressionManager
 from core.managers.config_manager import ConfigManager
 from core.managers.error_handler_manager import ErrorHandlerManager
 from core.managers.logging_manager import LoggingManager
 from core.managers.module_manager import ModuleManager
+from core.managers.query_stats_manager import QueryStatsManager
 
 # Load environment variables
 load_dotenv()
@@ -51,6 +54,18 @@ def create_app(config_name="development"):
     logging_manager = LoggingManager(app)
     logging_manager.setup_logging()
 
+    # Buffer view and download records
+    analytics_manager = AnalyticsManager(app)
+    analytics_manager.init_buffer()
+
+    # Count the queries of each request and flag N+1 patterns
+    query_stats_manager = QueryStatsManager(app)
+    query_stats_manager.init_query_stats()
+
+    # Compress responses the client accepts compressed
+    compression_manager = CompressionManager(app)
+    compression_manager.init_compression()
+
     # Initialize error handler manager
     error_handler_manager = ErrorHandlerManager(app)
     error_handler_manager.register_error_handlers()
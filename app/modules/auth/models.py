@@ -5,6 +5,7 @@ from werkzeug.security import check_password_hash, generate_password_hash
 
 from app import db
 import pyotp
+from core.services.registry import resolve
 
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
@@ -43,4 +44,4 @@ class User(db.Model, UserMixin):
     def temp_folder(self) -> str:
         from app.modules.auth.services import AuthenticationService
 
-        return AuthenticationService().temp_folder_by_user(self)
+        return resolve(AuthenticationService).temp_folder_by_user(self)
@@ -5,9 +5,10 @@ from app.modules.auth import auth_bp
 from app.modules.auth.forms import LoginForm, SignupForm, Verify2FAForm
 from app.modules.auth.services import AuthenticationService
 from app.modules.profile.services import UserProfileService
+from core.services.registry import resolve
 
-authentication_service = AuthenticationService()
-user_profile_service = UserProfileService()
+authentication_service = resolve(AuthenticationService)
+user_profile_service = resolve(UserProfileService)
 
 
 @auth_bp.route("/signup/", methods=["GET", "POST"])
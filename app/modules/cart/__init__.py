@@ -1,4 +1,5 @@
 from core.blueprints.base_blueprint import BaseBlueprint
+from core.services.registry import resolve
 from flask_login import current_user
 
 cart_bp = BaseBlueprint("cart", __name__, template_folder="templates", url_prefix='/cart')
@@ -9,9 +10,7 @@ def inject_cart_count():
     if current_user.is_authenticated:
         try:
             from .services import CartService
-            service = CartService()
-            items = service.get_cart_items(current_user.id)
-            cart_count = len(items)
+            cart_count = resolve(CartService).count_items(current_user.id)
         except Exception:
             cart_count = 0
     return {'cart_count': cart_count}
\ No newline at end of file
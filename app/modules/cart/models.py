@@ -2,6 +2,8 @@ from app import db
 from datetime import datetime
 
 class ShoppingCartItem(db.Model):
+    # Serves the cart count and the item lookup of each user
+    __table_args__ = (db.Index("ix_shopping_cart_item_user_id_hubfile_id", "user_id", "hubfile_id"),)
 
     id=db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
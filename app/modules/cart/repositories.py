@@ -12,3 +12,6 @@ class ShoppingCartItemRepository(BaseRepository):
 
     def get_item_by_user_and_hubfile(self, user_id, hubfile_id):
         return self.model.query.filter_by(user_id=user_id, hubfile_id=hubfile_id).first()
+
+    def count_by_user(self, user_id) -> int:
+        return self.model.query.filter_by(user_id=user_id).count()
@@ -1,12 +1,14 @@
-from flask import jsonify, render_template, request, flash, redirect, url_for, send_file    
+from flask import jsonify, render_template, request, flash, redirect, url_for
 from flask_login import current_user, login_required
+from core.services.registry import resolve
+from core.storage.downloads import send_archive
 from .services import CartService
 from . import cart_bp
 
 @cart_bp.route('/', methods=['GET'])
 @login_required
 def index():
-    cart_service = CartService()
+    cart_service = resolve(CartService)
     cart_items = cart_service.get_cart_items(current_user.id)
     return render_template('cart/index.html', cart_items=cart_items)
 
@@ -14,18 +16,17 @@ def index():
 @login_required
 def add_to_cart(hubfile_id):
 
-    cart_service = CartService()
+    cart_service = resolve(CartService)
     result, status = cart_service.add_item_to_cart(current_user.id, hubfile_id)
 
     if status == 200:
-        items = cart_service.get_cart_items(current_user.id)
-        result['cart_count'] = len(items)
+        result['cart_count'] = cart_service.count_items(current_user.id)
     return jsonify(result), status 
 
 @cart_bp.route('/remove/<int:hubfile_id>', methods=['POST'])
 @login_required
 def remove_from_cart(hubfile_id):
-    cart_service = CartService()
+    cart_service = resolve(CartService)
     result, status = cart_service.remove_item_from_cart(current_user.id, hubfile_id)
     if not request.is_json:
         if status == 200:
@@ -33,17 +34,16 @@ def remove_from_cart(hubfile_id):
         else:
             flash(result.get("error"), "danger")
         return redirect(url_for('cart.index'))
-    items = cart_service.get_cart_items(current_user.id)
-    result['cart_count'] = len(items)
+    result['cart_count'] = cart_service.count_items(current_user.id)
     return jsonify(result), status
 
 @cart_bp.route('/download', methods=['GET'])
 @login_required
 def download_cart():
-    cart_service = CartService()
+    cart_service = resolve(CartService)
     try:
-        zip_path, zip_filename = cart_service.generate_cart_zip(current_user.id)
-        return send_file(zip_path, as_attachment=True, download_name=zip_filename)
+        archive = cart_service.get_cart_archive(current_user.id)
+        return send_archive(archive)
     except ValueError as ve:
         flash("Your cart is empty.", "warning")
         return redirect(url_for('cart.index'))
@@ -54,7 +54,7 @@ def download_cart():
 @cart_bp.route('/empty', methods=['POST'])
 @login_required
 def empty_cart():
-    cart_service = CartService()
+    cart_service = resolve(CartService)
     result, status = cart_service.empty_cart(current_user.id)
 
     if not request.is_json:
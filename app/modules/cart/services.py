@@ -1,18 +1,34 @@
-import os 
-import tempfile
-import zipfile
-from flask import send_file
+import logging
+import os
 from datetime import datetime
 
 from .repositories import ShoppingCartItemRepository
 from app.modules.hubfile.repositories import HubfileRepository
 from app.modules.hubfile.services import HubfileService
+from core.services.lru_cache import LRUCache
+from core.services.registry import resolve
+from core.storage.zip_stream import ZipArchive, unique_arcname
+
+logger = logging.getLogger(__name__)
+
+
+class CartCountCache(LRUCache):
+    """
+    Number of items in each user's cart. Changes made through this process update the entries; the
+    ttl bounds how long a change made by another worker goes unnoticed.
+    """
+
+    def adjust(self, user_id, delta: int):
+        """Adds delta to a cached count (nothing to do when the user has none)."""
+        self.replace(user_id, lambda count: max(count + delta, 0))
+
 
 class CartService:
     def __init__(self):
         self.cart_repository = ShoppingCartItemRepository()
         self.hubfile_repository = HubfileRepository()
-        self.hubfile_service = HubfileService()
+        self.hubfile_service = resolve(HubfileService)
+        self.count_cache = CartCountCache()
 
     def add_item_to_cart(self, user_id, hubfile_id):
         if not self.hubfile_repository.get_by_id(hubfile_id):
@@ -27,9 +43,11 @@ class CartService:
             self.cart_repository.create(
                 user_id=user_id, hubfile_id=hubfile_id, commit=True
             )
+            self.count_cache.adjust(user_id, 1)
             return {"message": "Item added successfully"}, 200
         except Exception as e:
             self.cart_repository.session.rollback() 
+            self.count_cache.discard(user_id)
             return {"error": f"Internal error: {e}"}, 500
     
     def remove_item_from_cart(self, user_id, hubfile_id):
@@ -41,10 +59,11 @@ class CartService:
         
         try:
             self.cart_repository.delete(existing.id)
-            
+            self.count_cache.adjust(user_id, -1)
             return {"message": "Item removed successfully"}, 200
         except Exception as e:
             self.cart_repository.session.rollback() 
+            self.count_cache.discard(user_id)
             return {"error": f"Internal error: {e}"}, 500
 
 
@@ -55,31 +74,47 @@ class CartService:
         selected_hubfiles = self.hubfile_repository.filter_by_ids(hubfile_ids)
         return selected_hubfiles
 
-    def generate_cart_zip(self, user_id):
-        cart_items = self.get_cart_items(user_id)
-        
+    def count_items(self, user_id) -> int:
+        """Number of items in the cart: from the count cache, or one COUNT(*) on the user's index."""
+        count = self.count_cache.get(user_id)
+        if count is None:
+            count = self.cart_repository.count_by_user(user_id)
+            self.count_cache.set(user_id, count)
+        return count
+
+    def get_cart_archive(self, user_id) -> ZipArchive:
+        """
+        The ZIP of the files in the cart, ordered by name and checksum so that carts holding the same
+        files share one archive (and archive cache entry). Files sharing a name get distinct arcnames
+        ("rex.csv", "rex (2).csv") instead of overwriting each other, and the paths are resolved in
+        one batch. Raises ValueError when the cart is empty.
+        """
+        cart_items = sorted(
+            self.get_cart_items(user_id), key=lambda hubfile: (hubfile.name, hubfile.sha256 or hubfile.checksum)
+        )
+
         if not cart_items:
             raise ValueError("Cart is empty")
 
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
         zip_filename = f"dinosauhub_dataset_{timestamp}.zip"
 
-        temp_dir = tempfile.mkdtemp()
-        zip_path = os.path.join(temp_dir, zip_filename)
-
-        with zipfile.ZipFile(zip_path, 'w') as zipf:
-            for hubfile in cart_items:
-                file_path = self.hubfile_service.get_path_by_hubfile(hubfile)
-                if os.path.exists(file_path):
-                    zipf.write(file_path, arcname=hubfile.name)
-                else:
-                    print(f"File {file_path} does not exist and will be skipped.")
+        paths = self.hubfile_service.get_paths_by_hubfiles(cart_items)
+        entries, taken = [], set()
+        for hubfile in cart_items:
+            file_path = paths[hubfile.id]
+            if not os.path.exists(file_path):
+                logger.warning(f"File {file_path} does not exist and will be skipped.")
+                continue
+            entries.append((unique_arcname(hubfile.name, taken), file_path, hubfile.sha256 or hubfile.checksum))
 
-        return zip_path, zip_filename
+        return ZipArchive(zip_filename, entries)
 
     def empty_cart(self, user_id):
         try:
             self.cart_repository.delete_by_column("user_id", user_id)
+            self.count_cache.set(user_id, 0)
             return {"message": "Cart emptied successfully"}, 200
         except Exception as e:
+            self.count_cache.discard(user_id)
             return {"error": f"Internal error: {e}"}, 500
\ No newline at end of file
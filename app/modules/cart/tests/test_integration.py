@@ -1,3 +1,6 @@
+import io
+import zipfile
+
 import pytest
 from app import db
 from app.modules.hubfile.models import Hubfile
@@ -92,6 +95,17 @@ def test_add_item_to_cart(test_client, sample_hubfile):
     assert item is not None
     assert item.user_id == 1
 
+def test_cart_count_does_not_load_cart_items(test_client, sample_hubfile, query_budget):
+    login_user(test_client)
+    test_client.post(f"/cart/add/{sample_hubfile.id}")
+
+    with patch.object(CartService, "get_cart_items", side_effect=AssertionError("cart items loaded")):
+        with query_budget(8):
+            response = test_client.get("/")
+
+    assert response.status_code == 200
+    assert b'id="cart_navbar_badge"' in response.data
+
 def test_add_item_duplicate(test_client, sample_hubfile):
 
     login_user(test_client)
@@ -177,20 +191,24 @@ def test_download_empty_cart(test_client):
     assert response.status_code == 200
     assert b"Your cart is empty." in response.data
 
-def test_download_cart_success(test_client, sample_hubfile):
-    user = login_user(test_client)
+def test_download_cart_success(test_client, test_app, sample_hubfile, tmp_path):
+    login_user(test_client)
+    test_app.config["ARCHIVE_CACHE_DIR"] = str(tmp_path / "archives")
+    path = tmp_path / "test_dino.csv"
+    path.write_bytes(b"species,period\nT. rex,Cretaceous\n")
 
     test_client.post(f"/cart/add/{sample_hubfile.id}")
 
-    with patch("app.modules.cart.services.CartService.generate_cart_zip") as mock_generate:
-
-        mock_generate.return_value = ("/tmp/fake_dataset.zip", "dino_test.zip")
+    with patch(
+        "app.modules.cart.services.HubfileService.get_paths_by_hubfiles",
+        return_value={sample_hubfile.id: str(path)},
+    ):
+        response = test_client.get("/cart/download")
+        cached = test_client.get("/cart/download", headers={"If-None-Match": response.headers["ETag"]})
+    test_app.config["ARCHIVE_CACHE_DIR"] = None
 
-        with patch("app.modules.cart.routes.send_file") as mock_send_file:
-            mock_send_file.return_value = "Contenido del ZIP simulado"
-
-            response = test_client.get("/cart/download")
-
-            assert response.status_code == 200
-            mock_generate.assert_called_once_with(user.id)
-            mock_send_file.assert_called_once_with("/tmp/fake_dataset.zip", as_attachment=True, download_name="dino_test.zip")
+    assert response.status_code == 200
+    assert response.mimetype == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.data)) as zipf:
+        assert zipf.read("test_dino.csv") == b"species,period\nT. rex,Cretaceous\n"
+    assert cached.status_code == 304
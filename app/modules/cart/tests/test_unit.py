@@ -1,5 +1,8 @@
+import io
+import zipfile
+
 import pytest
-from app.modules.cart.services import CartService
+from app.modules.cart.services import CartCountCache, CartService
 from unittest.mock import MagicMock, patch
 
 @pytest.fixture
@@ -116,51 +119,83 @@ def test_get_cart_items_empty(cart_service):
     cart_service.cart_repository.get_items_by_user.assert_called_once_with(1)
     cart_service.hubfile_repository.filter_by_ids.assert_called_once_with([])
 
-#TEST PARA GENERATE_CART_ZIP
-
-def test_generate_cart_zip_success(cart_service):
-    mock_cart_item = MagicMock()
-    mock_cart_item.hubfile_id = 1
-    cart_service.cart_repository.get_items_by_user.return_value = [mock_cart_item]
+#TEST PARA COUNT_ITEMS
 
-    mock_hubfile = MagicMock()
-    mock_hubfile.name = "fossil_model.csv"
-    cart_service.hubfile_repository.filter_by_ids.return_value = [mock_hubfile]
+def test_count_items_is_cached(cart_service):
+    cart_service.cart_repository.count_by_user.return_value = 3
 
-    cart_service.hubfile_service.get_path_by_hubfile.return_value = "/path/to/fossil_model.csv"
+    assert cart_service.count_items(user_id=1) == 3
+    assert cart_service.count_items(user_id=1) == 3
 
-    with patch("app.modules.cart.services.os") as mock_os, \
-         patch("app.modules.cart.services.tempfile") as mock_tempfile, \
-         patch("app.modules.cart.services.zipfile") as mock_zipfile, \
-         patch("app.modules.cart.services.datetime") as mock_datetime:
-
-        mock_tempfile.mkdtemp.return_value = "/tmp/fake_dir"
-        mock_os.path.join.return_value = "/tmp/fake_dir/dinosaurhub_dataset.zip"
-        mock_os.path.exists.return_value = True
+    cart_service.cart_repository.count_by_user.assert_called_once_with(1)
 
+def test_count_items_follows_add_remove_and_empty(cart_service):
+    cart_service.cart_repository.count_by_user.return_value = 1
+    cart_service.hubfile_repository.get_by_id.return_value = True
+    cart_service.cart_repository.get_item_by_user_and_hubfile.return_value = None
+    cart_service.count_items(user_id=1)
+
+    cart_service.add_item_to_cart(user_id=1, hubfile_id=101)
+    assert cart_service.count_items(user_id=1) == 2
+
+    cart_service.cart_repository.get_item_by_user_and_hubfile.return_value = MagicMock(id=5)
+    cart_service.remove_item_from_cart(user_id=1, hubfile_id=101)
+    assert cart_service.count_items(user_id=1) == 1
+
+    cart_service.empty_cart(user_id=1)
+    assert cart_service.count_items(user_id=1) == 0
+
+    cart_service.cart_repository.count_by_user.assert_called_once_with(1)
+
+def test_count_cache_expires_and_evicts():
+    cache = CartCountCache(ttl=0, max_entries=2)
+    cache.set(1, 4)
+    assert cache.get(1) is None
+
+    cache = CartCountCache(ttl=60, max_entries=2)
+    cache.set(1, 1)
+    cache.set(2, 2)
+    cache.get(1)
+    cache.set(3, 3)
+    assert cache.get(2) is None
+    assert (cache.get(1), cache.get(3)) == (1, 3)
+
+#TEST PARA GET_CART_ARCHIVE
+
+def test_get_cart_archive_success(cart_service, tmp_path):
+    hubfiles, paths = [], {}
+    for hubfile_id, content in ((1, b"species\nT. rex\n"), (2, b"species\nRaptor\n")):
+        path = tmp_path / f"{hubfile_id}.csv"
+        path.write_bytes(content)
+        hubfile = MagicMock(id=hubfile_id, sha256=str(hubfile_id) * 64, checksum="md5")
+        hubfile.name = "fossil_model.csv"
+        hubfiles.append(hubfile)
+        paths[hubfile_id] = str(path)
+    cart_service.cart_repository.get_items_by_user.return_value = [MagicMock(hubfile_id=1), MagicMock(hubfile_id=2)]
+    cart_service.hubfile_repository.filter_by_ids.return_value = hubfiles
+    cart_service.hubfile_service.get_paths_by_hubfiles.return_value = paths
+
+    with patch("app.modules.cart.services.datetime") as mock_datetime:
         mock_now = MagicMock()
         mock_now.strftime.return_value = "2024-06-01_12-00"
         mock_datetime.now.return_value = mock_now
 
-        mock_zip_instance = MagicMock()
-        mock_zipfile.ZipFile.return_value.__enter__.return_value = mock_zip_instance
-
-        zip_path, zip_filename = cart_service.generate_cart_zip(user_id=1)
-
-        assert zip_path == "/tmp/fake_dir/dinosaurhub_dataset.zip"
-        assert zip_filename == "dinosauhub_dataset_2024-06-01_12-00.zip"
+        archive = cart_service.get_cart_archive(user_id=1)
 
-        mock_zip_instance.write.assert_called_with(
-            "/path/to/fossil_model.csv", arcname="fossil_model.csv"
-        )
+    assert archive.name == "dinosauhub_dataset_2024-06-01_12-00.zip"
+    # Same name, both kept
+    assert [arcname for arcname, _, _ in archive.entries] == ["fossil_model.csv", "fossil_model (2).csv"]
+    with zipfile.ZipFile(io.BytesIO(b"".join(archive.stream()))) as zipf:
+        assert zipf.read("fossil_model (2).csv") == b"species\nRaptor\n"
+    cart_service.hubfile_service.get_paths_by_hubfiles.assert_called_once()
 
-def test_generate_zip_empty_cart(cart_service):
+def test_get_cart_archive_empty_cart(cart_service):
     cart_service.cart_repository.get_items_by_user.return_value = []
 
     cart_service.hubfile_repository.filter_by_ids.return_value = []
 
     with pytest.raises(ValueError, match="Cart is empty") :
-        cart_service.generate_cart_zip(user_id=1)
+        cart_service.get_cart_archive(user_id=1)
 
 #TEST PARA EMPTY_CART
 
@@ -1,7 +1,11 @@
+from contextlib import contextmanager
+
 import pytest
 
 from app import create_app, db
 from app.modules.auth.models import User
+from core.managers.query_stats_manager import capture_queries
+from core.services.lru_cache import LRUCache
 
 
 @pytest.fixture(scope="session")
@@ -29,6 +33,8 @@ def test_client(test_app):
 
             db.drop_all()
             db.create_all()
+            # Shared services may cache rows of the previous database
+            LRUCache.clear_all()
             """
             The test suite always includes the following user in order to avoid repetition
             of its creation
@@ -57,6 +63,28 @@ def clean_database():
     db.create_all()
 
 
+@pytest.fixture
+def query_budget():
+    """
+    Asserts that the queries run inside the block stay within a budget and repeat no SELECT often
+    enough to look like an N+1 pattern.
+
+    Usage:
+        with query_budget(10):
+            test_client.get("/explore")
+    """
+
+    @contextmanager
+    def budget(max_queries, allow_n_plus_one=False):
+        with capture_queries() as stats:
+            yield stats
+        assert stats.count <= max_queries, f"{stats.count} queries, budget {max_queries}: {stats.to_dict()}"
+        if not allow_n_plus_one:
+            assert not stats.n_plus_one, f"Likely N+1 queries: {stats.n_plus_one}"
+
+    return budget
+
+
 def login(test_client, email, password):
     """
     Authenticates the user with the credentials provided.
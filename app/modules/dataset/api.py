@@ -1,4 +1,5 @@
-from app.modules.dataset.models import DataSet
+from app.modules.dataset.models import DataSet, DSMetaData
+from app.modules.dataset.repositories import for_api
 from core.resources.generic_resource import create_resource
 from core.serialisers.serializer import Serializer
 
@@ -15,7 +16,12 @@ dataset_fields = {
 
 dataset_serializer = Serializer(dataset_fields, related_serializers={"files": file_serializer})
 
-DataSetResource = create_resource(DataSet, dataset_serializer)
+dataset_filters = {
+    "user_id": lambda value: DataSet.user_id == int(value),
+    "doi": lambda value: DataSet.ds_meta_data.has(DSMetaData.dataset_doi == value),
+}
+
+DataSetResource = create_resource(DataSet, dataset_serializer, query_options=for_api, filters=dataset_filters)
 
 
 def init_blueprint_api(api):
@@ -0,0 +1,153 @@
+"""
+Incremental maintenance of the hub_counters table and of the daily trending rollups.
+
+Every ORM flush adds or subtracts the rows it inserted or deleted (and the datasets it published)
+from their counters in the same transaction, and adds new view and download records to their
+ds_daily_metrics bucket. The analytics buffer does the same for the records it writes. Changes that
+bypass both paths, such as bulk deletes, are corrected by `rosemary counters:reconcile` and
+`rosemary metrics:rollup`, which rebuild the tables from their source tables.
+"""
+
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from app.modules.dataset.models import DataSet, DSDownloadRecord, DSMetaData, DSViewRecord
+from app.modules.dataset.repositories import DSDailyMetricRepository, HubCounterRepository
+from app.modules.fossils.models import FossilsFile
+from app.modules.hubfile.models import HubfileDownloadRecord, HubfileViewRecord
+from core.managers.analytics_manager import on_insert
+
+SYNCHRONIZED_DATASETS = "synchronized_datasets"
+FOSSILS_FILES = "fossils_files"
+DATASET_DOWNLOADS = "dataset_downloads"
+DATASET_VIEWS = "dataset_views"
+FILE_DOWNLOADS = "file_downloads"
+FILE_VIEWS = "file_views"
+
+COUNTER_NAMES = (SYNCHRONIZED_DATASETS, FOSSILS_FILES, DATASET_DOWNLOADS, DATASET_VIEWS, FILE_DOWNLOADS, FILE_VIEWS)
+
+ROW_COUNTERS = {
+    FossilsFile: FOSSILS_FILES,
+    DSDownloadRecord: DATASET_DOWNLOADS,
+    DSViewRecord: DATASET_VIEWS,
+    HubfileDownloadRecord: FILE_DOWNLOADS,
+    HubfileViewRecord: FILE_VIEWS,
+}
+
+ROLLUP_METRICS = {
+    DSDownloadRecord: ("downloads", "download_date"),
+    DSViewRecord: ("views", "view_date"),
+}
+
+
+def _utc_day(moment):
+    if moment is None:
+        moment = datetime.now(timezone.utc)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date()
+
+
+def _doi_delta(meta_data: DSMetaData) -> int:
+    history = inspect(meta_data).attrs.dataset_doi.history
+    if not history.added:
+        return 0
+    was_published = bool(history.deleted and history.deleted[0])
+    return int(bool(history.added[0])) - int(was_published)
+
+
+_DELETED_PUBLISHED_DATASETS = "deleted_published_datasets"
+
+
+def _count_published(session, datasets) -> int:
+    """
+    How many of the datasets (about to be deleted) have a DOI: from their loaded metadata, or in one
+    query on the flush's connection for those whose metadata is not loaded or expired.
+    """
+    published = 0
+    unloaded = []
+    for dataset in datasets:
+        loaded = inspect(dataset).dict
+        meta_data = loaded.get("ds_meta_data")
+        if meta_data is not None and "dataset_doi" in inspect(meta_data).dict:
+            published += bool(meta_data.dataset_doi)
+        elif "ds_meta_data" not in loaded or meta_data is not None:
+            unloaded.append(dataset.id)
+
+    if unloaded:
+        query = (
+            select(func.count())
+            .select_from(DataSet)
+            .join(DSMetaData, DataSet.ds_meta_data_id == DSMetaData.id)
+            .where(DataSet.id.in_(unloaded), DSMetaData.dataset_doi.isnot(None), DSMetaData.dataset_doi != "")
+        )
+        published += session.connection().execute(query).scalar()
+    return published
+
+
+@event.listens_for(Session, "before_flush")
+def capture_deleted_datasets(session, flush_context, instances):
+    """Published datasets being deleted, counted while their metadata can still be read."""
+    deleted = [instance for instance in session.deleted if isinstance(instance, DataSet)]
+    if deleted:
+        published = _count_published(session, deleted)
+        session.info[_DELETED_PUBLISHED_DATASETS] = session.info.get(_DELETED_PUBLISHED_DATASETS, 0) + published
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_deleted_datasets(session):
+    session.info.pop(_DELETED_PUBLISHED_DATASETS, None)
+
+
+@event.listens_for(Session, "after_flush")
+def track_aggregates(session, flush_context):
+    deltas = Counter()
+    rollups = defaultdict(Counter)
+
+    for instance in session.new:
+        if type(instance) in ROLLUP_METRICS:
+            metric, date_field = ROLLUP_METRICS[type(instance)]
+            rollups[metric][(instance.dataset_id, _utc_day(getattr(instance, date_field)))] += 1
+        if type(instance) in ROW_COUNTERS:
+            deltas[ROW_COUNTERS[type(instance)]] += 1
+        elif isinstance(instance, DSMetaData) and instance.dataset_doi:
+            deltas[SYNCHRONIZED_DATASETS] += 1
+
+    for instance in session.deleted:
+        if type(instance) in ROW_COUNTERS:
+            deltas[ROW_COUNTERS[type(instance)]] -= 1
+    deltas[SYNCHRONIZED_DATASETS] -= session.info.pop(_DELETED_PUBLISHED_DATASETS, 0)
+
+    for instance in session.dirty:
+        if isinstance(instance, DSMetaData):
+            deltas[SYNCHRONIZED_DATASETS] += _doi_delta(instance)
+
+    if any(deltas.values()):
+        HubCounterRepository().increment(session.connection(), deltas)
+    for metric, buckets in rollups.items():
+        DSDailyMetricRepository().add(session.connection(), metric, buckets)
+
+
+def _count_inserted_rows(name):
+    def hook(connection, rows):
+        HubCounterRepository().increment(connection, {name: len(rows)})
+
+    return hook
+
+
+def _roll_up_inserted_rows(metric, date_field):
+    def hook(connection, rows):
+        buckets = Counter((row["dataset_id"], _utc_day(row[date_field])) for row in rows)
+        DSDailyMetricRepository().add(connection, metric, buckets)
+
+    return hook
+
+
+for model, counter_name in ROW_COUNTERS.items():
+    on_insert(model.__tablename__)(_count_inserted_rows(counter_name))
+
+for model, (metric, date_field) in ROLLUP_METRICS.items():
+    on_insert(model.__tablename__)(_roll_up_inserted_rows(metric, date_field))
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 
 from flask import request
@@ -7,6 +7,7 @@ from sqlalchemy import Enum as SQLAlchemyEnum
 from app import db
 
 from app.modules.fossils.models import FossilsFile
+from core.services.registry import resolve
 
 
 class PublicationType(Enum):
@@ -59,7 +60,7 @@ class DSMetaData(db.Model):
     description = db.Column(db.Text, nullable=False)
     publication_type = db.Column(SQLAlchemyEnum(PublicationType), nullable=False)
     publication_doi = db.Column(db.String(120))
-    dataset_doi = db.Column(db.String(120))
+    dataset_doi = db.Column(db.String(120), index=True)
     tags = db.Column(db.String(120))
     ds_metrics_id = db.Column(db.Integer, db.ForeignKey("ds_metrics.id"))
     ds_metrics = db.relationship("DSMetrics", uselist=False, backref="ds_meta_data", cascade="all, delete")
@@ -67,6 +68,9 @@ class DSMetaData(db.Model):
 
 
 class DataSet(db.Model):
+    # Keyset pagination of the explore listing seeks on (created_at, id)
+    __table_args__ = (db.Index("ix_data_set_created_at_id", "created_at", "id"),)
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
 
@@ -102,14 +106,20 @@ class DataSet(db.Model):
     def get_file_total_size_for_human(self):
         from app.modules.dataset.services import SizeService
 
-        return SizeService().get_human_readable_size(self.get_file_total_size())
+        return resolve(SizeService).get_human_readable_size(self.get_file_total_size())
 
     def get_dinosaurhub_doi(self):
         from app.modules.dataset.services import DataSetService
 
-        return DataSetService().get_dinosaurhub_doi(self)
+        return resolve(DataSetService).get_dinosaurhub_doi(self)
 
-    def to_dict(self):
+    def to_record(self, base_url: str) -> dict:
+        """The to_dict() shape with the download URLs under base_url, so it can be built outside a request."""
+        from app.modules.dataset.services import SizeService
+
+        base_url = base_url.rstrip("/")
+        files = [file.to_record(base_url) for file in self.files()]
+        total_size = sum(file["size_in_bytes"] for file in files)
         return {
             "title": self.ds_meta_data.title,
             "id": self.id,
@@ -122,14 +132,17 @@ class DataSet(db.Model):
             "dataset_doi": self.ds_meta_data.dataset_doi,
             "tags": self.ds_meta_data.tags.split(",") if self.ds_meta_data.tags else [],
             "url": self.get_dinosaurhub_doi(),
-            "download": f'{request.host_url.rstrip("/")}/dataset/download/{self.id}',
+            "download": f"{base_url}/dataset/download/{self.id}",
             "zenodo": self.get_zenodo_url(),
-            "files": [file.to_dict() for fossils in self.fossils_files for file in fossils.files],
-            "files_count": self.get_files_count(),
-            "total_size_in_bytes": self.get_file_total_size(),
-            "total_size_in_human_format": self.get_file_total_size_for_human(),
+            "files": files,
+            "files_count": len(files),
+            "total_size_in_bytes": total_size,
+            "total_size_in_human_format": resolve(SizeService).get_human_readable_size(total_size),
         }
 
+    def to_dict(self):
+        return self.to_record(request.host_url)
+
     def __repr__(self):
         return f"DataSet<{self.id}>"
 
@@ -163,5 +176,76 @@ class DSViewRecord(db.Model):
 
 class DOIMapping(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    dataset_doi_old = db.Column(db.String(120))
+    dataset_doi_old = db.Column(db.String(120), index=True)
     dataset_doi_new = db.Column(db.String(120))
+
+
+class DepositionJobStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class DepositionJobStep(Enum):
+    CREATE_DEPOSITION = "create_deposition"
+    UPLOAD_FILES = "upload_files"
+    PUBLISH = "publish"
+    FETCH_DOI = "fetch_doi"
+    DONE = "done"
+
+
+class DepositionJob(db.Model):
+    """Persistent state of the Zenodo/Fakenodo synchronization of a dataset, processed by the deposition worker."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    data_set_id = db.Column(db.Integer, db.ForeignKey("data_set.id"), nullable=False, unique=True)
+    status = db.Column(
+        SQLAlchemyEnum(DepositionJobStatus), nullable=False, default=DepositionJobStatus.PENDING, index=True
+    )
+    step = db.Column(
+        SQLAlchemyEnum(DepositionJobStep), nullable=False, default=DepositionJobStep.CREATE_DEPOSITION
+    )
+    deposition_id = db.Column(db.Integer)
+    uploaded_files = db.Column(db.Integer, nullable=False, default=0)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc), index=True)
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    data_set = db.relationship("DataSet", backref=db.backref("deposition_job", uselist=False, cascade="all, delete"))
+
+    def __repr__(self):
+        return f"DepositionJob<{self.id} dataset={self.data_set_id} {self.status.value}:{self.step.value}>"
+
+
+class HubCounter(db.Model):
+    """Running totals shown on the home page, kept in step with their source tables (see counters.py)."""
+
+    __tablename__ = "hub_counters"
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"HubCounter<{self.name}={self.value}>"
+
+
+class DSDailyMetric(db.Model):
+    """Downloads and views of a dataset on one day (UTC), summed for trending instead of scanning the records."""
+
+    __tablename__ = "ds_daily_metrics"
+    day = db.Column(db.Date, primary_key=True)
+    dataset_id = db.Column(db.Integer, db.ForeignKey("data_set.id"), primary_key=True)
+    downloads = db.Column(db.Integer, nullable=False, default=0)
+    views = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"DSDailyMetric<{self.dataset_id} {self.day} downloads={self.downloads} views={self.views}>"
@@ -1,15 +1,81 @@
 import logging
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, time, timezone, timedelta
 from typing import Optional
 
 from flask_login import current_user
-from sqlalchemy import desc, func
+from sqlalchemy import Date, and_, delete, desc, func, or_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import joinedload, selectinload
 
-from app.modules.dataset.models import Author, DataSet, DOIMapping, DSDownloadRecord, DSMetaData, DSViewRecord
+from app.modules.auth.models import User
+from app.modules.dataset.models import (
+    Author,
+    DataSet,
+    DepositionJob,
+    DepositionJobStatus,
+    DOIMapping,
+    DSDailyMetric,
+    DSDownloadRecord,
+    DSMetaData,
+    DSViewRecord,
+    HubCounter,
+)
+from app.modules.fossils.models import FossilsFile
 from core.repositories.BaseRepository import BaseRepository
 
 logger = logging.getLogger(__name__)
 
+TRENDING_METRICS = {
+    "downloads": (DSDownloadRecord, DSDownloadRecord.download_date),
+    "views": (DSViewRecord, DSViewRecord.view_date),
+}
+TRENDING_PERIODS = {"day": 1, "week": 7, "month": 30, "year": 365}
+MAX_TRENDING_DAYS = 3650
+
+_UPSERT_DIALECTS = {
+    "mysql": mysql.insert,
+    "mariadb": mysql.insert,
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+# Loader presets: the relationships each kind of page walks, fetched with a fixed number of queries
+# (one per relationship level) however many datasets, authors and files there are
+
+
+def for_card() -> list:
+    """Listings, profile pages and trending: metadata, authors and the owner's profile."""
+    return [
+        joinedload(DataSet.ds_meta_data).selectinload(DSMetaData.authors),
+        joinedload(DataSet.user).joinedload(User.profile),
+    ]
+
+
+def for_detail() -> list:
+    """Dataset page and cards showing the download size: the card relationships plus the files."""
+    return for_card() + [selectinload(DataSet.fossils_files).selectinload(FossilsFile.files)]
+
+
+def for_api() -> list:
+    """REST API, DataSet.to_dict() and downloads: metadata, authors, files and their metadata."""
+    return [
+        joinedload(DataSet.ds_meta_data).selectinload(DSMetaData.authors),
+        selectinload(DataSet.fossils_files).options(
+            selectinload(FossilsFile.files), joinedload(FossilsFile.fossils_meta_data)
+        ),
+    ]
+
+
+def trending_days(period: str) -> int:
+    """Number of daily buckets in period: a named period, or a custom number of days ("14" or "14d")."""
+    if period in TRENDING_PERIODS:
+        return TRENDING_PERIODS[period]
+    days = period[:-1] if period.endswith("d") else period
+    if days.isdigit() and 0 < int(days) <= MAX_TRENDING_DAYS:
+        return int(days)
+    raise ValueError("Invalid period. Use 'day', 'week', 'month', 'year' or a number of days.")
+
 
 class AuthorRepository(BaseRepository):
     def __init__(self):
@@ -21,8 +87,7 @@ class DSDownloadRecordRepository(BaseRepository):
         super().__init__(DSDownloadRecord)
 
     def total_dataset_downloads(self) -> int:
-        max_id = self.model.query.with_entities(func.max(self.model.id)).scalar()
-        return max_id if max_id is not None else 0
+        return self.model.query.count()
 
 
 class DSMetaDataRepository(BaseRepository):
@@ -38,8 +103,7 @@ class DSViewRecordRepository(BaseRepository):
         super().__init__(DSViewRecord)
 
     def total_dataset_views(self) -> int:
-        max_id = self.model.query.with_entities(func.max(self.model.id)).scalar()
-        return max_id if max_id is not None else 0
+        return self.model.query.count()
 
     def the_record_exists(self, dataset: DataSet, user_cookie: str):
         return self.model.query.filter_by(
@@ -61,10 +125,51 @@ class DataSetRepository(BaseRepository):
     def __init__(self):
         super().__init__(DataSet)
 
+    def get_or_404(self, id: int, options=()):
+        return self.model.query.options(*options).get_or_404(id)
+
+    def get_by_doi(self, doi: str) -> Optional[DataSet]:
+        return (
+            self.model.query.join(DSMetaData)
+            .filter(DSMetaData.dataset_doi == doi)
+            .options(*for_detail())
+            .first()
+        )
+
+    def stream_synchronized(self, batch_size: int = 500):
+        """Synchronized datasets in id order, read batch_size rows at a time through a server-side cursor."""
+        return (
+            self.model.query.join(DSMetaData)
+            .filter(DSMetaData.dataset_doi.isnot(None))
+            .options(*for_api())
+            .order_by(self.model.id)
+            .yield_per(batch_size)
+        )
+
+    def get_id_by_doi(self, doi: str) -> Optional[int]:
+        return (
+            self.session.query(self.model.id)
+            .join(DSMetaData, self.model.ds_meta_data_id == DSMetaData.id)
+            .filter(DSMetaData.dataset_doi == doi)
+            .scalar()
+        )
+
+    def get_for_detail(self, id: int) -> Optional[DataSet]:
+        return self.model.query.options(*for_detail()).filter(self.model.id == id).first()
+
+    def paginate_by_user(self, user_id: int, page: int, per_page: int):
+        return (
+            self.model.query.filter(DataSet.user_id == user_id)
+            .order_by(self.model.created_at.desc())
+            .options(*for_card())
+            .paginate(page=page, per_page=per_page, error_out=False)
+        )
+
     def get_synchronized(self, current_user_id: int) -> DataSet:
         return (
             self.model.query.join(DSMetaData)
             .filter(DataSet.user_id == current_user_id, DSMetaData.dataset_doi.isnot(None))
+            .options(*for_card())
             .order_by(self.model.created_at.desc())
             .all()
         )
@@ -73,6 +178,7 @@ class DataSetRepository(BaseRepository):
         return (
             self.model.query.join(DSMetaData)
             .filter(DataSet.user_id == current_user_id, DSMetaData.dataset_doi.is_(None))
+            .options(*for_card())
             .order_by(self.model.created_at.desc())
             .all()
         )
@@ -81,6 +187,7 @@ class DataSetRepository(BaseRepository):
         return (
             self.model.query.join(DSMetaData)
             .filter(DataSet.user_id == current_user_id, DataSet.id == dataset_id, DSMetaData.dataset_doi.is_(None))
+            .options(*for_detail())
             .first()
         )
 
@@ -94,6 +201,7 @@ class DataSetRepository(BaseRepository):
         return (
             self.model.query.join(DSMetaData)
             .filter(DSMetaData.dataset_doi.isnot(None))
+            .options(*for_detail())
             .order_by(desc(self.model.id))
             .limit(5)
             .all()
@@ -103,38 +211,157 @@ class DataSetRepository(BaseRepository):
         return self.model.query.filter_by(**kwargs)
 
     def get_trending(self, metric: str, period: str, limit: int = 10):
-        metric_map = {
-            "downloads": (DSDownloadRecord, DSDownloadRecord.download_date),
-            "views": (DSViewRecord, DSViewRecord.view_date),
-        }
-        period_map = {"week": 7, "month": 30}
-
-        if metric not in metric_map:
+        """
+        Datasets with the most downloads or views over the last days of period (UTC, today included),
+        summed from the daily rollups: at most one row per dataset and day is read, however many
+        records there are.
+        """
+        if metric not in TRENDING_METRICS:
             raise ValueError("Invalid metric. Use 'downloads' or 'views'.")
 
-        if period not in period_map:
-            raise ValueError("Invalid period. Use 'week' or 'month'.")
-
-        record_model, date_column = metric_map[metric]
-        start_date = datetime.now(timezone.utc) - timedelta(days=period_map[period])
+        start_day = datetime.now(timezone.utc).date() - timedelta(days=trending_days(period) - 1)
+        metric_total = func.sum(getattr(DSDailyMetric, metric)).label("metric_total")
 
+        totals = (
+            self.session.query(DSDailyMetric.dataset_id, metric_total)
+            .filter(DSDailyMetric.day >= start_day)
+            .group_by(DSDailyMetric.dataset_id)
+            .having(metric_total > 0)
+            .subquery()
+        )
         return (
-            self.session.query(
-                DataSet,
-                func.count(record_model.id).label("metric_total"),
-            )
-            .join(record_model, DataSet.id == record_model.dataset_id)
+            self.session.query(DataSet, totals.c.metric_total)
+            .join(totals, DataSet.id == totals.c.dataset_id)
             .join(DSMetaData, DataSet.ds_meta_data_id == DSMetaData.id)
-            .filter(DSMetaData.dataset_doi.isnot(None), date_column >= start_date)
-            .group_by(DataSet.id, DSMetaData.id)
-            .order_by(desc("metric_total"))
+            .filter(DSMetaData.dataset_doi.isnot(None))
+            .options(*for_card())
+            .order_by(totals.c.metric_total.desc(), DataSet.id)
             .limit(limit)
             .all()
         )
 
+
 class DOIMappingRepository(BaseRepository):
     def __init__(self):
         super().__init__(DOIMapping)
 
     def get_new_doi(self, old_doi: str) -> str:
         return self.model.query.filter_by(dataset_doi_old=old_doi).first()
+
+
+class DepositionJobRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(DepositionJob)
+
+    def get_by_dataset(self, dataset_id: int) -> Optional[DepositionJob]:
+        return self.model.query.filter_by(data_set_id=dataset_id).first()
+
+    def claim_next(self, now: datetime, lease: timedelta) -> Optional[DepositionJob]:
+        """
+        Locks the next due job and marks it as running. Jobs left running by a worker that died
+        become claimable again once their lease expires.
+        """
+        job = (
+            self.model.query.filter(
+                or_(
+                    and_(self.model.status == DepositionJobStatus.PENDING, self.model.next_attempt_at <= now),
+                    and_(self.model.status == DepositionJobStatus.RUNNING, self.model.locked_at <= now - lease),
+                )
+            )
+            .order_by(self.model.next_attempt_at, self.model.id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            self.session.rollback()
+            return None
+
+        job.status = DepositionJobStatus.RUNNING
+        job.locked_at = now
+        self.session.commit()
+        return job
+
+
+class HubCounterRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(HubCounter)
+
+    def values(self) -> dict:
+        return dict(self.session.query(self.model.name, self.model.value))
+
+    def increment(self, connection, deltas: dict) -> None:
+        """
+        Adds the deltas in place (value = value + delta), on the caller's connection and transaction.
+        Missing counters (e.g. after `rosemary db:reset` emptied the table) are created with the delta.
+        """
+        table = self.model.__table__
+        rows = [{"name": name, "value": delta} for name, delta in deltas.items() if delta]
+        if not rows:
+            return
+
+        stmt = _UPSERT_DIALECTS[connection.dialect.name](table).values(rows)
+        if connection.dialect.name in ("mysql", "mariadb"):
+            stmt = stmt.on_duplicate_key_update({"value": table.c.value + stmt.inserted.value})
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.name], set_={"value": table.c.value + stmt.excluded.value}
+            )
+        connection.execute(stmt)
+
+    def replace(self, values: dict) -> None:
+        for name, value in values.items():
+            self.session.merge(self.model(name=name, value=value))
+        self.session.commit()
+
+
+class DSDailyMetricRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(DSDailyMetric)
+
+    def add(self, connection, metric: str, buckets: dict, batch_size: int = 1000) -> None:
+        """
+        Adds counts to the metric column of the (dataset_id, day) buckets, creating the missing ones,
+        with one multi-row upsert per batch on the caller's connection.
+        """
+        table = self.model.__table__
+        rows = [
+            {"dataset_id": dataset_id, "day": day, "downloads": 0, "views": 0, metric: count}
+            for (dataset_id, day), count in buckets.items()
+            if dataset_id is not None and count
+        ]
+        dialect_insert = _UPSERT_DIALECTS[connection.dialect.name]
+
+        for start in range(0, len(rows), batch_size):
+            stmt = dialect_insert(table).values(rows[start:start + batch_size])
+            if connection.dialect.name in ("mysql", "mariadb"):
+                stmt = stmt.on_duplicate_key_update({metric: table.c[metric] + stmt.inserted[metric]})
+            else:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[table.c.day, table.c.dataset_id],
+                    set_={metric: table.c[metric] + stmt.excluded[metric]},
+                )
+            connection.execute(stmt)
+
+    def rebuild(self, since: Optional[date] = None) -> int:
+        """Recomputes the buckets from the raw records, from since on (everything by default). Returns the buckets."""
+        connection = self.session.connection()
+        clear = delete(self.model.__table__)
+        if since:
+            clear = clear.where(self.model.day >= since)
+        connection.execute(clear)
+
+        days = set()
+        for metric, (record_model, date_column) in TRENDING_METRICS.items():
+            day = func.date(date_column, type_=Date)
+            query = self.session.query(record_model.dataset_id, day, func.count()).filter(
+                record_model.dataset_id.isnot(None)
+            )
+            if since:
+                query = query.filter(date_column >= datetime.combine(since, time.min))
+            query = query.group_by(record_model.dataset_id, day)
+            buckets = {(dataset_id, bucket_day): count for dataset_id, bucket_day, count in query}
+            self.add(connection, metric, buckets)
+            days.update(buckets)
+
+        self.session.commit()
+        return len(days)
@@ -1,48 +1,49 @@
-import json
 import logging
 import os
 import shutil
-import tempfile
 import uuid
-from datetime import datetime, timezone
-from zipfile import ZipFile
 
 from flask import (
+    Response,
     abort,
     jsonify,
     make_response,
     redirect,
     render_template,
     request,
-    send_from_directory,
+    stream_with_context,
     url_for,
 )
 from flask_login import current_user, login_required
 
 from app.modules.dataset import dataset_bp
 from app.modules.dataset.forms import DataSetForm
-from app.modules.dataset.models import DSDownloadRecord
+from app.modules.dataset.repositories import for_api
 from app.modules.dataset.services import (
     AuthorService,
     DataSetService,
-    DOIMappingService,
+    DepositionJobService,
+    DOIResolverService,
     DSDownloadRecordService,
     DSMetaDataService,
     DSViewRecordService,
 )
-from app.modules.fakenodo.services import FakenodoService
-from app.modules.zenodo.services import ZenodoService
+from app.modules.hubfile.services import HubfileService
 from core.configuration.configuration import USE_FAKENODO
+from core.services.registry import resolve
+from core.storage.downloads import send_archive
+from core.storage.ingest import discard_digest, ingest_stream, save_digest
 
 logger = logging.getLogger(__name__)
 
 
-dataset_service = DataSetService()
-author_service = AuthorService()
-dsmetadata_service = DSMetaDataService()
-nodo_service = FakenodoService() if USE_FAKENODO else ZenodoService()
-doi_mapping_service = DOIMappingService()
-ds_view_record_service = DSViewRecordService()
+dataset_service = resolve(DataSetService)
+author_service = resolve(AuthorService)
+dsmetadata_service = resolve(DSMetaDataService)
+deposition_job_service = resolve(DepositionJobService)
+doi_resolver_service = resolve(DOIResolverService)
+ds_view_record_service = resolve(DSViewRecordService)
+hubfile_service = resolve(HubfileService)
 
 @dataset_bp.route("/datasets/trending", methods=["GET"])
 def get_trending_datasets():
@@ -86,7 +87,6 @@ def create_dataset():
 
             if import_method == 'manual':
                 dataset = dataset_service.create_from_form(form=form, current_user=current_user)
-                dataset_service.move_fossils_files(dataset)
             
             elif import_method == 'zip':
                 dataset = dataset_service.create_from_zip(form=form, current_user=current_user)
@@ -104,46 +104,17 @@ def create_dataset():
             logger.exception(f"Exception while create dataset data in local {exc}")
             return jsonify({"Exception while create dataset data in local: ": str(exc)}), 400
 
-        # send dataset as deposition to Zenodo
-        data = {}
-        nodo = "Fakenodo" if USE_FAKENODO else "Zenodo"
-        try:
-            nodo_response_json = nodo_service.create_new_deposition(dataset.ds_meta_data)
-            response_data = json.dumps(nodo_response_json)
-            data = json.loads(response_data)
-        except Exception as exc:
-            data = {}
-            nodo_response_json = {}
-            logger.exception(f"Exception while create dataset data in {nodo} {exc}")
-
-        if data.get("conceptrecid"):
-            deposition_id = data.get("id")
-
-            # update dataset with deposition id in Zenodo
-            dataset_service.update_dsmetadata(dataset.ds_meta_data_id, deposition_id=deposition_id)
-
-            try:
-                # iterate for each feature model (one feature model = one request to Zenodo)
-                for fossils_file in dataset.fossils_files:
-                    nodo_service.upload_file(dataset, deposition_id, fossils_file)
-
-                # publish deposition
-                nodo_service.publish_deposition(deposition_id)
-
-                # update DOI
-                deposition_doi = nodo_service.get_doi(deposition_id)
-                dataset_service.update_dsmetadata(dataset.ds_meta_data_id, dataset_doi=deposition_doi)
-            except Exception as e:
-                msg = f"it has not been possible upload feature models in {nodo} and update the DOI: {e}"
-                return jsonify({"message": msg}), 200
+        # Zenodo/Fakenodo synchronization runs in the deposition worker, outside this request
+        deposition_job_service.enqueue(dataset)
 
         # Delete temp folder
         file_path = current_user.temp_folder()
         if os.path.exists(file_path) and os.path.isdir(file_path):
             shutil.rmtree(file_path)
 
-        msg = "Everything works!"
-        return jsonify({"message": msg}), 200
+        nodo = "Fakenodo" if USE_FAKENODO else "Zenodo"
+        msg = f"Dataset created. Synchronization with {nodo} will continue in the background."
+        return jsonify({"message": msg, "dataset_id": dataset.id}), 202
 
     return render_template("dataset/upload_dataset.html", form=form, use_fakenodo=USE_FAKENODO)
 
@@ -185,7 +156,9 @@ def upload():
         new_filename = file.filename
 
     try:
-        file.save(file_path)
+        # Size, MD5 and SHA-256 are computed while the upload is written, so no later stage re-reads it
+        ingested = ingest_stream(file.stream, file_path)
+        save_digest(file_path, ingested)
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
@@ -209,6 +182,7 @@ def delete():
 
     if os.path.exists(filepath):
         os.remove(filepath)
+        discard_digest(filepath)
         return jsonify({"message": "File deleted successfully"})
 
     return jsonify({"error": "Error: File not found"})
@@ -216,83 +190,46 @@ def delete():
 
 @dataset_bp.route("/dataset/download/<int:dataset_id>", methods=["GET"])
 def download_dataset(dataset_id):
-    dataset = dataset_service.get_or_404(dataset_id)
-
-    file_path = f"uploads/user_{dataset.user_id}/dataset_{dataset.id}/"
-
-    temp_dir = tempfile.mkdtemp()
-    zip_path = os.path.join(temp_dir, f"dataset_{dataset_id}.zip")
-
-    with ZipFile(zip_path, "w") as zipf:
-        for subdir, dirs, files in os.walk(file_path):
-            for file in files:
-                full_path = os.path.join(subdir, file)
+    dataset = dataset_service.get_or_404(dataset_id, options=for_api())
 
-                relative_path = os.path.relpath(full_path, file_path)
-
-                zipf.write(
-                    full_path,
-                    arcname=os.path.join(os.path.basename(zip_path[:-4]), relative_path),
-                )
+    # Streamed while it is built the first time, then served from the archive cache
+    resp = send_archive(dataset_service.get_archive(dataset))
+    if resp.status_code == 304:
+        # The client already has this exact archive: nothing was built or sent, nothing to record
+        return resp
 
     user_cookie = request.cookies.get("download_cookie")
     if not user_cookie:
         user_cookie = str(uuid.uuid4())  # Generate a new unique identifier if it does not exist
         # Save the cookie to the user's browser
-        resp = make_response(
-            send_from_directory(
-                temp_dir,
-                f"dataset_{dataset_id}.zip",
-                as_attachment=True,
-                mimetype="application/zip",
-            )
-        )
         resp.set_cookie("download_cookie", user_cookie)
-    else:
-        resp = send_from_directory(
-            temp_dir,
-            f"dataset_{dataset_id}.zip",
-            as_attachment=True,
-            mimetype="application/zip",
-        )
-
-    # Check if the download record already exists for this cookie
-    existing_record = DSDownloadRecord.query.filter_by(
-        user_id=current_user.id if current_user.is_authenticated else None,
-        dataset_id=dataset_id,
-        download_cookie=user_cookie,
-    ).first()
-
-    if not existing_record:
-        # Record the download in your database
-        DSDownloadRecordService().create(
-            user_id=current_user.id if current_user.is_authenticated else None,
-            dataset_id=dataset_id,
-            download_date=datetime.now(timezone.utc),
-            download_cookie=user_cookie,
-        )
 
+    # Written in the background, after the response
+    resolve(DSDownloadRecordService).record(dataset_id=dataset_id, user_cookie=user_cookie)
+
+    return resp
+
+
+@dataset_bp.route("/api/v1/datasets/export.ndjson", methods=["GET"])
+def export_datasets():
+    # One JSON document per line, written as the datasets are read: memory does not grow with the catalogue
+    lines = dataset_service.export_ndjson(request.host_url)
+    resp = Response(stream_with_context(lines), mimetype="application/x-ndjson")
+    resp.headers["Content-Disposition"] = 'attachment; filename="datasets.ndjson"'
     return resp
 
 
 @dataset_bp.route("/doi/<path:doi>/", methods=["GET"])
 def subdomain_index(doi):
-
-    # Check if the DOI is an old DOI
-    new_doi = doi_mapping_service.get_new_doi(doi)
+    # Old DOIs redirect to their new one; resolutions are cached, so a warm DOI costs no lookup queries
+    dataset, new_doi = doi_resolver_service.resolve(doi)
     if new_doi:
         # Redirect to the same path with the new DOI
         return redirect(url_for("dataset.subdomain_index", doi=new_doi), code=302)
 
-    # Try to search the dataset by the provided DOI (which should already be the new one)
-    ds_meta_data = dsmetadata_service.filter_by_doi(doi)
-
-    if not ds_meta_data:
+    if not dataset:
         abort(404)
 
-    # Get dataset
-    dataset = ds_meta_data.data_set
-
     # Save the cookie to the user's browser
     user_cookie = ds_view_record_service.create_cookie(dataset=dataset)
     resp = make_response(render_template("dataset/view_dataset.html", dataset=dataset))
@@ -1,5 +1,4 @@
 import os
-import shutil
 from datetime import datetime, timezone
 
 from dotenv import load_dotenv
@@ -8,7 +7,9 @@ from app.modules.auth.models import User
 from app.modules.dataset.models import Author, DataSet, DSMetaData, DSMetrics, PublicationType
 from app.modules.fossils.models import FossilsFile, FossilsMetaData
 from app.modules.hubfile.models import Hubfile
+from app.modules.hubfile.services import HubfileService
 from core.seeders.BaseSeeder import BaseSeeder
+from core.storage.ingest import digest_file
 
 
 class DataSetSeeder(BaseSeeder):
@@ -100,26 +101,23 @@ class DataSetSeeder(BaseSeeder):
         ]
         seeded_fossils_files = self.seed(fossils_files)
 
-        # Create files, associate them with FeatureModels and copy files
+        # Create files, associate them with FeatureModels and store them in the blob store
         load_dotenv()
         working_dir = os.getenv("WORKING_DIR", "")
         src_folder = os.path.join(working_dir, "app", "modules", "dataset", "csv_examples")
+        hubfile_service = HubfileService()
         for i in range(12):
             file_name = f"file{i+1}.csv"
             fossils_file = seeded_fossils_files[i]
-            dataset = next(ds for ds in seeded_datasets if ds.id == fossils_file.data_set_id)
-            user_id = dataset.user_id
-
-            dest_folder = os.path.join(working_dir, "uploads", f"user_{user_id}", f"dataset_{dataset.id}")
-            os.makedirs(dest_folder, exist_ok=True)
-            shutil.copy(os.path.join(src_folder, file_name), dest_folder)
-
-            file_path = os.path.join(dest_folder, file_name)
+            file_path = os.path.join(src_folder, file_name)
+            ingested = digest_file(file_path)
 
             csv_file = Hubfile(
                 name=file_name,
-                checksum=f"checksum{i+1}",
-                size=os.path.getsize(file_path),
+                checksum=ingested.md5,
+                sha256=ingested.sha256,
+                size=ingested.size,
                 fossils_file_id=fossils_file.id,
             )
+            hubfile_service.store_blob(csv_file, file_path, keep_source=True)
             self.seed([csv_file])
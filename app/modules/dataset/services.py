@@ -1,26 +1,50 @@
-import hashlib
+import json
 import logging
 import os
-import shutil
+import time
 import uuid
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional, Tuple
 
-import zipfile
-import io
+import tempfile
 import requests
 from urllib.parse import urlparse
 
-from flask import request
+from flask import current_app, request
+from flask_login import current_user
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
 
 from app.modules.auth.services import AuthenticationService
-from app.modules.dataset.models import DataSet, DSMetaData, DSViewRecord
+from app.modules.dataset.models import (
+    DataSet,
+    DepositionJob,
+    DepositionJobStatus,
+    DepositionJobStep,
+    DOIMapping,
+    DSDownloadRecord,
+    DSMetaData,
+    DSViewRecord,
+)
 from app.modules.dataset.repositories import (
     AuthorRepository,
     DataSetRepository,
+    DepositionJobRepository,
     DOIMappingRepository,
+    DSDailyMetricRepository,
     DSDownloadRecordRepository,
     DSMetaDataRepository,
     DSViewRecordRepository,
+    HubCounterRepository,
+)
+from app.modules.dataset.counters import (
+    COUNTER_NAMES,
+    DATASET_DOWNLOADS,
+    DATASET_VIEWS,
+    FILE_DOWNLOADS,
+    FILE_VIEWS,
+    FOSSILS_FILES,
+    SYNCHRONIZED_DATASETS,
 )
 from app.modules.fossils.models import FossilsFile, FossilsMetaData
 from app.modules.fossils.repositories import FossilsRepository, FossilsMetaDataRepository
@@ -30,17 +54,120 @@ from app.modules.hubfile.repositories import (
     HubfileRepository,
     HubfileViewRecordRepository,
 )
+from app.modules.hubfile.services import HubfileService
+from app.modules.fakenodo.services import FakenodoService
+from app.modules.zenodo.services import ZenodoService
+from core.configuration.configuration import USE_FAKENODO
+from core.managers.analytics_manager import record_event
 from core.services.BaseService import BaseService
+from core.services.lru_cache import LRUCache
+from core.services.registry import resolve
+from core.storage.ingest import CHUNK_SIZE, IngestedFile, discard_digest, ingested_file_for
+from core.storage.zip_import import ZipImportLimits, extract_csv_members
+from core.storage.zip_stream import ZipArchive
 
 logger = logging.getLogger(__name__)
 
+GITHUB_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+def calculate_checksum_and_size(file_path) -> IngestedFile:
+    """
+    Size and digests of an uploaded file. Uses the digests recorded while the upload was streamed to
+    disk, and only falls back to a single streaming pass when there is no record for the file.
+    """
+    return ingested_file_for(file_path)
+
+
+class DataSetBuilder:
+    """
+    Collects the CSVs of a dataset being created and inserts their rows in one batch per table
+    (metadata, fossils files, hubfiles) instead of three flushes per file. Foreign keys are taken
+    from the rows returned by the previous batch, so the number of statements does not grow with
+    the number of files.
+    """
+
+    def __init__(self, service: "DataSetService", dataset: DataSet, current_user):
+        self.service = service
+        self.dataset = dataset
+        self.current_user = current_user
+        self.entries = []
+
+    def add(self, csv_filename: str, fossils_form=None, ingested: Optional[IngestedFile] = None):
+        """
+        Añade un CSV al dataset. Si se pasa `ingested`, se reutilizan el tamaño y los hashes calculados
+        al extraer el fichero; si no, se leen del fichero subido al temp_folder.
+        """
+        if ingested is None:
+            file_path = os.path.join(self.current_user.temp_folder(), csv_filename)
+            if not os.path.exists(file_path):
+                raise FileNotFoundError(f"File {csv_filename} not found in temp folder.")
+
+            ingested = calculate_checksum_and_size(file_path)
+
+        self.entries.append((self._metadata(csv_filename, fossils_form), ingested))
+
+    def build(self) -> List[FossilsFile]:
+        """Inserts the collected rows without committing and returns the new FossilsFiles."""
+        if not self.entries:
+            return []
+
+        fmmetadatas = self.service.fossils_metadata_repository.create_many(
+            [metadata for metadata, _ in self.entries], commit=False
+        )
+        fossils = self.service.fossils_repository.create_many(
+            [{"data_set_id": self.dataset.id, "fossils_meta_data_id": fmmetadata.id} for fmmetadata in fmmetadatas],
+            commit=False,
+        )
+        self.service.hubfilerepository.create_many(
+            [
+                {
+                    "name": metadata["csv_filename"],
+                    "checksum": ingested.md5,
+                    "sha256": ingested.sha256,
+                    "size": ingested.size,
+                    "fossils_file_id": fossil.id,
+                }
+                for (metadata, ingested), fossil in zip(self.entries, fossils)
+            ],
+            commit=False,
+        )
+
+        logger.info(f"Added {len(fossils)} FossilFiles to dataset {self.dataset.id}")
+        return fossils
+
+    @staticmethod
+    def _metadata(csv_filename: str, fossils_form=None) -> dict:
+        """
+        Metadatos de un CSV. Usa el diccionario .data del formulario para evitar errores de atributos.
+        """
+        # Valores por defecto
+        title = csv_filename
+        description = "Imported file"
+        publication_doi = ""
+        tags = ""
+
+        if fossils_form:
+            if hasattr(fossils_form, 'data') and isinstance(fossils_form.data, dict):
+                form_data = fossils_form.data
+                title = form_data.get('title', title)
+                description = form_data.get('description', description)
+                publication_doi = form_data.get('publication_doi', publication_doi)
+                tags = form_data.get('tags', tags)
+
+            elif isinstance(fossils_form, dict):
+                title = fossils_form.get('title', title)
+                description = fossils_form.get('description', description)
+                publication_doi = fossils_form.get('publication_doi', publication_doi)
+                tags = fossils_form.get('tags', tags)
 
-def calculate_checksum_and_size(file_path):
-    file_size = os.path.getsize(file_path)
-    with open(file_path, "rb") as file:
-        content = file.read()
-        hash_md5 = hashlib.md5(content).hexdigest()
-        return hash_md5, file_size
+        return {
+            "csv_filename": csv_filename,
+            "title": title if title else csv_filename,
+            "description": description if description else "",
+            "publication_doi": publication_doi,
+            "tags": tags,
+        }
 
 
 class DataSetService(BaseService):
@@ -55,22 +182,65 @@ class DataSetService(BaseService):
         self.hubfilerepository = HubfileRepository()
         self.dsviewrecord_repostory = DSViewRecordRepository()
         self.hubfileviewrecord_repository = HubfileViewRecordRepository()
+        self.hubfile_service = resolve(HubfileService)
 
     def move_fossils_files(self, dataset: DataSet):
-        current_user = AuthenticationService().get_authenticated_user()
+        """
+        Moves the dataset's CSVs from the user's temp folder into the content-addressed blob store.
+        Content that is already stored (e.g. the same CSV in another dataset) is kept only once.
+        """
+        current_user = resolve(AuthenticationService).get_authenticated_user()
         source_dir = current_user.temp_folder()
-        working_dir = os.getenv("WORKING_DIR", "")
-        dest_dir = os.path.join(working_dir, "uploads", f"user_{current_user.id}", f"dataset_{dataset.id}")
-        os.makedirs(dest_dir, exist_ok=True)
-        
+
         for fossil in dataset.fossils_files:
             csv_filename = fossil.fossils_meta_data.csv_filename
             source_file = os.path.join(source_dir, csv_filename)
-            if os.path.exists(source_file):
-                shutil.move(source_file, dest_dir)
-            else:
+            if not os.path.exists(source_file):
                 logger.warning(f"File {csv_filename} not found in temp folder for moving.")
+                continue
+
+            for hubfile in fossil.files:
+                self.hubfile_service.store_blob(hubfile, source_file, keep_source=True)
+            os.remove(source_file)
+            discard_digest(source_file)
+
+        self.repository.session.commit()
 
+    def get_archive(self, dataset: DataSet) -> ZipArchive:
+        """Describes the ZIP download of the dataset: every stored file, in download order."""
+        archive_name = f"dataset_{dataset.id}"
+        entries = []
+        for hubfile in dataset.files():
+            full_path = self.hubfile_service.get_path_by_hubfile(hubfile, dataset=dataset)
+            if not os.path.exists(full_path):
+                logger.warning(f"File {hubfile.name} of dataset {dataset.id} not found in storage.")
+                continue
+            entries.append((os.path.join(archive_name, hubfile.name), full_path, hubfile.sha256 or hubfile.checksum))
+        return ZipArchive(f"{archive_name}.zip", entries)
+
+    def get_or_404(self, id, options=()):
+        return self.repository.get_or_404(id, options)
+
+    def get_by_doi(self, doi: str) -> Optional[DataSet]:
+        return self.repository.get_by_doi(doi)
+
+    def paginate_by_user(self, user_id: int, page: int, per_page: int):
+        return self.repository.paginate_by_user(user_id, page, per_page)
+
+    def export_records(self, base_url: str, batch_size: int = 500) -> Iterator[dict]:
+        """
+        Every synchronized dataset as DataSet.to_record(base_url) (base_url being e.g. request.host_url),
+        read in batches from a server-side cursor.
+        """
+        for dataset in self.repository.stream_synchronized(batch_size):
+            record = dataset.to_record(base_url)
+            record["created_at"] = record["created_at"].isoformat()
+            yield record
+
+    def export_ndjson(self, base_url: str, batch_size: int = 500) -> Iterator[str]:
+        """export_records() as NDJSON lines."""
+        for record in self.export_records(base_url, batch_size):
+            yield json.dumps(record, ensure_ascii=False) + "\n"
 
     def get_synchronized(self, current_user_id: int) -> DataSet:
         return self.repository.get_synchronized(current_user_id)
@@ -153,82 +323,18 @@ class DataSetService(BaseService):
         return dataset
     
 
-    def _add_fossils_file(self, dataset, csv_filename, current_user, fossils_form=None):
-        """
-        Añade un FossilsFile (CSV) a un DataSet.
-        Versión robusta: usa el diccionario .data del formulario para evitar errores de atributos.
-        """
-        
-        # Valores por defecto
-        title = csv_filename
-        description = "Imported file"
-        publication_doi = ""
-        tags = ""
-
-        if fossils_form:
-            if hasattr(fossils_form, 'data') and isinstance(fossils_form.data, dict):
-                form_data = fossils_form.data
-                title = form_data.get('title', title)
-                description = form_data.get('description', description)
-                publication_doi = form_data.get('publication_doi', publication_doi)
-                tags = form_data.get('tags', tags)
-            
-            elif isinstance(fossils_form, dict):
-                title = fossils_form.get('title', title)
-                description = fossils_form.get('description', description)
-                publication_doi = fossils_form.get('publication_doi', publication_doi)
-                tags = fossils_form.get('tags', tags)
-
-        title = title if title else csv_filename
-        description = description if description else ""
-
-        fmmetadata_data = {
-            "csv_filename": csv_filename,
-            "title": title,
-            "description": description,
-            "publication_doi": publication_doi,
-            "tags": tags,
-        }
-
-        fmmetadata = self.fossils_metadata_repository.create(commit=False, **fmmetadata_data)
-
-        fossil = self.fossils_repository.create(
-            commit=False, 
-            data_set_id=dataset.id, 
-            fossils_meta_data_id=fmmetadata.id
-        )
-
-        file_path = os.path.join(current_user.temp_folder(), csv_filename)
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"File {csv_filename} not found in temp folder.")
-
-        checksum, size = calculate_checksum_and_size(file_path)
-
-        file = self.hubfilerepository.create(
-            commit=False, 
-            name=csv_filename, 
-            checksum=checksum, 
-            size=size, 
-            fossils_file_id=fossil.id
-        )
-        
-        fossil.files.append(file)
-        logger.info(f"Added FossilFile '{csv_filename}' to dataset {dataset.id}")
-
-
     def create_from_form(self, form, current_user) -> DataSet:
         """
         Procesa la subida MANUAL de modelos.
         """
         try:
             dataset = self._create_dataset_shell(form, current_user)
-            
+
+            builder = DataSetBuilder(self, dataset, current_user)
             for fossils_file_form in form.fossils_files:
-                csv_filename = fossils_file_form.csv_filename.data
-                self._add_fossils_file(
-                    dataset, csv_filename, current_user, fossils_form=fossils_file_form
-                )
-            
+                builder.add(fossils_file_form.csv_filename.data, fossils_form=fossils_file_form)
+            builder.build()
+
             self.repository.session.commit()
             
         except Exception as exc:
@@ -241,43 +347,29 @@ class DataSetService(BaseService):
     def _process_zip_file(self, dataset, zip_file_obj, current_user):
         """
         Procesa un objeto 'file-like' de ZIP.
-        Extrae los .csv al temp_folder y llama a _add_fossils_file_.
+        Extrae los .csv al temp_folder en streaming (hasheando a la vez) y los añade con un DataSetBuilder.
         NO hace commit.
         """
         temp_folder = current_user.temp_folder()
         os.makedirs(temp_folder, exist_ok=True)
-        
-        zip_file_obj.seek(0)
-        if not zipfile.is_zipfile(zip_file_obj):
-            raise ValueError("File is not a valid ZIP archive.")
-            
-        files_count = 0
-        with zipfile.ZipFile(zip_file_obj, 'r') as zip_ref:
-            for file_path in zip_ref.namelist():
-                if file_path.endswith('.csv') and not file_path.startswith('__MACOSX'):
-                    filename = os.path.basename(file_path)
-
-                    if not filename:
-                        continue
-
-                    try:
-                        csv_content = zip_ref.read(file_path)
-                        temp_file_path = os.path.join(temp_folder, filename)
-                        
-                        with open(temp_file_path, 'wb') as f:
-                            f.write(csv_content)
-
-                        self._add_fossils_file(dataset, filename, current_user, fossils_form=None)
-                        files_count += 1
-                        
-                    except Exception as e:
-                        logger.warning(f"Failed to process file '{filename}' from ZIP: {e}")
-        
-        if files_count == 0:
+
+        extracted = extract_csv_members(
+            zip_file_obj,
+            temp_folder,
+            limits=ZipImportLimits.from_config(current_app.config),
+            workers=current_app.config.get("ZIP_IMPORT_WORKERS", 4),
+        )
+
+        # The session is not thread-safe: rows are added here, once every member is on disk
+        builder = DataSetBuilder(self, dataset, current_user)
+        for filename, ingested in extracted:
+            builder.add(filename, ingested=ingested)
+        builder.build()
+
+        if not extracted:
             logger.warning(f"No .csv files found in the provided ZIP archive for dataset {dataset.id}.")
             raise ValueError("No se encontraron archivos CSV válidos en el repositorio.")
 
-
     def create_from_zip(self, form, current_user) -> DataSet:
         """
         Procesa la subida de archivos CSV desde un archivo ZIP.
@@ -328,10 +420,12 @@ class DataSetService(BaseService):
 
             response = requests.get(zip_url, stream=True)
             response.raise_for_status()
-            
-            zip_in_memory = io.BytesIO(response.content)
-            
-            self._process_zip_file(dataset, zip_in_memory, current_user)
+
+            # Spill to disk past a few MB instead of holding the whole archive in memory
+            with tempfile.SpooledTemporaryFile(max_size=GITHUB_SPOOL_SIZE) as zip_file:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    zip_file.write(chunk)
+                self._process_zip_file(dataset, zip_file, current_user)
             
             self.repository.session.commit()
             
@@ -367,6 +461,17 @@ class DSDownloadRecordService(BaseService):
     def __init__(self):
         super().__init__(DSDownloadRecordRepository())
 
+    def record(self, dataset_id: int, user_cookie: str) -> bool:
+        """Queues the download; it is written with the next analytics flush unless already recorded."""
+        return record_event(
+            DSDownloadRecord.__tablename__,
+            ("user_id", "dataset_id", "download_cookie"),
+            user_id=current_user.id if current_user.is_authenticated else None,
+            dataset_id=dataset_id,
+            download_date=datetime.now(timezone.utc),
+            download_cookie=user_cookie,
+        )
+
 
 class DSMetaDataService(BaseService):
     def __init__(self):
@@ -389,16 +494,24 @@ class DSViewRecordService(BaseService):
     def create_new_record(self, dataset: DataSet, user_cookie: str) -> DSViewRecord:
         return self.repository.create_new_record(dataset, user_cookie)
 
+    def record(self, dataset: DataSet, user_cookie: str) -> bool:
+        """Queues the view; it is written with the next analytics flush unless already recorded."""
+        return record_event(
+            DSViewRecord.__tablename__,
+            ("user_id", "dataset_id", "view_cookie"),
+            user_id=current_user.id if current_user.is_authenticated else None,
+            dataset_id=dataset.id,
+            view_date=datetime.now(timezone.utc),
+            view_cookie=user_cookie,
+        )
+
     def create_cookie(self, dataset: DataSet) -> str:
 
         user_cookie = request.cookies.get("view_cookie")
         if not user_cookie:
             user_cookie = str(uuid.uuid4())
 
-        existing_record = self.the_record_exists(dataset=dataset, user_cookie=user_cookie)
-
-        if not existing_record:
-            self.create_new_record(dataset=dataset, user_cookie=user_cookie)
+        self.record(dataset=dataset, user_cookie=user_cookie)
 
         return user_cookie
 
@@ -415,6 +528,230 @@ class DOIMappingService(BaseService):
             return None
 
 
+class DOIResolverService:
+    """
+    Resolves /doi/<doi>/ paths: each DOI to the id of its dataset or to the DOI it was remapped to.
+    Resolutions are kept in a bounded LRU, so a warm DOI costs no lookup queries. Flushes that
+    change a dataset_doi or a DOIMapping evict the DOIs involved once they commit (see
+    evict_changed_dois). Changes made by other processes, such as the deposition worker, are caught
+    by the ttl, and a cached dataset whose DOI no longer matches is resolved again.
+    """
+
+    TTL = 300
+    MAX_ENTRIES = 10000
+
+    def __init__(self):
+        self.dataset_repository = DataSetRepository()
+        self.doi_mapping_repository = DOIMappingRepository()
+        self.cache = LRUCache(ttl=self.TTL, max_entries=self.MAX_ENTRIES)
+
+    def _resolution(self, doi: str) -> Optional[Tuple[Optional[int], Optional[str]]]:
+        """(dataset id, None) or (None, new DOI); None for unknown DOIs, which are not cached."""
+        resolution = self.cache.get(doi)
+        if resolution is None:
+            doi_mapping = self.doi_mapping_repository.get_new_doi(doi)
+            if doi_mapping:
+                resolution = (None, doi_mapping.dataset_doi_new)
+            else:
+                dataset_id = self.dataset_repository.get_id_by_doi(doi)
+                if dataset_id is None:
+                    return None
+                resolution = (dataset_id, None)
+            self.cache.set(doi, resolution)
+        return resolution
+
+    def resolve(self, doi: str) -> Tuple[Optional[DataSet], Optional[str]]:
+        """The dataset published under doi, loaded for its page, or the DOI to redirect to."""
+        for _ in range(2):
+            resolution = self._resolution(doi)
+            if resolution is None:
+                return None, None
+            dataset_id, new_doi = resolution
+            if new_doi:
+                return None, new_doi
+            dataset = self.dataset_repository.get_for_detail(dataset_id)
+            if dataset is not None and dataset.ds_meta_data.dataset_doi == doi:
+                return dataset, None
+            # Changed by another process since it was cached
+            self.cache.discard(doi)
+        return None, None
+
+    def invalidate(self, *dois: str):
+        self.cache.discard(*dois)
+
+
+_CHANGED_DOIS = "changed_dois"
+
+
+@event.listens_for(Session, "after_flush")
+def collect_changed_dois(session, flush_context):
+    changed = set()
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(instance, DSMetaData):
+            changed.update(*inspect(instance).attrs.dataset_doi.history)
+        elif isinstance(instance, DOIMapping):
+            for attr in ("dataset_doi_old", "dataset_doi_new"):
+                changed.update(*getattr(inspect(instance).attrs, attr).history)
+    changed.discard(None)
+    if changed:
+        session.info.setdefault(_CHANGED_DOIS, set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def evict_changed_dois(session):
+    changed = session.info.pop(_CHANGED_DOIS, None)
+    if changed:
+        resolve(DOIResolverService).invalidate(*changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_changed_dois(session):
+    session.info.pop(_CHANGED_DOIS, None)
+
+
+class HubCounterService(BaseService):
+    def __init__(self):
+        super().__init__(HubCounterRepository())
+        self.dataset_repository = DataSetRepository()
+        self.fossils_repository = FossilsRepository()
+        self.dsdownloadrecord_repository = DSDownloadRecordRepository()
+        self.dsviewrecord_repository = DSViewRecordRepository()
+        self.hubfiledownloadrecord_repository = HubfileDownloadRecordRepository()
+        self.hubfileviewrecord_repository = HubfileViewRecordRepository()
+
+    def values(self) -> dict:
+        """All the counters, read with a single query. Counters never reconciled read as 0."""
+        stored = self.repository.values()
+        return {name: stored.get(name, 0) for name in COUNTER_NAMES}
+
+    def reconcile(self) -> dict:
+        """Recomputes every counter from its source table and stores the result."""
+        values = {
+            SYNCHRONIZED_DATASETS: self.dataset_repository.count_synchronized_datasets(),
+            FOSSILS_FILES: self.fossils_repository.count(),
+            DATASET_DOWNLOADS: self.dsdownloadrecord_repository.total_dataset_downloads(),
+            DATASET_VIEWS: self.dsviewrecord_repository.total_dataset_views(),
+            FILE_DOWNLOADS: self.hubfiledownloadrecord_repository.total_hubfile_downloads(),
+            FILE_VIEWS: self.hubfileviewrecord_repository.total_hubfile_views(),
+        }
+        self.repository.replace(values)
+        return values
+
+
+class DSDailyMetricService(BaseService):
+    def __init__(self):
+        super().__init__(DSDailyMetricRepository())
+
+    def rebuild(self, days: Optional[int] = None) -> int:
+        """Rebuilds the trending rollups of the last days (UTC, today included), or all of them."""
+        since = datetime.now(timezone.utc).date() - timedelta(days=days - 1) if days else None
+        return self.repository.rebuild(since=since)
+
+
+class DepositionJobService(BaseService):
+    """
+    Synchronizes datasets with Zenodo/Fakenodo outside the HTTP request.
+
+    The upload request only enqueues a DepositionJob; a worker process (`rosemary deposition:worker`)
+    claims due jobs and runs them step by step. Each completed step is committed, so a retry resumes where
+    the previous attempt stopped instead of creating a second deposition or re-uploading files.
+    """
+
+    LEASE = timedelta(minutes=30)
+    BACKOFF_BASE_SECONDS = 30
+    BACKOFF_MAX_SECONDS = 3600
+
+    def __init__(self, nodo_service=None):
+        super().__init__(DepositionJobRepository())
+        self.dsmetadata_repository = DSMetaDataRepository()
+        self.nodo_service = nodo_service or (resolve(FakenodoService) if USE_FAKENODO else resolve(ZenodoService))
+
+    def enqueue(self, dataset: DataSet) -> DepositionJob:
+        job = self.repository.get_by_dataset(dataset.id)
+        if job is not None:
+            return job
+        return self.repository.create(data_set_id=dataset.id, next_attempt_at=datetime.now(timezone.utc))
+
+    def process_next(self) -> Optional[DepositionJob]:
+        job = self.repository.claim_next(datetime.now(timezone.utc), self.LEASE)
+        if job is not None:
+            self.run(job)
+        return job
+
+    def run(self, job: DepositionJob) -> DepositionJob:
+        try:
+            self._run_steps(job)
+            job.status = DepositionJobStatus.DONE
+            job.last_error = None
+            logger.info(f"Deposition job {job.id} for dataset {job.data_set_id} finished")
+        except Exception as exc:
+            self.repository.session.rollback()
+            job.attempts += 1
+            job.last_error = str(exc)
+            if job.attempts >= job.max_attempts:
+                job.status = DepositionJobStatus.FAILED
+            else:
+                job.status = DepositionJobStatus.PENDING
+                job.next_attempt_at = datetime.now(timezone.utc) + self.backoff(job.attempts)
+            logger.exception(
+                f"Deposition job {job.id} failed at step '{job.step.value}' (attempt {job.attempts}): {exc}"
+            )
+
+        job.locked_at = None
+        self.repository.session.commit()
+        return job
+
+    def backoff(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(self.BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), self.BACKOFF_MAX_SECONDS))
+
+    def _checkpoint(self, job: DepositionJob, step: DepositionJobStep):
+        job.step = step
+        self.repository.session.commit()
+
+    def _run_steps(self, job: DepositionJob):
+        dataset = job.data_set
+
+        if job.step == DepositionJobStep.CREATE_DEPOSITION:
+            response = self.nodo_service.create_new_deposition(dataset.ds_meta_data)
+            if not response.get("id"):
+                raise Exception(f"Deposition service did not return a deposition id: {response}")
+            job.deposition_id = response["id"]
+            dataset.ds_meta_data.deposition_id = job.deposition_id
+            self._checkpoint(job, DepositionJobStep.UPLOAD_FILES)
+
+        if job.step == DepositionJobStep.UPLOAD_FILES:
+            fossils_files = sorted(dataset.fossils_files, key=lambda fossils_file: fossils_file.id)
+            for fossils_file in fossils_files[job.uploaded_files:]:
+                self.nodo_service.upload_file(dataset, job.deposition_id, fossils_file, user=dataset.user)
+                job.uploaded_files += 1
+                self.repository.session.commit()
+            self._checkpoint(job, DepositionJobStep.PUBLISH)
+
+        if job.step == DepositionJobStep.PUBLISH:
+            self.nodo_service.publish_deposition(job.deposition_id)
+            self._checkpoint(job, DepositionJobStep.FETCH_DOI)
+
+        if job.step == DepositionJobStep.FETCH_DOI:
+            deposition_doi = self.nodo_service.get_doi(job.deposition_id)
+            if not deposition_doi:
+                raise Exception(f"Deposition {job.deposition_id} has no DOI yet")
+            dataset.ds_meta_data.dataset_doi = deposition_doi
+            self._checkpoint(job, DepositionJobStep.DONE)
+
+    def work(self, burst: bool = False, poll_interval: float = 5.0) -> int:
+        """Processes due jobs until interrupted, or until the queue is empty when burst is set."""
+        processed = 0
+        while True:
+            job = self.process_next()
+            self.repository.session.remove()
+            if job is not None:
+                processed += 1
+                continue
+            if burst:
+                return processed
+            time.sleep(poll_interval)
+
+
 class SizeService:
 
     def __init__(self):
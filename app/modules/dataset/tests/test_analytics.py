@@ -0,0 +1,99 @@
+import os
+import time
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from app import db
+from app.modules.dataset.models import DataSet, DSMetaData, DSViewRecord, PublicationType
+from core.managers.analytics_manager import AnalyticsBuffer
+
+KEY = ("user_id", "dataset_id", "view_cookie")
+
+
+@pytest.fixture
+def dataset(test_client):
+    meta = DSMetaData(title="Analytics", description="Analytics test", publication_type=PublicationType.NONE)
+    db.session.add(meta)
+    db.session.commit()
+    dataset = DataSet(user_id=1, ds_meta_data_id=meta.id)
+    db.session.add(dataset)
+    db.session.commit()
+    yield dataset
+    DSViewRecord.query.filter_by(dataset_id=dataset.id).delete()
+    db.session.commit()
+
+
+@pytest.fixture
+def buffer(test_app, tmp_path):
+    buffer = AnalyticsBuffer(test_app)
+    buffer.sync = False
+    buffer.spool_dir = str(tmp_path / "spool")
+    # Flushed by hand, never by the background thread
+    buffer._ensure_thread = lambda: None
+    return buffer
+
+
+def view(dataset, cookie):
+    return dict(user_id=None, dataset_id=dataset.id, view_date=datetime.now(timezone.utc), view_cookie=cookie)
+
+
+def test_views_are_written_in_one_batch_without_duplicates(buffer, dataset):
+    db.session.add(DSViewRecord(**view(dataset, "stored")))
+    db.session.commit()
+
+    assert buffer.record("ds_view_record", KEY, **view(dataset, "a"))
+    assert not buffer.record("ds_view_record", KEY, **view(dataset, "a"))
+    assert buffer.record("ds_view_record", KEY, **view(dataset, "b"))
+    assert buffer.record("ds_view_record", KEY, **view(dataset, "stored"))
+    assert DSViewRecord.query.filter_by(dataset_id=dataset.id).count() == 1
+
+    assert buffer.flush() == 2
+    cookies = sorted(record.view_cookie for record in DSViewRecord.query.filter_by(dataset_id=dataset.id))
+    assert cookies == ["a", "b", "stored"]
+
+
+def test_failed_flush_is_spooled_and_replayed(buffer, dataset):
+    buffer.record("ds_view_record", KEY, **view(dataset, "offline"))
+
+    with patch.object(buffer, "_write", side_effect=RuntimeError("database is down")):
+        assert buffer.flush() == 0
+    assert len(os.listdir(buffer.spool_dir)) == 1
+    assert DSViewRecord.query.filter_by(dataset_id=dataset.id).count() == 0
+
+    assert buffer.flush() == 1
+    assert os.listdir(buffer.spool_dir) == []
+    record = DSViewRecord.query.filter_by(dataset_id=dataset.id).one()
+    assert record.view_cookie == "offline"
+    assert record.view_date is not None
+
+
+def test_spool_claimed_by_a_dead_process_is_replayed(buffer, dataset):
+    buffer.record("ds_view_record", KEY, **view(dataset, "orphaned"))
+    with patch.object(buffer, "_write", side_effect=RuntimeError("database is down")):
+        buffer.flush()
+    # Claimed by a worker that died before removing it
+    (spooled,) = os.listdir(buffer.spool_dir)
+    claimed = os.path.join(buffer.spool_dir, f"{spooled}.99999.1.replay")
+    os.rename(os.path.join(buffer.spool_dir, spooled), claimed)
+
+    # Still within the flush of its owner
+    assert buffer.flush() == 0
+    assert os.path.exists(claimed)
+
+    an_hour_ago = time.time() - 3600
+    os.utime(claimed, (an_hour_ago, an_hour_ago))
+    assert buffer.flush() == 1
+    assert os.listdir(buffer.spool_dir) == []
+    assert DSViewRecord.query.filter_by(dataset_id=dataset.id).one().view_cookie == "orphaned"
+
+
+def test_full_queue_spills_to_the_spool(buffer, dataset):
+    buffer.max_pending = 1
+    buffer.record("ds_view_record", KEY, **view(dataset, "queued"))
+    buffer.record("ds_view_record", KEY, **view(dataset, "spilled"))
+
+    assert len(buffer._pending) == 1
+    assert buffer.flush() == 2
+    assert DSViewRecord.query.filter_by(dataset_id=dataset.id).count() == 2
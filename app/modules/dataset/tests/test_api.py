@@ -0,0 +1,122 @@
+import json
+from urllib.parse import unquote
+
+import pytest
+
+from app import db
+from app.modules.dataset.api import dataset_fields, dataset_serializer, file_fields
+from app.modules.dataset.models import DataSet, DSMetaData, PublicationType
+from app.modules.dataset.repositories import for_api
+from app.modules.fossils.models import FossilsFile, FossilsMetaData
+from app.modules.hubfile.models import Hubfile
+from core.serialisers.benchmark import ReferenceSerializer, run
+
+
+@pytest.fixture
+def api_datasets(test_client):
+    dataset_ids = []
+    for index in range(5):
+        meta = DSMetaData(
+            title=f"API {index}",
+            description="API test",
+            publication_type=PublicationType.NONE,
+            dataset_doi=f"10.1234/api.{index}",
+        )
+        dataset = DataSet(user_id=1, ds_meta_data=meta)
+        fossils_file = FossilsFile(
+            fossils_meta_data=FossilsMetaData(csv_filename=f"{index}.csv", title=f"{index}.csv", description="")
+        )
+        fossils_file.files.append(Hubfile(name=f"{index}.csv", checksum="md5", size=100))
+        dataset.fossils_files.append(fossils_file)
+        db.session.add(dataset)
+        db.session.commit()
+        dataset_ids.append(dataset.id)
+    yield dataset_ids
+    for dataset in DataSet.query.filter(DataSet.id.in_(dataset_ids)):
+        db.session.delete(dataset)
+    db.session.commit()
+
+
+def test_datasets_are_paged_with_a_cursor_and_link_header(test_client, api_datasets, query_budget):
+    seen, links, url = [], [], "/api/v1/datasets/?limit=2&fields=dataset_id,files"
+    while url:
+        with query_budget(5):
+            response = test_client.get(url)
+        assert response.status_code == 200
+        assert len(response.json["items"]) <= 2
+        seen.extend(item["dataset_id"] for item in response.json["items"])
+        link = response.headers.get("Link")
+        assert set(response.json) == {"items"}
+        assert (link is None) == ("X-Next-Cursor" not in response.headers)
+        if link:
+            assert f"cursor={response.headers['X-Next-Cursor']}" in unquote(link)
+        url = link[1 : link.index(">")] if link else None
+        links.append(url)
+
+    assert seen == sorted(api_datasets)
+    # The next page keeps the other arguments
+    assert "limit=2" in links[0] and "fields=dataset_id%2Cfiles" in links[0]
+
+
+def test_datasets_sparse_fields_and_filters(test_client, api_datasets):
+    response = test_client.get("/api/v1/datasets/?doi=10.1234/api.3&fields=dataset_id,name")
+
+    assert response.status_code == 200
+    assert response.json["items"] == [{"dataset_id": api_datasets[3], "name": "API 3"}]
+
+    response = test_client.get("/api/v1/datasets/?user_id=2")
+    assert response.json == {"items": []}
+
+    response = test_client.get(f"/api/v1/datasets/{api_datasets[0]}?fields=files")
+    assert response.json == {
+        "files": [{"file_id": response.json["files"][0]["file_id"], "file_name": "0.csv", "size": "100 bytes"}]
+    }
+
+
+@pytest.mark.parametrize("query", ["limit=0", "limit=x", "cursor=nope", "fields=secret", "user_id=abc"])
+def test_datasets_rejects_bad_arguments(test_client, query):
+    response = test_client.get(f"/api/v1/datasets/?{query}")
+
+    assert response.status_code == 400
+
+
+def test_serializer_matches_the_field_by_field_reference(test_client, api_datasets):
+    datasets = DataSet.query.options(*for_api()).filter(DataSet.id.in_(api_datasets)).order_by(DataSet.id).all()
+    reference = ReferenceSerializer(dataset_fields, {"files": ReferenceSerializer(file_fields)})
+
+    assert dataset_serializer.serialize_many(datasets) == [reference.serialize(dataset) for dataset in datasets]
+    assert dataset_serializer.serialize(datasets[0], ["doi"]) == {"doi": datasets[0].get_dinosaurhub_doi()}
+
+    # Expired columns are reloaded through the ORM, not read stale from the instance
+    db.session.expire(datasets[0], ["created_at"])
+    assert dataset_serializer.serialize(datasets[0])["created"] == datasets[0].created_at.isoformat()
+
+
+def test_serializer_benchmark_runs():
+    timings = run(items=20, files=2, repeat=1)
+
+    assert set(timings) == {"reference", "serialize", "serialize_many"}
+
+
+def test_export_streams_one_json_document_per_synchronized_dataset(test_client, api_datasets):
+    unsynchronized = DataSet(
+        user_id=1,
+        ds_meta_data=DSMetaData(title="Draft", description="", publication_type=PublicationType.NONE),
+    )
+    db.session.add(unsynchronized)
+    db.session.commit()
+
+    response = test_client.get("/api/v1/datasets/export.ndjson")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    records = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [record["id"] for record in records] == sorted(api_datasets)
+
+    dataset = db.session.get(DataSet, api_datasets[0])
+    with test_client.application.test_request_context(base_url="http://localhost/"):
+        expected = json.loads(json.dumps(dataset.to_dict(), default=lambda value: value.isoformat()))
+    assert records[0] == expected
+
+    db.session.delete(unsynchronized)
+    db.session.commit()
@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy import event
+from sqlalchemy.sql.compiler import InsertmanyvaluesSentinelOpts
+
+from app import db
+from app.modules.dataset.models import DataSet, DSMetaData, PublicationType
+from app.modules.dataset.services import DataSetBuilder, DataSetService
+from app.modules.fossils.models import FossilsFile
+from core.storage.ingest import IngestedFile
+
+
+def test_builder_inserts_rows_in_one_batch_per_table(test_client):
+    meta = DSMetaData(title="Bulk", description="Bulk import", publication_type=PublicationType.NONE)
+    db.session.add(meta)
+    db.session.commit()
+    dataset = DataSet(user_id=1, ds_meta_data_id=meta.id)
+    db.session.add(dataset)
+    db.session.commit()
+
+    builder = DataSetBuilder(DataSetService(), dataset, MagicMock())
+    for i in range(40):
+        builder.add(f"site_{i}.csv", ingested=IngestedFile(size=i + 1, md5=f"md5_{i}", sha256=f"sha_{i}"))
+
+    tables = ("fossils_meta_data", "fossils_file", "file")
+    statements = dict.fromkeys(tables, 0)
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        for table in tables:
+            if statement.startswith(f"INSERT INTO {table} "):
+                statements[table] += 1
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        builder.build()
+        db.session.commit()
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    # MariaDB and PostgreSQL return the autoincrement ids of a multi-row INSERT in order, so each table
+    # takes one statement. SQLite cannot, and SQLAlchemy falls back to one INSERT per row there.
+    dialect = db.engine.dialect
+    batched = dialect.insert_executemany_returning and bool(
+        dialect.insertmanyvalues_implicit_sentinel & InsertmanyvaluesSentinelOpts.ANY_AUTOINCREMENT
+    )
+    assert statements == dict.fromkeys(tables, 1 if batched else 40)
+
+    fossils = FossilsFile.query.filter_by(data_set_id=dataset.id).order_by(FossilsFile.id).all()
+    assert len(fossils) == 40
+    for i, fossil in enumerate(fossils):
+        assert fossil.fossils_meta_data.csv_filename == f"site_{i}.csv"
+        assert [(f.name, f.size, f.sha256) for f in fossil.files] == [(f"site_{i}.csv", i + 1, f"sha_{i}")]
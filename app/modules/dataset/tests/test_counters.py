@@ -0,0 +1,101 @@
+import pytest
+
+from app import db
+from app.modules.dataset.counters import (
+    DATASET_DOWNLOADS,
+    DATASET_VIEWS,
+    FOSSILS_FILES,
+    SYNCHRONIZED_DATASETS,
+)
+from app.modules.dataset.models import DataSet, DSDownloadRecord, DSMetaData, HubCounter, PublicationType
+from app.modules.dataset.services import DSDownloadRecordService, DSViewRecordService, HubCounterService
+from app.modules.fossils.models import FossilsFile, FossilsMetaData
+
+
+@pytest.fixture
+def counters(test_client):
+    service = HubCounterService()
+    service.reconcile()
+    return service
+
+
+@pytest.fixture
+def dataset(test_client):
+    meta = DSMetaData(title="Counters", description="Counters test", publication_type=PublicationType.NONE)
+    dataset = DataSet(user_id=1, ds_meta_data=meta)
+    db.session.add(dataset)
+    db.session.commit()
+    return dataset
+
+
+def add_fossils_file(dataset, name):
+    fossils_file = FossilsFile(
+        data_set_id=dataset.id, fossils_meta_data=FossilsMetaData(csv_filename=name, title=name, description="")
+    )
+    db.session.add(fossils_file)
+    db.session.commit()
+    return fossils_file
+
+
+def test_counters_follow_files_publication_and_downloads(test_app, counters, dataset):
+    before = counters.values()
+
+    fossils_file = add_fossils_file(dataset, "rex.csv")
+    add_fossils_file(dataset, "raptor.csv")
+    dataset.ds_meta_data.dataset_doi = "10.1234/counters"
+    db.session.commit()
+    with test_app.test_request_context():
+        DSDownloadRecordService().record(dataset_id=dataset.id, user_cookie="counter-cookie")
+    db.session.delete(fossils_file)
+    db.session.commit()
+
+    after = counters.values()
+    assert after[FOSSILS_FILES] == before[FOSSILS_FILES] + 1
+    assert after[SYNCHRONIZED_DATASETS] == before[SYNCHRONIZED_DATASETS] + 1
+    assert after[DATASET_DOWNLOADS] == before[DATASET_DOWNLOADS] + 1
+
+    dataset.ds_meta_data.dataset_doi = None
+    db.session.commit()
+    assert counters.values()[SYNCHRONIZED_DATASETS] == before[SYNCHRONIZED_DATASETS]
+
+
+def test_deleting_a_published_dataset_with_expired_metadata(counters, dataset):
+    dataset.ds_meta_data.dataset_doi = "10.1234/expired"
+    db.session.commit()
+    before = counters.values()[SYNCHRONIZED_DATASETS]
+
+    # Nothing of it is loaded when it is deleted
+    db.session.expire_all()
+    db.session.delete(db.session.get(DataSet, dataset.id))
+    db.session.commit()
+
+    assert counters.values()[SYNCHRONIZED_DATASETS] == before - 1
+
+
+def test_counters_missing_after_a_reset_are_recreated(test_app, counters, dataset):
+    HubCounter.query.delete()
+    db.session.commit()
+
+    with test_app.test_request_context():
+        DSViewRecordService().record(dataset, user_cookie="reset-cookie")
+
+    assert counters.repository.values() == {DATASET_VIEWS: 1}
+
+
+def test_reconcile_fixes_drift_from_bulk_changes(counters, dataset):
+    add_fossils_file(dataset, "bulk.csv")
+    DSDownloadRecord.query.delete()
+    FossilsFile.query.filter_by(data_set_id=dataset.id).delete()
+    db.session.commit()
+
+    assert counters.reconcile()[FOSSILS_FILES] == FossilsFile.query.count()
+    assert counters.values()[DATASET_DOWNLOADS] == 0
+
+
+def test_home_page_reads_counters(test_client, counters):
+    HubCounterService().repository.replace({DATASET_VIEWS: 4242})
+
+    response = test_client.get("/")
+
+    assert response.status_code == 200
+    assert b"4242 datasets viewed" in response.data
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.modules.dataset.models import DepositionJobStatus, DepositionJobStep
+from app.modules.dataset.services import DepositionJobService
+
+
+def create_mock_job(step=DepositionJobStep.CREATE_DEPOSITION, uploaded_files=0, attempts=0, files=2):
+    fossils_files = [MagicMock(id=i) for i in range(1, files + 1)]
+    dataset = MagicMock(id=10, fossils_files=fossils_files)
+
+    job = MagicMock()
+    job.id = 1
+    job.data_set_id = dataset.id
+    job.data_set = dataset
+    job.step = step
+    job.status = DepositionJobStatus.RUNNING
+    job.deposition_id = 123 if step != DepositionJobStep.CREATE_DEPOSITION else None
+    job.uploaded_files = uploaded_files
+    job.attempts = attempts
+    job.max_attempts = 5
+    return job
+
+
+@pytest.fixture
+def nodo_service():
+    nodo = MagicMock()
+    nodo.create_new_deposition.return_value = {"id": 123}
+    nodo.get_doi.return_value = "10.5281/fakenodo.123"
+    return nodo
+
+
+@pytest.fixture
+def service(nodo_service):
+    service = DepositionJobService(nodo_service=nodo_service)
+    service.repository = MagicMock()
+    return service
+
+
+def test_run_completes_every_step(service, nodo_service):
+    job = create_mock_job()
+
+    service.run(job)
+
+    nodo_service.create_new_deposition.assert_called_once_with(job.data_set.ds_meta_data)
+    assert nodo_service.upload_file.call_count == 2
+    nodo_service.publish_deposition.assert_called_once_with(123)
+    assert job.data_set.ds_meta_data.deposition_id == 123
+    assert job.data_set.ds_meta_data.dataset_doi == "10.5281/fakenodo.123"
+    assert job.step == DepositionJobStep.DONE
+    assert job.status == DepositionJobStatus.DONE
+    assert job.locked_at is None
+
+
+def test_run_resumes_from_the_last_checkpoint(service, nodo_service):
+    job = create_mock_job(step=DepositionJobStep.UPLOAD_FILES, uploaded_files=1)
+
+    service.run(job)
+
+    nodo_service.create_new_deposition.assert_not_called()
+    nodo_service.upload_file.assert_called_once()
+    assert nodo_service.upload_file.call_args.args[2] is job.data_set.fossils_files[1]
+    assert job.status == DepositionJobStatus.DONE
+
+
+def test_failed_step_is_retried_with_backoff(service, nodo_service):
+    nodo_service.publish_deposition.side_effect = Exception("Zenodo unavailable")
+    job = create_mock_job()
+
+    before = datetime.now(timezone.utc)
+    service.run(job)
+
+    assert job.status == DepositionJobStatus.PENDING
+    assert job.step == DepositionJobStep.PUBLISH
+    assert job.uploaded_files == 2
+    assert job.attempts == 1
+    assert job.last_error == "Zenodo unavailable"
+    assert job.next_attempt_at >= before + timedelta(seconds=service.BACKOFF_BASE_SECONDS)
+    service.repository.session.rollback.assert_called_once()
+
+
+def test_job_fails_after_max_attempts(service, nodo_service):
+    nodo_service.get_doi.return_value = None
+    job = create_mock_job(step=DepositionJobStep.FETCH_DOI, attempts=4)
+
+    service.run(job)
+
+    assert job.status == DepositionJobStatus.FAILED
+    assert job.attempts == 5
+
+
+def test_backoff_is_exponential_and_capped(service):
+    assert service.backoff(1) == timedelta(seconds=30)
+    assert service.backoff(3) == timedelta(seconds=120)
+    assert service.backoff(20) == timedelta(seconds=service.BACKOFF_MAX_SECONDS)
+
+
+def test_enqueue_is_idempotent(service):
+    existing = MagicMock()
+    service.repository.get_by_dataset.return_value = existing
+
+    assert service.enqueue(MagicMock(id=10)) is existing
+    service.repository.create.assert_not_called()
+
+
+def test_work_in_burst_mode_stops_when_queue_is_empty(service, nodo_service):
+    jobs = [create_mock_job(), None]
+    service.repository.claim_next.side_effect = jobs
+
+    assert service.work(burst=True) == 1
+    assert service.repository.session.remove.call_count == 2
@@ -0,0 +1,191 @@
+import io
+import os
+import threading
+import zipfile
+from unittest.mock import patch
+
+import pytest
+
+from app import db
+from app.modules.dataset.models import DataSet, DSMetaData, PublicationType
+from app.modules.fossils.models import FossilsFile, FossilsMetaData
+from app.modules.hubfile.models import Hubfile
+from core.storage.archive_cache import ArchiveCache
+from core.storage.zip_stream import stream_zip
+
+
+@pytest.fixture
+def csv_files(tmp_path):
+    paths = {}
+    for name, content in [("rex.csv", b"species,period\nT. rex,Cretaceous\n" * 1000), ("empty.csv", b"")]:
+        path = tmp_path / name
+        path.write_bytes(content)
+        paths[name] = str(path)
+    return paths
+
+
+@pytest.fixture
+def archive_cache_dir(test_app, tmp_path):
+    cache_dir = str(tmp_path / "archives")
+    test_app.config["ARCHIVE_CACHE_DIR"] = cache_dir
+    yield cache_dir
+    test_app.config["ARCHIVE_CACHE_DIR"] = None
+
+
+@pytest.fixture
+def dataset_with_files(test_client, csv_files):
+    meta = DSMetaData(title="Download", description="Download test", publication_type=PublicationType.NONE)
+    db.session.add(meta)
+    db.session.commit()
+    dataset = DataSet(user_id=1, ds_meta_data_id=meta.id)
+    db.session.add(dataset)
+    db.session.commit()
+
+    for name, path in csv_files.items():
+        fmmetadata = FossilsMetaData(csv_filename=name, title=name, description="")
+        fossil = FossilsFile(data_set_id=dataset.id, fossils_meta_data=fmmetadata)
+        fossil.files.append(Hubfile(name=name, checksum="md5", size=os.path.getsize(path)))
+        db.session.add(fossil)
+    db.session.commit()
+    return dataset
+
+
+def test_stream_zip_yields_members_as_they_are_read(csv_files):
+    chunks = stream_zip([(f"dataset_1/{name}", path) for name, path in csv_files.items()], chunk_size=4096)
+
+    first = next(chunks)
+    assert first.startswith(b"PK\x03\x04")
+    assert len(first) < os.path.getsize(csv_files["rex.csv"])
+
+    archive = zipfile.ZipFile(io.BytesIO(first + b"".join(chunks)))
+    assert archive.testzip() is None
+    assert archive.namelist() == ["dataset_1/rex.csv", "dataset_1/empty.csv"]
+    # Sizes and CRCs go in data descriptors, written after each member
+    assert all(info.flag_bits & 0x08 for info in archive.infolist())
+    with open(csv_files["rex.csv"], "rb") as f:
+        assert archive.read("dataset_1/rex.csv") == f.read()
+
+
+def test_stream_zip_is_reproducible_from_the_contents(csv_files):
+    entries = [(f"dataset_1/{name}", path) for name, path in csv_files.items()]
+    first = b"".join(stream_zip(entries))
+
+    # Same contents stored again, at another time and with other permissions
+    os.utime(csv_files["rex.csv"], (1_000_000_000, 1_000_000_000))
+    os.chmod(csv_files["empty.csv"], 0o600)
+    second = b"".join(stream_zip(entries))
+
+    assert first == second
+    assert zipfile.ZipFile(io.BytesIO(second)).getinfo("dataset_1/rex.csv").date_time == (1980, 1, 1, 0, 0, 0)
+
+
+def test_download_dataset_streams_then_serves_from_cache(test_client, dataset_with_files, csv_files, archive_cache_dir):
+    def path_by_hubfile(hubfile, dataset=None):
+        return csv_files[hubfile.name]
+
+    with patch("app.modules.dataset.routes.dataset_service.hubfile_service.get_path_by_hubfile") as get_path:
+        get_path.side_effect = path_by_hubfile
+        first = test_client.get(f"/dataset/download/{dataset_with_files.id}")
+        first_data = first.data
+        second = test_client.get(f"/dataset/download/{dataset_with_files.id}")
+
+    assert first.status_code == 200
+    assert first.mimetype == "application/zip"
+    assert f'filename="dataset_{dataset_with_files.id}.zip"' in first.headers["Content-Disposition"]
+
+    archive = zipfile.ZipFile(io.BytesIO(first_data))
+    assert sorted(archive.namelist()) == sorted(f"dataset_{dataset_with_files.id}/{name}" for name in csv_files)
+
+    cached = [f for f in os.listdir(archive_cache_dir) if f.endswith(".zip")]
+    assert len(cached) == 1
+    assert second.status_code == 200
+    assert second.data == first_data
+
+
+def test_archive_cache_key_follows_the_manifest():
+    key = ArchiveCache.key_for([("dataset_1/a.csv", "sha_a"), ("dataset_1/b.csv", "sha_b")])
+
+    assert key == ArchiveCache.key_for([("dataset_1/a.csv", "sha_a"), ("dataset_1/b.csv", "sha_b")])
+    assert key != ArchiveCache.key_for([("dataset_1/a.csv", "sha_a"), ("dataset_1/b.csv", "changed")])
+
+
+def test_archive_cache_evicts_least_recently_used(tmp_path):
+    cache = ArchiveCache(root=str(tmp_path), max_bytes=250)
+
+    for key in ("old", "recent"):
+        b"".join(cache.fetch(key, lambda: iter([b"x" * 100])).chunks)
+    os.utime(cache.path_for("old"), (1, 1))
+    os.utime(cache.path_for("recent"), (2, 2))
+    assert cache.fetch("recent", lambda: iter([])).hit
+
+    b"".join(cache.fetch("new", lambda: iter([b"x" * 100])).chunks)
+
+    assert not os.path.exists(cache.path_for("old"))
+    assert os.path.exists(cache.path_for("recent"))
+    assert os.path.exists(cache.path_for("new"))
+
+
+def test_archive_cache_coalesces_concurrent_misses(tmp_path):
+    cache = ArchiveCache(root=str(tmp_path))
+    builds = []
+    release = threading.Event()
+
+    def build():
+        builds.append(1)
+        yield b"first half,"
+        release.wait(5)
+        yield b"second half"
+
+    builder = cache.fetch("key", build)
+    chunks = iter(builder.chunks)
+    assert next(chunks) == b"first half,"
+
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(cache.fetch("key", build)))
+    waiter.start()
+    release.set()
+    assert b"".join(chunks) == b"second half"
+    waiter.join(5)
+
+    assert len(builds) == 1
+    assert results[0].hit
+    with open(results[0].path, "rb") as f:
+        assert f.read() == b"first half,second half"
+
+
+def test_archive_cache_waits_a_bounded_time_for_a_slow_builder(tmp_path):
+    cache = ArchiveCache(root=str(tmp_path), lock_timeout=0.2)
+    builder = cache.fetch("key", lambda: iter([b"slow client"]))
+    # Its client has not read anything yet, so the lock is still held
+
+    waiter = cache.fetch("key", lambda: iter([b"own copy"]))
+
+    assert not waiter.hit
+    assert b"".join(waiter.chunks) == b"own copy"
+    assert b"".join(builder.chunks) == b"slow client"
+    with open(cache.path_for("key"), "rb") as f:
+        assert f.read() == b"slow client"
+
+
+def test_download_dataset_conditional_get_and_range(test_client, dataset_with_files, csv_files, archive_cache_dir):
+    def path_by_hubfile(hubfile, dataset=None):
+        return csv_files[hubfile.name]
+
+    url = f"/dataset/download/{dataset_with_files.id}"
+    with patch("app.modules.dataset.routes.dataset_service.hubfile_service.get_path_by_hubfile") as get_path:
+        get_path.side_effect = path_by_hubfile
+        # A Range request on a cold cache completes the archive first, then serves the slice
+        partial = test_client.get(url, headers={"Range": "bytes=0-3"})
+        full = test_client.get(url)
+        etag = full.headers["ETag"]
+        not_modified = test_client.get(url, headers={"If-None-Match": etag})
+        since = test_client.get(url, headers={"If-Modified-Since": full.headers["Last-Modified"]})
+
+    assert partial.status_code == 206
+    assert partial.data == b"PK\x03\x04"
+    assert partial.headers["ETag"] == etag
+
+    assert full.status_code == 200
+    assert full.data.startswith(b"PK\x03\x04")
+    assert not_modified.status_code == 304
+    assert since.status_code == 304
@@ -0,0 +1,83 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from core.storage.ingest import (
+    digest_path_for,
+    discard_digest,
+    ingest_stream,
+    ingested_file_for,
+    load_digest,
+    save_digest,
+)
+
+CONTENT = b"species,period,location\n" * 5000
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    return os.path.join(tmp_path, "fossils.csv")
+
+
+def test_ingest_stream_writes_file_and_digests_in_one_pass(csv_path):
+    ingested = ingest_stream(io.BytesIO(CONTENT), csv_path, chunk_size=4096)
+
+    with open(csv_path, "rb") as f:
+        assert f.read() == CONTENT
+    assert ingested.size == len(CONTENT)
+    assert ingested.md5 == hashlib.md5(CONTENT).hexdigest()
+    assert ingested.sha256 == hashlib.sha256(CONTENT).hexdigest()
+    assert not os.path.exists(f"{csv_path}.part")
+
+
+def test_ingest_stream_removes_partial_file_on_error(csv_path):
+    class BrokenStream:
+        def __init__(self):
+            self.calls = 0
+
+        def read(self, size):
+            self.calls += 1
+            if self.calls > 1:
+                raise IOError("connection reset")
+            return b"partial"
+
+    with pytest.raises(IOError):
+        ingest_stream(BrokenStream(), csv_path)
+
+    assert not os.path.exists(csv_path)
+    assert not os.path.exists(f"{csv_path}.part")
+
+
+def test_saved_digest_is_reused_without_reading_the_file(csv_path, monkeypatch):
+    ingested = ingest_stream(io.BytesIO(CONTENT), csv_path)
+    save_digest(csv_path, ingested)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("file should not be re-read")
+
+    monkeypatch.setattr("core.storage.ingest.digest_file", fail)
+    recorded = ingested_file_for(csv_path)
+
+    assert recorded.sha256 == ingested.sha256
+    assert recorded.size == ingested.size
+
+
+def test_stale_digest_is_ignored(csv_path):
+    ingested = ingest_stream(io.BytesIO(CONTENT), csv_path)
+    save_digest(csv_path, ingested)
+
+    with open(csv_path, "ab") as f:
+        f.write(b"extra,row,added\n")
+
+    assert load_digest(csv_path) is None
+    assert ingested_file_for(csv_path).size == len(CONTENT) + len(b"extra,row,added\n")
+
+
+def test_discard_digest(csv_path):
+    save_digest(csv_path, ingest_stream(io.BytesIO(CONTENT), csv_path))
+
+    discard_digest(csv_path)
+
+    assert not os.path.exists(digest_path_for(csv_path))
@@ -0,0 +1,146 @@
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import text, update
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.modules.dataset.models import Author, DataSet, DOIMapping, DSMetaData, PublicationType
+from app.modules.dataset.services import DataSetService, DOIResolverService
+from app.modules.fossils.models import FossilsFile, FossilsMetaData
+from app.modules.hubfile.models import Hubfile
+from app.modules.profile.models import UserProfile
+from core.managers.query_stats_manager import _STARTED, capture_queries, fingerprint
+from core.services.registry import resolve
+
+
+def create_dataset(doi, authors, files):
+    meta = DSMetaData(
+        title=doi, description="Loading test", publication_type=PublicationType.NONE, dataset_doi=doi, tags="a,b"
+    )
+    meta.authors = [Author(name=f"Author {index}") for index in range(authors)]
+    dataset = DataSet(user_id=1, ds_meta_data=meta)
+    for index in range(files):
+        fossils_file = FossilsFile(
+            fossils_meta_data=FossilsMetaData(csv_filename=f"{index}.csv", title=f"{index}.csv", description="")
+        )
+        fossils_file.files.append(Hubfile(name=f"{index}.csv", checksum="md5", size=100))
+        dataset.fossils_files.append(fossils_file)
+    db.session.add(dataset)
+    db.session.commit()
+    return dataset
+
+
+@pytest.fixture
+def datasets(test_client):
+    if not UserProfile.query.filter_by(user_id=1).first():
+        db.session.add(UserProfile(user_id=1, name="Mary", surname="Anning"))
+        db.session.commit()
+    dataset_ids = [
+        create_dataset("10.1234/small", authors=1, files=1).id,
+        create_dataset("10.1234/large", authors=4, files=6).id,
+    ]
+    yield ["10.1234/small", "10.1234/large"]
+    for dataset in DataSet.query.filter(DataSet.id.in_(dataset_ids)):
+        db.session.delete(dataset)
+    db.session.commit()
+
+
+def test_dataset_page_queries_do_not_grow_with_files_or_authors(test_client, datasets):
+    counts = []
+    for doi in datasets:
+        db.session.expunge_all()
+        with capture_queries() as stats:
+            response = test_client.get(f"/doi/{doi}/")
+        assert response.status_code == 200
+        counts.append(stats.count)
+
+    assert counts[0] == counts[1]
+
+
+def test_card_listings_load_their_relationships_up_front(test_client, datasets):
+    db.session.expunge_all()
+    latest = DataSetService().latest_synchronized()
+
+    with capture_queries() as stats:
+        for dataset in latest:
+            [author.name for author in dataset.ds_meta_data.authors]
+            dataset.user.profile
+            dataset.get_file_total_size()
+    assert stats.count == 0
+
+
+def test_read_endpoints_stay_within_their_query_budget(test_client, datasets, query_budget):
+    for url, budget in (("/", 8), ("/doi/10.1234/large/", 8), ("/api/v1/datasets/", 5)):
+        db.session.expunge_all()
+        with query_budget(budget):
+            response = test_client.get(url)
+        assert response.status_code == 200
+        assert response.headers["X-DB-Queries"].startswith("count=")
+
+
+def test_rows_loaded_one_by_one_are_flagged_as_n_plus_one(test_client, datasets):
+    assert fingerprint("SELECT * FROM t WHERE id IN (?, ?, ?) AND name = 'rex' LIMIT 5") == (
+        "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?"
+    )
+
+    db.session.expunge_all()
+    with capture_queries(n_plus_one_threshold=2) as stats:
+        for dataset in DataSet.query.all():
+            dataset.ds_meta_data.title
+    assert [count for _, count in stats.n_plus_one] == [len(datasets)]
+
+
+def test_model_helpers_reuse_the_shared_services(test_client, datasets):
+    service = resolve(DataSetService)
+    assert resolve(DataSetService) is service
+
+    with patch.object(DataSetService, "__init__", side_effect=AssertionError("DataSetService constructed")):
+        urls = [dataset.get_dinosaurhub_doi() for dataset in DataSet.query.all()]
+    assert any(url.endswith("/doi/10.1234/large") for url in urls)
+
+
+def test_warm_doi_pages_resolve_without_lookup_queries(test_client, datasets):
+    resolve(DOIResolverService).invalidate("10.1234/large")
+    statements = []
+    for _ in range(2):
+        db.session.expunge_all()
+        with capture_queries() as stats:
+            response = test_client.get("/doi/10.1234/large/")
+        assert response.status_code == 200
+        statements.append(" ".join(stats.fingerprints))
+
+    assert "doi_mapping" in statements[0]
+    assert "doi_mapping" not in statements[1]
+    assert "ds_meta_data.dataset_doi = ?" not in statements[1]
+
+
+def test_doi_resolutions_follow_remaps_and_doi_changes(test_client, datasets):
+    assert test_client.get("/doi/10.1234/small/").status_code == 200
+
+    # Remapped: the old DOI redirects at once
+    db.session.add(DOIMapping(dataset_doi_old="10.1234/small", dataset_doi_new="10.1234/renamed"))
+    meta = DataSet.query.join(DSMetaData).filter(DSMetaData.dataset_doi == "10.1234/small").one().ds_meta_data
+    meta.dataset_doi = "10.1234/renamed"
+    db.session.commit()
+    response = test_client.get("/doi/10.1234/small/")
+    assert response.status_code == 302
+    assert response.headers["Location"].endswith("/doi/10.1234/renamed/")
+    assert test_client.get("/doi/10.1234/renamed/").status_code == 200
+
+    # Changed behind the ORM's back (another process): the stale entry is detected and dropped
+    DOIMapping.query.filter_by(dataset_doi_old="10.1234/small").delete()
+    db.session.execute(update(DSMetaData).where(DSMetaData.id == meta.id).values(dataset_doi="10.1234/small"))
+    db.session.commit()
+    assert test_client.get("/doi/10.1234/renamed/").status_code == 404
+
+
+def test_failing_statements_do_not_leak_start_times(test_client):
+    with db.engine.connect() as connection:
+        with capture_queries() as stats:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    connection.execute(text("SELECT * FROM no_such_table"))
+                connection.rollback()
+        assert connection.info.get(_STARTED) == []
+    assert stats.count == 3
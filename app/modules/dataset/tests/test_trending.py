@@ -4,8 +4,17 @@ from unittest.mock import MagicMock, patch, call
 from sqlalchemy import func, desc
 
 # Importar las clases a probar. Asumimos la estructura del proyecto.
-from app.modules.dataset.repositories import DataSetRepository
-from app.modules.dataset.services import DataSetService
+from app import db
+from app.modules.dataset.models import (
+    DataSet,
+    DSDailyMetric,
+    DSDownloadRecord,
+    DSMetaData,
+    DSViewRecord,
+    PublicationType,
+)
+from app.modules.dataset.repositories import DataSetRepository, trending_days
+from app.modules.dataset.services import DataSetService, DSDailyMetricService
 from app.modules.dataset.routes import get_trending_datasets 
 # Nota: La importación de modelos en los tests de repositorio (Model.query)
 # puede fallar si no hay contexto de aplicación. Corregido más abajo.
@@ -94,8 +103,54 @@ def test_repo_get_trending_invalid_metric():
 
 def test_repo_get_trending_invalid_period():
     repo = DataSetRepository()
-    with pytest.raises(ValueError, match="Invalid period. Use 'week' or 'month'."):
-        repo.get_trending(metric="views", period="year")
+    with pytest.raises(ValueError, match="Invalid period. Use 'day', 'week', 'month', 'year' or a number of days"):
+        repo.get_trending(metric="views", period="fortnight")
+    with pytest.raises(ValueError, match="Invalid period"):
+        repo.get_trending(metric="views", period="0d")
+
+
+@pytest.mark.parametrize(
+    "period, days", [("day", 1), ("week", 7), ("month", 30), ("year", 365), ("14", 14), ("90d", 90)]
+)
+def test_trending_days_supports_named_and_custom_windows(period, days):
+    assert trending_days(period) == days
+
+
+def test_repo_get_trending_sums_daily_rollups(test_client):
+    now = datetime.now(timezone.utc)
+    meta = DSMetaData(
+        title="Rolled up", description="", publication_type=PublicationType.NONE, dataset_doi="10.1/rollup"
+    )
+    dataset = DataSet(user_id=1, ds_meta_data=meta)
+    db.session.add(dataset)
+    db.session.commit()
+
+    # Recorded through the ORM: each flush adds the records to their daily bucket
+    for days_ago, cookie in [(0, "a"), (0, "b"), (3, "c"), (20, "d")]:
+        db.session.add(
+            DSDownloadRecord(
+                dataset_id=dataset.id, download_date=now - timedelta(days=days_ago), download_cookie=cookie
+            )
+        )
+    db.session.add(DSViewRecord(dataset_id=dataset.id, view_date=now, view_cookie="a"))
+    db.session.commit()
+
+    def totals(metric, period):
+        return {ds.id: total for ds, total in DataSetRepository().get_trending(metric=metric, period=period)}
+
+    assert totals("downloads", "day")[dataset.id] == 2
+    assert totals("downloads", "week")[dataset.id] == 3
+    assert totals("downloads", "month")[dataset.id] == 4
+    assert totals("downloads", "10d")[dataset.id] == 3
+    assert totals("views", "week")[dataset.id] == 1
+
+    # The compaction job recomputes the same buckets from the raw records
+    DSDailyMetric.query.delete()
+    db.session.commit()
+    assert totals("downloads", "month") == {}
+    assert DSDailyMetricService().rebuild() == 3
+    assert totals("downloads", "month")[dataset.id] == 4
+    assert totals("views", "day")[dataset.id] == 1
 
 # --- Tests para DataSetService (Lógica de Negocio y Serialización) ---
 
@@ -1,15 +1,17 @@
+import hashlib
 import io
+import os
 import zipfile
 import pytest
 import requests
-from unittest.mock import MagicMock, patch, mock_open
+from unittest.mock import MagicMock, patch
 from app.modules.dataset.services import DataSetService
 from app.modules.dataset.models import DataSet
 
 class TestDatasetUploadChoices:
 
     @pytest.fixture
-    def service(self):
+    def service(self, test_app):
         service = DataSetService()
         service.repository = MagicMock()
         service.dsmetadata_repository = MagicMock()
@@ -17,17 +19,23 @@ class TestDatasetUploadChoices:
         service.fossils_repository = MagicMock()
         service.fossils_metadata_repository = MagicMock()
         service.hubfilerepository = MagicMock()
+        for repository in (service.fossils_repository, service.fossils_metadata_repository, service.hubfilerepository):
+            repository.create_many.side_effect = self.fake_create_many
         return service
 
+    @staticmethod
+    def fake_create_many(rows, commit=True):
+        return [MagicMock(id=i, **row) for i, row in enumerate(rows, start=1)]
+
     @pytest.fixture
-    def mock_user(self):
+    def mock_user(self, tmp_path):
         user = MagicMock()
         user.id = 1
         user.profile.name = "John"
         user.profile.surname = "Doe"
         user.profile.affiliation = "Dino University"
         user.profile.orcid = "0000-0000-0000-0000"
-        user.temp_folder.return_value = "/tmp/mock_user_1"
+        user.temp_folder.return_value = str(tmp_path / "mock_user_1")
         return user
 
     @pytest.fixture
@@ -60,29 +68,32 @@ class TestDatasetUploadChoices:
         mock_dataset.id = 10
         service.create.return_value = mock_dataset
 
-        with patch("app.modules.dataset.services.os.makedirs"), \
-             patch("app.modules.dataset.services.open", mock_open()) as mocked_file, \
-             patch("app.modules.dataset.services.calculate_checksum_and_size", return_value=("md5hash", 123)), \
-             patch("app.modules.dataset.services.os.path.exists", return_value=True):
-            result_dataset = service.create_from_zip(mock_form, mock_user)
-
-            assert result_dataset == service.create.return_value
-            
-            service.dsmetadata_repository.create.assert_called()
-            service.author_repository.create.assert_called()
-            
-            mocked_file.assert_called()
-            
-            service.fossils_repository.create.assert_called()
-            service.hubfilerepository.create.assert_called_with(
-                commit=False, 
-                name='data.csv', 
-                checksum='md5hash', 
-                size=123, 
-                fossils_file_id=service.fossils_repository.create.return_value.id
-            )
-
-            service.repository.session.commit.assert_called_once()
+        result_dataset = service.create_from_zip(mock_form, mock_user)
+
+        assert result_dataset == service.create.return_value
+
+        service.dsmetadata_repository.create.assert_called()
+        service.author_repository.create.assert_called()
+
+        extracted = os.path.join(mock_user.temp_folder(), 'data.csv')
+        with open(extracted, 'rb') as f:
+            assert f.read() == b'col1,col2\n1,2'
+
+        service.fossils_repository.create_many.assert_called_once_with(
+            [{'data_set_id': 10, 'fossils_meta_data_id': 1}], commit=False
+        )
+        service.hubfilerepository.create_many.assert_called_once_with(
+            [{
+                'name': 'data.csv',
+                'checksum': hashlib.md5(b'col1,col2\n1,2').hexdigest(),
+                'sha256': hashlib.sha256(b'col1,col2\n1,2').hexdigest(),
+                'size': len(b'col1,col2\n1,2'),
+                'fossils_file_id': 1,
+            }],
+            commit=False,
+        )
+
+        service.repository.session.commit.assert_called_once()
 
     def test_create_from_zip_invalid_file(self, service, mock_user, mock_form):
         invalid_file = io.BytesIO(b"Not a zip file")
@@ -118,26 +129,21 @@ class TestDatasetUploadChoices:
         
         mock_response_zip = MagicMock()
         mock_response_zip.status_code = 200
-        mock_response_zip.content = mock_zip_file.getvalue()
+        mock_response_zip.iter_content.return_value = [mock_zip_file.getvalue()]
 
         mock_get.side_effect = [mock_response_api, mock_response_zip]
 
-        with patch("app.modules.dataset.services.os.makedirs"), \
-             patch("app.modules.dataset.services.open", mock_open()), \
-             patch("app.modules.dataset.services.calculate_checksum_and_size", return_value=("hash", 100)), \
-             patch("app.modules.dataset.services.os.path.exists", return_value=True):
-
-            service.create_from_github(mock_form, mock_user)
+        service.create_from_github(mock_form, mock_user)
 
-            mock_get.assert_any_call(
-                "https://api.github.com/repos/user/repo", 
-                headers={'Accept': 'application/vnd.github.v3+json'}
-            )
-            mock_get.assert_any_call(
-                "https://github.com/user/repo/archive/refs/heads/main.zip", 
-                stream=True
-            )
-            service.repository.session.commit.assert_called_once()
+        mock_get.assert_any_call(
+            "https://api.github.com/repos/user/repo", 
+            headers={'Accept': 'application/vnd.github.v3+json'}
+        )
+        mock_get.assert_any_call(
+            "https://github.com/user/repo/archive/refs/heads/main.zip", 
+            stream=True
+        )
+        service.repository.session.commit.assert_called_once()
 
     def test_create_from_github_invalid_url(self, service, mock_user, mock_form):
         mock_form.github_url.data = "https://gitlab.com/user/repo"
@@ -156,17 +162,12 @@ class TestDatasetUploadChoices:
 
         mock_get.side_effect = [
             requests.RequestException("API Connection Error"),
-            MagicMock(status_code=200, content=mock_zip_file.getvalue())
+            MagicMock(status_code=200, iter_content=MagicMock(return_value=[mock_zip_file.getvalue()]))
         ]
 
-        with patch("app.modules.dataset.services.os.makedirs"), \
-             patch("app.modules.dataset.services.open", mock_open()), \
-             patch("app.modules.dataset.services.calculate_checksum_and_size", return_value=("hash", 100)), \
-             patch("app.modules.dataset.services.os.path.exists", return_value=True):
-
-            service.create_from_github(mock_form, mock_user)
+        service.create_from_github(mock_form, mock_user)
 
-            service.repository.session.commit.assert_called_once()
+        service.repository.session.commit.assert_called_once()
 
     @patch("app.modules.dataset.services.requests.get")
     def test_create_from_github_download_failure(self, mock_get, service, mock_user, mock_form):
@@ -208,4 +209,40 @@ class TestDatasetUploadChoices:
             with pytest.raises(ValueError, match="No se encontraron archivos CSV válidos en el repositorio."):
                 service.create_from_zip(mock_form, mock_user)
 
-        service.repository.session.rollback.assert_called_once()
\ No newline at end of file
+        service.repository.session.rollback.assert_called_once()
+
+    def test_create_from_zip_imports_many_members(self, service, mock_user, mock_form):
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for i in range(50):
+                zf.writestr(f'fossils/site_{i}.csv', f'species,site\nT. rex,{i}\n')
+            zf.writestr('other/site_0.csv', 'duplicated name, skipped')
+        mock_form.zip_file.data = zip_buffer
+
+        service.create = MagicMock(return_value=MagicMock(id=7))
+
+        service.create_from_zip(mock_form, mock_user)
+
+        rows = service.hubfilerepository.create_many.call_args.args[0]
+        names = [row['name'] for row in rows]
+        assert names == [f'site_{i}.csv' for i in range(50)]
+        # One batch per table, whatever the number of files
+        service.fossils_metadata_repository.create_many.assert_called_once()
+        service.fossils_repository.create_many.assert_called_once()
+        service.hubfilerepository.create_many.assert_called_once()
+        assert len(os.listdir(mock_user.temp_folder())) == 50
+
+    def test_create_from_zip_rejects_archives_over_the_limits(self, service, mock_user, mock_form):
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('bomb.csv', b'0' * 1024 * 1024)
+        mock_form.zip_file.data = zip_buffer
+
+        service.create = MagicMock(return_value=MagicMock(id=7))
+
+        with pytest.raises(ValueError, match="compression ratio"):
+            service.create_from_zip(mock_form, mock_user)
+
+        service.hubfilerepository.create_many.assert_not_called()
+        service.repository.session.rollback.assert_called_once()
+        assert not os.path.exists(os.path.join(mock_user.temp_folder(), 'bomb.csv'))
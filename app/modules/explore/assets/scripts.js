@@ -2,6 +2,11 @@ document.addEventListener('DOMContentLoaded', () => {
     send_query();
 });
 
+// Criteria of the current search, the cursor of its next page and a counter that drops stale responses
+let searchCriteria = null;
+let nextCursor = null;
+let searchId = 0;
+
 function send_query() {
 
     console.log("send query...")
@@ -16,7 +21,7 @@ function send_query() {
         filter.addEventListener('input', () => {
             const csrfToken = document.getElementById('csrf_token').value;
 
-            const searchCriteria = {
+            searchCriteria = {
                 csrf_token: csrfToken,
                 query: document.querySelector('#query').value,
                 publication_type: document.querySelector('#publication_type').value,
@@ -25,113 +30,148 @@ function send_query() {
 
             console.log(document.querySelector('#publication_type').value);
 
-            fetch('/explore', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(searchCriteria),
-            })
-                .then(response => response.json())
-                .then(data => {
-
-                    console.log(data);
-                    document.getElementById('results').innerHTML = '';
-
-                    // results counter
-                    const resultCount = data.length;
-                    const resultText = resultCount === 1 ? 'dataset' : 'datasets';
-                    document.getElementById('results_number').textContent = `${resultCount} ${resultText} found`;
-
-                    if (resultCount === 0) {
-                        console.log("show not found icon");
-                        document.getElementById("results_not_found").style.display = "block";
-                    } else {
-                        document.getElementById("results_not_found").style.display = "none";
-                    }
-
-
-                    data.forEach(dataset => {
-                        let card = document.createElement('div');
-                        card.className = 'col-12';
-                        card.innerHTML = `
-                            <div class="card">
-                                <div class="card-body">
-                                    <div class="d-flex align-items-center justify-content-between">
-                                        <h3><a href="${dataset.url}">${dataset.title}</a></h3>
-                                        <div>
-                                            <span class="badge bg-primary" style="cursor: pointer;" onclick="set_publication_type_as_query('${dataset.publication_type}')">${dataset.publication_type}</span>
-                                        </div>
-                                    </div>
-                                    <p class="text-secondary">${formatDate(dataset.created_at)}</p>
-
-                                    <div class="row mb-2">
-
-                                        <div class="col-md-4 col-12">
-                                            <span class=" text-secondary">
-                                                Description
-                                            </span>
-                                        </div>
-                                        <div class="col-md-8 col-12">
-                                            <p class="card-text">${dataset.description}</p>
-                                        </div>
-
-                                    </div>
-
-                                    <div class="row mb-2">
-
-                                        <div class="col-md-4 col-12">
-                                            <span class=" text-secondary">
-                                                Authors
-                                            </span>
-                                        </div>
-                                        <div class="col-md-8 col-12">
-                                            ${dataset.authors.map(author => `
-                                                <p class="p-0 m-0">${author.name}${author.affiliation ? ` (${author.affiliation})` : ''}${author.orcid ? ` (${author.orcid})` : ''}</p>
-                                            `).join('')}
-                                        </div>
-
-                                    </div>
-
-                                    <div class="row mb-2">
-
-                                        <div class="col-md-4 col-12">
-                                            <span class=" text-secondary">
-                                                Tags
-                                            </span>
-                                        </div>
-                                        <div class="col-md-8 col-12">
-                                            ${dataset.tags.map(tag => `<span class="badge bg-primary me-1" style="cursor: pointer;" onclick="set_tag_as_query('${tag}')">${tag}</span>`).join('')}
-                                        </div>
-
-                                    </div>
-
-                                    <div class="row">
-
-                                        <div class="col-md-4 col-12">
-
-                                        </div>
-                                        <div class="col-md-8 col-12">
-                                            <a href="${dataset.url}" class="btn btn-outline-primary btn-sm" id="search" style="border-radius: 5px;">
-                                                View dataset
-                                            </a>
-                                            <a href="/dataset/download/${dataset.id}" class="btn btn-outline-primary btn-sm" id="search" style="border-radius: 5px;">
-                                                Download (${dataset.total_size_in_human_format})
-                                            </a>
-                                        </div>
-
-
-                                    </div>
-
-                                </div>
-                            </div>
-                        `;
-
-                        document.getElementById('results').appendChild(card);
-                    });
-                });
+            load_page(null);
         });
     });
+
+    document.getElementById('load_more').addEventListener('click', () => load_page(nextCursor));
+}
+
+function load_page(cursor) {
+    const currentSearch = cursor ? searchId : ++searchId;
+    const loadMore = document.getElementById('load_more');
+    loadMore.disabled = true;
+
+    fetch('/explore', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({...searchCriteria, cursor: cursor}),
+    })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Search failed with status ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (currentSearch !== searchId) {
+                return;
+            }
+
+            console.log(data);
+            if (!cursor) {
+                document.getElementById('results').innerHTML = '';
+
+                // results counter
+                const resultCount = data.total;
+                const resultText = resultCount === 1 ? 'dataset' : 'datasets';
+                document.getElementById('results_number').textContent = `${resultCount} ${resultText} found`;
+
+                if (resultCount === 0) {
+                    console.log("show not found icon");
+                    document.getElementById("results_not_found").style.display = "block";
+                } else {
+                    document.getElementById("results_not_found").style.display = "none";
+                }
+            }
+
+            data.results.forEach(dataset => {
+                document.getElementById('results').appendChild(render_card(dataset));
+            });
+
+            nextCursor = data.next_cursor;
+            loadMore.style.display = nextCursor ? 'inline-block' : 'none';
+        })
+        .catch(error => {
+            console.error(error);
+        })
+        .finally(() => {
+            // Clickable again after a failed page too, so the user can retry it
+            if (currentSearch === searchId) {
+                loadMore.disabled = false;
+            }
+        });
+}
+
+function render_card(dataset) {
+    let card = document.createElement('div');
+    card.className = 'col-12';
+    card.innerHTML = `
+        <div class="card">
+            <div class="card-body">
+                <div class="d-flex align-items-center justify-content-between">
+                    <h3><a href="${dataset.url}">${dataset.title}</a></h3>
+                    <div>
+                        <span class="badge bg-primary" style="cursor: pointer;" onclick="set_publication_type_as_query('${dataset.publication_type}')">${dataset.publication_type}</span>
+                    </div>
+                </div>
+                <p class="text-secondary">${formatDate(dataset.created_at)}</p>
+
+                <div class="row mb-2">
+
+                    <div class="col-md-4 col-12">
+                        <span class=" text-secondary">
+                            Description
+                        </span>
+                    </div>
+                    <div class="col-md-8 col-12">
+                        <p class="card-text">${dataset.description}</p>
+                    </div>
+
+                </div>
+
+                <div class="row mb-2">
+
+                    <div class="col-md-4 col-12">
+                        <span class=" text-secondary">
+                            Authors
+                        </span>
+                    </div>
+                    <div class="col-md-8 col-12">
+                        ${dataset.authors.map(author => `
+                            <p class="p-0 m-0">${author.name}${author.affiliation ? ` (${author.affiliation})` : ''}${author.orcid ? ` (${author.orcid})` : ''}</p>
+                        `).join('')}
+                    </div>
+
+                </div>
+
+                <div class="row mb-2">
+
+                    <div class="col-md-4 col-12">
+                        <span class=" text-secondary">
+                            Tags
+                        </span>
+                    </div>
+                    <div class="col-md-8 col-12">
+                        ${dataset.tags.map(tag => `<span class="badge bg-primary me-1" style="cursor: pointer;" onclick="set_tag_as_query('${tag}')">${tag}</span>`).join('')}
+                    </div>
+
+                </div>
+
+                <div class="row">
+
+                    <div class="col-md-4 col-12">
+
+                    </div>
+                    <div class="col-md-8 col-12">
+                        <a href="${dataset.url}" class="btn btn-outline-primary btn-sm" id="search" style="border-radius: 5px;">
+                            View dataset
+                        </a>
+                        <a href="/dataset/download/${dataset.id}" class="btn btn-outline-primary btn-sm" id="search" style="border-radius: 5px;">
+                            Download (${dataset.total_size_in_human_format})
+                        </a>
+                    </div>
+
+
+                </div>
+
+            </div>
+        </div>
+    `;
+
+    return card;
 }
 
 function formatDate(dateString) {
@@ -175,7 +215,7 @@ function clearFilters() {
     // Reset the sorting option
     let sortingOptions = document.querySelectorAll('[name="sorting"]');
     sortingOptions.forEach(option => {
-        option.checked = option.value == "newest"; // replace "default" with whatever your default value is
+        option.checked = option.value == "relevance";
         // option.dispatchEvent(new Event('input', {bubbles: true}));
     });
 
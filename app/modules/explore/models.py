@@ -0,0 +1,13 @@
+from app import db
+
+
+class DatasetSearchTerm(db.Model):
+    """Inverted index of explore: one row per term of a dataset, weighted by the best field it appears in."""
+
+    __tablename__ = "dataset_search_terms"
+    term = db.Column(db.String(64), primary_key=True)
+    dataset_id = db.Column(db.Integer, db.ForeignKey("data_set.id", ondelete="CASCADE"), primary_key=True, index=True)
+    weight = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f"DatasetSearchTerm<{self.term} dataset={self.dataset_id} weight={self.weight}>"
@@ -1,10 +1,13 @@
-import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
-import unidecode
-from sqlalchemy import any_, or_
+from sqlalchemy import and_, any_, delete, func, insert, or_, select
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.modules.dataset.models import Author, DataSet, DSMetaData, PublicationType
-from app.modules.fossils.models import FossilsFile, FossilsMetaData
+from app.modules.explore.models import DatasetSearchTerm
+from app.modules.fossils.models import FossilsFile
+from app.modules.hubfile.models import Hubfile
 from core.repositories.BaseRepository import BaseRepository
 
 
@@ -12,34 +15,40 @@ class ExploreRepository(BaseRepository):
     def __init__(self):
         super().__init__(DataSet)
 
-    def filter(self, query="", sorting="newest", publication_type="any", tags=[], **kwargs):
-        # Normalize and remove unwanted characters
-        normalized_query = unidecode.unidecode(query).lower()
-        cleaned_query = re.sub(r'[,.":\'()\[\]^;!¡¿?]', "", normalized_query)
-
-        filters = []
-        for word in cleaned_query.split():
-            filters.append(DSMetaData.title.ilike(f"%{word}%"))
-            filters.append(DSMetaData.description.ilike(f"%{word}%"))
-            filters.append(Author.name.ilike(f"%{word}%"))
-            filters.append(Author.affiliation.ilike(f"%{word}%"))
-            filters.append(Author.orcid.ilike(f"%{word}%"))
-            filters.append(FossilsMetaData.csv_filename.ilike(f"%{word}%"))
-            filters.append(FossilsMetaData.title.ilike(f"%{word}%"))
-            filters.append(FossilsMetaData.description.ilike(f"%{word}%"))
-            filters.append(FossilsMetaData.publication_doi.ilike(f"%{word}%"))
-            filters.append(FossilsMetaData.tags.ilike(f"%{word}%"))
-            filters.append(DSMetaData.tags.ilike(f"%{word}%"))
+    LISTING_COLUMNS = (
+        DataSet.id,
+        DataSet.created_at,
+        DSMetaData.id.label("ds_meta_data_id"),
+        DSMetaData.title,
+        DSMetaData.description,
+        DSMetaData.publication_type,
+        DSMetaData.tags,
+        DSMetaData.dataset_doi,
+    )
 
+    def _matching(self, terms: List[str], publication_type: str, tags: list, *columns):
+        """
+        Query of *columns over the synchronized datasets matching any of the terms (as a prefix of an
+        indexed term), each once, and the relevance score column (None without terms).
+        """
         datasets = (
-            self.model.query.join(DataSet.ds_meta_data)
-            .join(DSMetaData.authors)
-            .join(DataSet.fossils_files)
-            .join(FossilsFile.fossils_meta_data)
-            .filter(or_(*filters))
+            self.session.query(*columns)
+            .select_from(DataSet)
+            .join(DataSet.ds_meta_data)
             .filter(DSMetaData.dataset_doi.isnot(None))  # Exclude datasets with empty dataset_doi
         )
 
+        score = None
+        if terms:
+            scores = (
+                select(DatasetSearchTerm.dataset_id, func.sum(DatasetSearchTerm.weight).label("score"))
+                .where(or_(*(DatasetSearchTerm.term.startswith(term, autoescape=True) for term in terms)))
+                .group_by(DatasetSearchTerm.dataset_id)
+                .subquery()
+            )
+            datasets = datasets.join(scores, scores.c.dataset_id == DataSet.id)
+            score = scores.c.score
+
         if publication_type != "any":
             matching_type = None
             for member in PublicationType:
@@ -53,10 +62,134 @@ class ExploreRepository(BaseRepository):
         if tags:
             datasets = datasets.filter(DSMetaData.tags.ilike(any_(f"%{tag}%" for tag in tags)))
 
-        # Order by created_at
+        return datasets, score
+
+    @staticmethod
+    def _sort_keys(sorting: str, score) -> List[Tuple[str, object, bool]]:
+        """(name, column, descending) of each sort key; the id always comes last, so the order is total."""
+        if sorting == "relevance" and score is not None:
+            return [("score", score, True), ("created_at", DataSet.created_at, True), ("id", DataSet.id, True)]
         if sorting == "oldest":
-            datasets = datasets.order_by(self.model.created_at.asc())
-        else:
-            datasets = datasets.order_by(self.model.created_at.desc())
+            return [("created_at", DataSet.created_at, False), ("id", DataSet.id, False)]
+        return [("created_at", DataSet.created_at, True), ("id", DataSet.id, True)]
+
+    @staticmethod
+    def _after(keys, values):
+        """Rows strictly after values in the order of keys: k1 > v1 OR (k1 = v1 AND (k2 > v2 OR ...))."""
+        condition = None
+        for (_, column, descending), value in reversed(list(zip(keys, values))):
+            beyond = column < value if descending else column > value
+            condition = beyond if condition is None else or_(beyond, and_(column == value, condition))
+        return condition
+
+    def filter(self, terms: List[str], sorting="newest", publication_type="any", tags=[], **kwargs):
+        datasets, score = self._matching(terms, publication_type, tags, self.model)
+        keys = self._sort_keys(sorting, score)
+        return datasets.order_by(*(column.desc() if desc else column.asc() for _, column, desc in keys)).all()
+
+    def page(
+        self,
+        terms: List[str],
+        sorting="newest",
+        publication_type="any",
+        tags=[],
+        after: Optional[list] = None,
+        limit: int = 20,
+    ) -> Tuple[list, Optional[list]]:
+        """
+        One page of listing rows (LISTING_COLUMNS, plus score with terms) after the keyset values
+        `after`, and the keyset values of its last row when there are more rows to fetch.
+        """
+        datasets, score = self._matching(terms, publication_type, tags, *self.LISTING_COLUMNS)
+        keys = self._sort_keys(sorting, score)
+        if score is not None:
+            datasets = datasets.add_columns(score.label("score"))
+        if after:
+            if len(after) != len(keys):
+                raise ValueError("Cursor does not match the sorting")
+            datasets = datasets.filter(self._after(keys, after))
+
+        rows = (
+            datasets.order_by(*(column.desc() if desc else column.asc() for _, column, desc in keys))
+            .limit(limit + 1)
+            .all()
+        )
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, [getattr(rows[-1], name) for name, _, _ in keys]
+
+    def count(self, terms: List[str], publication_type="any", tags=[]) -> int:
+        datasets, _ = self._matching(terms, publication_type, tags, DataSet.id)
+        return datasets.count()
+
+    def authors_by_ds_meta_data(self, ds_meta_data_ids: Iterable[int]) -> Dict[int, List[dict]]:
+        authors = defaultdict(list)
+        rows = (
+            self.session.query(Author.ds_meta_data_id, Author.name, Author.affiliation, Author.orcid)
+            .filter(Author.ds_meta_data_id.in_(list(ds_meta_data_ids)))
+            .order_by(Author.id)
+        )
+        for ds_meta_data_id, name, affiliation, orcid in rows:
+            authors[ds_meta_data_id].append({"name": name, "affiliation": affiliation, "orcid": orcid})
+        return authors
+
+    def total_sizes(self, dataset_ids: Iterable[int]) -> Dict[int, int]:
+        rows = (
+            self.session.query(FossilsFile.data_set_id, func.sum(Hubfile.size))
+            .join(Hubfile, Hubfile.fossils_file_id == FossilsFile.id)
+            .filter(FossilsFile.data_set_id.in_(list(dataset_ids)))
+            .group_by(FossilsFile.data_set_id)
+        )
+        return {dataset_id: int(size or 0) for dataset_id, size in rows}
+
+    def resolve_dataset_ids(
+        self, dataset_ids: Iterable[int], ds_meta_data_ids: Iterable[int], fossils_meta_data_ids: Iterable[int]
+    ) -> Set[int]:
+        resolved = {dataset_id for dataset_id in dataset_ids if dataset_id is not None}
+        ds_meta_data_ids = [meta_data_id for meta_data_id in ds_meta_data_ids if meta_data_id is not None]
+        fossils_meta_data_ids = [meta_data_id for meta_data_id in fossils_meta_data_ids if meta_data_id is not None]
+
+        if ds_meta_data_ids:
+            resolved.update(
+                self.session.scalars(select(DataSet.id).where(DataSet.ds_meta_data_id.in_(ds_meta_data_ids)))
+            )
+        if fossils_meta_data_ids:
+            resolved.update(
+                self.session.scalars(
+                    select(FossilsFile.data_set_id).where(FossilsFile.fossils_meta_data_id.in_(fossils_meta_data_ids))
+                )
+            )
+        return resolved
+
+    def has_terms(self) -> bool:
+        return self.session.query(DatasetSearchTerm.term).first() is not None
+
+    def all_dataset_ids(self) -> List[int]:
+        return list(self.session.scalars(select(DataSet.id)))
+
+    def get_for_indexing(self, dataset_ids: Iterable[int]) -> List[DataSet]:
+        return (
+            self.session.query(self.model)
+            .options(
+                joinedload(DataSet.ds_meta_data).selectinload(DSMetaData.authors),
+                selectinload(DataSet.fossils_files).joinedload(FossilsFile.fossils_meta_data),
+            )
+            .filter(self.model.id.in_(list(dataset_ids)))
+            .all()
+        )
+
+    def replace_terms(self, dataset_ids: Iterable[int], terms_by_dataset: Dict[int, Dict[str, int]]) -> int:
+        """Deletes the terms of dataset_ids and inserts the given ones in one batch. Does not commit."""
+        table = DatasetSearchTerm.__table__
+        connection = self.session.connection()
+        connection.execute(delete(table).where(table.c.dataset_id.in_(list(dataset_ids))))
 
-        return datasets.all()
+        rows = [
+            {"term": term, "dataset_id": dataset_id, "weight": weight}
+            for dataset_id, terms in terms_by_dataset.items()
+            for term, weight in terms.items()
+        ]
+        if rows:
+            connection.execute(insert(table), rows)
+        return len(rows)
@@ -3,6 +3,7 @@ from flask import jsonify, render_template, request
 from app.modules.explore import explore_bp
 from app.modules.explore.forms import ExploreForm
 from app.modules.explore.services import ExploreService
+from core.services.registry import resolve
 
 
 @explore_bp.route("/explore", methods=["GET", "POST"])
@@ -13,6 +14,11 @@ def index():
         return render_template("explore/index.html", form=form, query=query)
 
     if request.method == "POST":
-        criteria = request.get_json()
-        datasets = ExploreService().filter(**criteria)
-        return jsonify([dataset.to_dict() for dataset in datasets])
+        criteria = request.get_json(silent=True)
+        if not isinstance(criteria, dict):
+            return jsonify({"message": "Expected a JSON object"}), 400
+        try:
+            page = resolve(ExploreService).search(**criteria)
+        except ValueError as exc:
+            return jsonify({"message": str(exc)}), 400
+        return jsonify(page)
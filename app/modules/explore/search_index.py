@@ -0,0 +1,128 @@
+"""
+Search index of the explore page (dataset_search_terms).
+
+Titles, descriptions, authors, ORCIDs, tags and CSV filenames are split into normalized terms and
+stored with the weight of the most important field they appear in. A query is answered with prefix
+lookups on the indexed term column, and the matches are ranked by the sum of their weights.
+
+The index follows the data: after each flush the datasets whose searchable fields changed are
+noted, and they are re-indexed in the same transaction right before it commits. `rosemary
+explore:reindex` rebuilds the whole index.
+"""
+
+import re
+from itertools import chain
+from typing import Dict, Iterable, List, Tuple
+
+import unidecode
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.modules.dataset.models import Author, DataSet, DSMetaData
+from app.modules.explore.repositories import ExploreRepository
+from app.modules.fossils.models import FossilsFile, FossilsMetaData
+
+TERM_LENGTH = 64
+MIN_TERM_LENGTH = 2
+
+TITLE_WEIGHT = 8
+TAG_WEIGHT = 6
+AUTHOR_WEIGHT = 4
+FILE_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+
+# Identifiers such as ORCIDs, DOIs and file names are kept whole, and their parts are indexed too
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-./_][a-z0-9]+)*")
+_PART = re.compile(r"[a-z0-9]+")
+
+_PENDING = "search_index_pending"
+
+
+def _tokens(text) -> List[str]:
+    return _TOKEN.findall(unidecode.unidecode(text or "").lower())
+
+
+def query_terms(query: str) -> List[str]:
+    terms = []
+    for token in _tokens(query):
+        term = token[:TERM_LENGTH]
+        if len(term) >= MIN_TERM_LENGTH and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def document_terms(fields: Iterable[Tuple[str, int]]) -> Dict[str, int]:
+    terms = {}
+    for text, weight in fields:
+        for token in _tokens(text):
+            for term in {token, *_PART.findall(token)}:
+                term = term[:TERM_LENGTH]
+                if len(term) >= MIN_TERM_LENGTH:
+                    terms[term] = max(weight, terms.get(term, 0))
+    return terms
+
+
+def dataset_terms(dataset: DataSet) -> Dict[str, int]:
+    meta_data = dataset.ds_meta_data
+    fields = [
+        (meta_data.title, TITLE_WEIGHT),
+        (meta_data.tags, TAG_WEIGHT),
+        (meta_data.description, DESCRIPTION_WEIGHT),
+    ]
+    for author in meta_data.authors:
+        fields += [(author.name, AUTHOR_WEIGHT), (author.orcid, AUTHOR_WEIGHT), (author.affiliation, AUTHOR_WEIGHT)]
+    for fossils_file in dataset.fossils_files:
+        fossils_meta_data = fossils_file.fossils_meta_data
+        if fossils_meta_data is None:
+            continue
+        fields += [
+            (fossils_meta_data.csv_filename, FILE_WEIGHT),
+            (fossils_meta_data.title, FILE_WEIGHT),
+            (fossils_meta_data.publication_doi, FILE_WEIGHT),
+            (fossils_meta_data.tags, TAG_WEIGHT),
+            (fossils_meta_data.description, DESCRIPTION_WEIGHT),
+        ]
+    return document_terms(fields)
+
+
+def reindex(repository: ExploreRepository, dataset_ids) -> int:
+    """Replaces the terms of the given datasets. Does not commit. Returns the number of terms written."""
+    datasets = repository.get_for_indexing(dataset_ids)
+    return repository.replace_terms(dataset_ids, {dataset.id: dataset_terms(dataset) for dataset in datasets})
+
+
+@event.listens_for(Session, "after_flush")
+def note_changed_datasets(session, flush_context):
+    pending = session.info.setdefault(_PENDING, {"datasets": set(), "ds_meta_data": set(), "fossils_meta_data": set()})
+    for instance in chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, DataSet):
+            pending["datasets"].add(instance.id)
+        elif isinstance(instance, FossilsFile):
+            pending["datasets"].add(instance.data_set_id)
+        elif isinstance(instance, DSMetaData):
+            pending["ds_meta_data"].add(instance.id)
+        elif isinstance(instance, Author):
+            pending["ds_meta_data"].add(instance.ds_meta_data_id)
+        elif isinstance(instance, FossilsMetaData):
+            pending["fossils_meta_data"].add(instance.id)
+
+
+@event.listens_for(Session, "before_commit")
+def reindex_changed_datasets(session):
+    # Changes not flushed yet would only be noted by the flush that commit() runs after this hook
+    session.flush()
+    pending = session.info.pop(_PENDING, None)
+    if not pending or not any(pending.values()):
+        return
+
+    repository = ExploreRepository()
+    dataset_ids = repository.resolve_dataset_ids(
+        pending["datasets"], pending["ds_meta_data"], pending["fossils_meta_data"]
+    )
+    if dataset_ids:
+        reindex(repository, dataset_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_changed_datasets(session):
+    session.info.pop(_PENDING, None)
@@ -1,5 +1,45 @@
+import base64
+import json
+import os
+from datetime import datetime
+
+from app.modules.dataset.services import SizeService
+from app.modules.explore import search_index
 from app.modules.explore.repositories import ExploreRepository
 from core.services.BaseService import BaseService
+from core.services.registry import resolve
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(values) -> str:
+    values = [value.isoformat() if isinstance(value, datetime) else int(value) for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    if not isinstance(cursor, str):
+        raise ValueError("Invalid cursor")
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list):
+            raise TypeError
+        return [datetime.fromisoformat(value) if isinstance(value, str) else int(value) for value in values]
+    except (TypeError, ValueError, UnicodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def page_limit(limit) -> int:
+    """Page size of a search: PAGE_SIZE when not given, otherwise clamped to 1..MAX_PAGE_SIZE."""
+    if limit is None:
+        return PAGE_SIZE
+    if isinstance(limit, bool) or not isinstance(limit, (int, str)):
+        raise ValueError("Invalid limit")
+    try:
+        return min(max(int(limit), 1), MAX_PAGE_SIZE)
+    except ValueError as exc:
+        raise ValueError("Invalid limit") from exc
 
 
 class ExploreService(BaseService):
@@ -7,4 +47,55 @@ class ExploreService(BaseService):
         super().__init__(ExploreRepository())
 
     def filter(self, query="", sorting="newest", publication_type="any", tags=[], **kwargs):
-        return self.repository.filter(query, sorting, publication_type, tags, **kwargs)
+        terms = search_index.query_terms(query)
+        return self.repository.filter(terms, sorting, publication_type, tags, **kwargs)
+
+    def search(
+        self, query="", sorting="newest", publication_type="any", tags=[], cursor=None, limit=PAGE_SIZE, **kwargs
+    ) -> dict:
+        """
+        One page of result cards, the cursor of the next page (None on the last one) and, on the first
+        page only, the total number of results. Raises ValueError for a malformed query, cursor or limit.
+        """
+        if not isinstance(query, str):
+            raise ValueError("Invalid query")
+        limit = page_limit(limit)
+        after = decode_cursor(cursor) if cursor is not None and cursor != "" else None
+        terms = search_index.query_terms(query)
+
+        rows, next_key = self.repository.page(terms, sorting, publication_type, tags, after=after, limit=limit)
+        authors = self.repository.authors_by_ds_meta_data(row.ds_meta_data_id for row in rows)
+        sizes = self.repository.total_sizes(row.id for row in rows)
+
+        return {
+            "results": [self._card(row, authors.get(row.ds_meta_data_id, []), sizes.get(row.id, 0)) for row in rows],
+            "next_cursor": encode_cursor(next_key) if next_key else None,
+            "total": None if after else self.repository.count(terms, publication_type, tags),
+        }
+
+    @staticmethod
+    def _card(row, authors, total_size) -> dict:
+        domain = os.getenv("DOMAIN", "localhost")
+        return {
+            "id": row.id,
+            "title": row.title,
+            "description": row.description,
+            "publication_type": row.publication_type.name.replace("_", " ").title(),
+            "created_at": row.created_at.isoformat(),
+            "tags": row.tags.split(",") if row.tags else [],
+            "authors": authors,
+            "url": f"http://{domain}/doi/{row.dataset_doi}",
+            "total_size_in_human_format": resolve(SizeService).get_human_readable_size(total_size),
+        }
+
+    def reindex(self, batch_size: int = 500) -> int:
+        """Rebuilds the search index of every dataset. Returns the number of terms written."""
+        dataset_ids = self.repository.all_dataset_ids()
+        written = 0
+        for start in range(0, len(dataset_ids), batch_size):
+            written += search_index.reindex(self.repository, dataset_ids[start : start + batch_size])
+            self.repository.session.commit()
+        return written
+
+    def is_indexed(self) -> bool:
+        return self.repository.has_terms()
@@ -0,0 +1,133 @@
+import pytest
+
+from app import db
+from app.modules.dataset.models import Author, DataSet, DSMetaData, PublicationType
+from app.modules.explore.models import DatasetSearchTerm
+from app.modules.explore.search_index import document_terms, query_terms
+from app.modules.explore.services import ExploreService
+from app.modules.fossils.models import FossilsFile, FossilsMetaData
+
+
+def create_dataset(title, description="", tags="", authors=(), csv_filenames=(), doi="10.1234/explore"):
+    meta = DSMetaData(
+        title=title, description=description, tags=tags, publication_type=PublicationType.NONE, dataset_doi=doi
+    )
+    meta.authors = [Author(name=name, orcid=orcid) for name, orcid in authors]
+    dataset = DataSet(user_id=1, ds_meta_data=meta)
+    for csv_filename in csv_filenames:
+        fossils_meta = FossilsMetaData(csv_filename=csv_filename, title=csv_filename, description="")
+        dataset.fossils_files.append(FossilsFile(fossils_meta_data=fossils_meta))
+    db.session.add(dataset)
+    db.session.commit()
+    return dataset
+
+
+def ids(datasets):
+    return [dataset.id for dataset in datasets]
+
+
+@pytest.fixture
+def catalogue(test_client):
+    datasets = {
+        "rex": create_dataset(
+            "Tyrannosaurus rex teeth",
+            description="Serrated teeth from Montana",
+            tags="theropod,cretaceous",
+            authors=[("Osborn, Henry", "0000-0002-1825-0097")],
+            csv_filenames=["rex_teeth.csv"],
+        ),
+        "raptor": create_dataset(
+            "Velociraptor claws",
+            description="Claws measured next to tyrannosaurus teeth",
+            tags="theropod",
+            authors=[("Osborn, Henry", None), ("Barsbold, Rinchen", None)],
+            csv_filenames=["claws.csv", "claws_2.csv"],
+        ),
+        "draft": create_dataset("Tyrannosaurus draft", doi=None),
+    }
+    yield datasets
+    for dataset in datasets.values():
+        db.session.delete(dataset)
+    db.session.commit()
+
+
+def test_terms_are_normalized_and_identifiers_kept_whole():
+    assert query_terms("Árbol, T. REX 0000-0002-1825-0097") == ["arbol", "rex", "0000-0002-1825-0097"]
+
+    terms = document_terms([("rex_teeth.csv", 3), ("Rex", 8)])
+    assert terms["rex_teeth.csv"] == 3
+    assert terms["teeth"] == 3
+    assert terms["rex"] == 8
+
+
+def test_index_follows_dataset_changes(catalogue):
+    rex = catalogue["rex"]
+    assert DatasetSearchTerm.query.filter_by(dataset_id=rex.id, term="montana").count() == 1
+
+    rex.ds_meta_data.description = "Serrated teeth from Alberta"
+    rex.ds_meta_data.authors.append(Author(name="Brown, Barnum"))
+    db.session.commit()
+
+    terms = {term.term for term in DatasetSearchTerm.query.filter_by(dataset_id=rex.id)}
+    assert "alberta" in terms and "barnum" in terms
+    assert "montana" not in terms
+
+
+def test_search_ranks_deduplicates_and_skips_unpublished(catalogue):
+    service = ExploreService()
+    rex, raptor = catalogue["rex"], catalogue["raptor"]
+
+    # Both datasets mention the word, the one with it in the title ranks first
+    assert ids(service.filter(query="tyranno", sorting="relevance")) == [rex.id, raptor.id]
+    # Several matching authors and files still return each dataset once
+    assert ids(service.filter(query="osborn claws", sorting="relevance")) == [raptor.id, rex.id]
+    assert ids(service.filter(query="0000-0002-1825-0097")) == [rex.id]
+    assert ids(service.filter(query="rex_teeth.csv")) == [rex.id]
+    assert ids(service.filter(query="stegosaurus")) == []
+    assert ids(service.filter(query="", sorting="oldest")) == [rex.id, raptor.id]
+
+
+def test_reindex_rebuilds_the_index(catalogue):
+    DatasetSearchTerm.query.delete()
+    db.session.commit()
+    assert ExploreService().filter(query="velociraptor") == []
+
+    assert ExploreService().reindex() > 0
+    assert ids(ExploreService().filter(query="velociraptor")) == [catalogue["raptor"].id]
+
+
+def test_search_pages_follow_the_cursor(catalogue):
+    service = ExploreService()
+    rex, raptor = catalogue["rex"], catalogue["raptor"]
+
+    for sorting, expected in (("newest", [raptor.id, rex.id]), ("relevance", [rex.id, raptor.id])):
+        first = service.search(query="tyranno theropod", sorting=sorting, limit=1)
+        assert first["total"] == 2
+        second = service.search(query="tyranno theropod", sorting=sorting, limit=1, cursor=first["next_cursor"])
+        assert second["next_cursor"] is None
+        assert [card["id"] for card in first["results"] + second["results"]] == expected
+
+    card = service.search(query="0000-0002-1825-0097")["results"][0]
+    assert card["authors"] == [{"name": "Osborn, Henry", "affiliation": None, "orcid": "0000-0002-1825-0097"}]
+    assert card["tags"] == ["theropod", "cretaceous"]
+    assert card["url"].endswith("/doi/10.1234/explore")
+
+
+def test_explore_post_rejects_invalid_cursor(test_client, catalogue, query_budget):
+    for criteria in (
+        {"query": "", "cursor": "not-a-cursor"},
+        {"query": "", "cursor": 42},
+        {"query": "", "cursor": {"id": 1}},
+        {"query": "", "limit": "many"},
+        {"query": "", "limit": [20]},
+        {"query": None},
+        ["not", "an", "object"],
+    ):
+        response = test_client.post("/explore", json=criteria)
+        assert response.status_code == 400, criteria
+    assert test_client.post("/explore", json={"query": "", "limit": None}).status_code == 200
+
+    with query_budget(5):
+        response = test_client.post("/explore", json={"query": "claws"})
+    assert response.status_code == 200
+    assert [card["id"] for card in response.get_json()["results"]] == [catalogue["raptor"].id]
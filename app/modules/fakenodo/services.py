@@ -1,4 +1,3 @@
-import hashlib
 import logging
 import os
 
@@ -11,6 +10,7 @@ from app.modules.fakenodo.repositories import DepositionRepo
 from app.modules.fossils.models import FossilsFile
 from core.configuration.configuration import uploads_folder_name
 from core.services.BaseService import BaseService
+from core.storage.ingest import digest_file
 
 logger = logging.getLogger(__name__)
 
@@ -84,14 +84,25 @@ class FakenodoService(BaseService):
         """
 
         fossils_file_name = fossils_file.fossils_meta_data.csv_filename
-        user_id = current_user.id if user is None else user.id
-        file_path = os.path.join(uploads_folder_name(), f"user_{str(user_id)}", f"dataset_{dataset.id}/", fossils_file_name)
+        hubfile = next(iter(fossils_file.files), None)
+
+        if hubfile is not None and hubfile.sha256:
+            # Size and digest were recorded at ingest time, no need to read the file again
+            file_size = hubfile.size
+            file_checksum = hubfile.sha256
+        else:
+            user_id = current_user.id if user is None else user.id
+            file_path = os.path.join(
+                uploads_folder_name(), f"user_{str(user_id)}", f"dataset_{dataset.id}/", fossils_file_name
+            )
+            file_size = os.path.getsize(file_path)
+            file_checksum = checksum(file_path)
 
         request = {
             "id": deposition_id,
             "file": fossils_file_name,
-            "fileSize": os.path.getsize(file_path),
-            "checksum": checksum(file_path),
+            "fileSize": file_size,
+            "checksum": file_checksum,
             "message": f"File Uploaded to deposition with id {deposition_id}"
         }
 
@@ -113,9 +124,7 @@ class FakenodoService(BaseService):
             raise Exception("Error 404: Deposition not found")
 
         try:
-            deposition.doi = f"fakenodo.doi.{deposition_id}"
-            deposition.status = "published"
-            self.deposition_repository.update(deposition)
+            self.deposition_repository.update(deposition_id, doi=f"fakenodo.doi.{deposition_id}", status="published")
 
             response = {
                 "id": deposition_id,
@@ -166,10 +175,7 @@ class FakenodoService(BaseService):
 
 def checksum(fileName):
     try:
-        with open(fileName, "rb") as file:
-            file_content = file.read()
-            res = hashlib.sha256(file_content).hexdigest()
-        return res
+        return digest_file(fileName).sha256
     except FileNotFoundError:
         raise Exception(f"File {fileName} not found for checksum calculation")
     except Exception as e:
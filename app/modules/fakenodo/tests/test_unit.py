@@ -93,6 +93,28 @@ def test_upload_file_success(fakenodo_service):
         assert result["checksum"] == "hash123"
         assert result["message"] == "File Uploaded to deposition with id 123"
 
+def test_upload_file_uses_digests_recorded_at_ingest(fakenodo_service):
+    mock_dataset = MagicMock()
+    mock_dataset.id = 10
+
+    mock_hubfile = MagicMock()
+    mock_hubfile.size = 2048
+    mock_hubfile.sha256 = "recorded_sha256"
+
+    mock_fossils_file = MagicMock()
+    mock_fossils_file.fossils_meta_data.csv_filename = "dino.csv"
+    mock_fossils_file.files = [mock_hubfile]
+
+    with patch("app.modules.fakenodo.services.os.path.getsize") as mock_getsize, \
+         patch("app.modules.fakenodo.services.checksum") as mock_checksum:
+
+        result = fakenodo_service.upload_file(mock_dataset, 123, mock_fossils_file, user=MagicMock(id=5))
+
+        assert result["fileSize"] == 2048
+        assert result["checksum"] == "recorded_sha256"
+        mock_getsize.assert_not_called()
+        mock_checksum.assert_not_called()
+
 # --- TEST PARA PUBLISH_DEPOSITION ---
 
 def test_publish_deposition_success(fakenodo_service):
@@ -110,11 +132,10 @@ def test_publish_deposition_success(fakenodo_service):
         assert result["status"] == "published"
         assert result["conceptdoi"] == "fakenodo.doi.123"
         
-        # Verificamos que se modificó el objeto mockeado
-        assert mock_deposition_instance.status == "published"
-        assert mock_deposition_instance.doi == "fakenodo.doi.123"
-        # Verificamos que se llamó al repositorio para guardar
-        fakenodo_service.deposition_repository.update.assert_called_once_with(mock_deposition_instance)
+        # Verificamos que se llamó al repositorio para guardar el DOI y el estado
+        fakenodo_service.deposition_repository.update.assert_called_once_with(
+            123, doi="fakenodo.doi.123", status="published"
+        )
 
 def test_publish_deposition_not_found(fakenodo_service):
     with patch("app.modules.fakenodo.services.Deposition") as mock_deposition_class:
@@ -1,12 +1,13 @@
 from app.modules.featuremodel.repositories import FeatureModelRepository, FMMetaDataRepository
 from app.modules.hubfile.services import HubfileService
 from core.services.BaseService import BaseService
+from core.services.registry import resolve
 
 
 class FeatureModelService(BaseService):
     def __init__(self):
         super().__init__(FeatureModelRepository())
-        self.hubfile_service = HubfileService()
+        self.hubfile_service = resolve(HubfileService)
 
     def total_feature_model_views(self) -> int:
         return self.hubfile_service.total_hubfile_views()
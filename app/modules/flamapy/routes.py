@@ -12,6 +12,7 @@ from uvl.UVLPythonParser import UVLPythonParser
 
 from app.modules.flamapy import flamapy_bp
 from app.modules.hubfile.services import HubfileService
+from core.services.registry import resolve
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +37,7 @@ def check_csv(file_id):
                 self.errors.append(error_message)
 
     try:
-        hubfile = HubfileService().get_by_id(file_id)
+        hubfile = resolve(HubfileService).get_by_id(file_id)
         input_stream = FileStream(hubfile.get_path())
         lexer = UVLCustomLexer(input_stream)
 
@@ -74,7 +75,7 @@ def valid(file_id):
 def to_glencoe(file_id):
     temp_file = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
     try:
-        hubfile = HubfileService().get_or_404(file_id)
+        hubfile = resolve(HubfileService).get_or_404(file_id)
         fm = UVLReader(hubfile.get_path()).transform()
         GlencoeWriter(temp_file.name, fm).transform()
 
@@ -89,7 +90,7 @@ def to_glencoe(file_id):
 def to_splot(file_id):
     temp_file = tempfile.NamedTemporaryFile(suffix=".splx", delete=False)
     try:
-        hubfile = HubfileService().get_by_id(file_id)
+        hubfile = resolve(HubfileService).get_by_id(file_id)
         fm = UVLReader(hubfile.get_path()).transform()
         SPLOTWriter(temp_file.name, fm).transform()
 
@@ -104,7 +105,7 @@ def to_splot(file_id):
 def to_cnf(file_id):
     temp_file = tempfile.NamedTemporaryFile(suffix=".cnf", delete=False)
     try:
-        hubfile = HubfileService().get_by_id(file_id)
+        hubfile = resolve(HubfileService).get_by_id(file_id)
         fm = UVLReader(hubfile.get_path()).transform()
         sat = FmToPysat(fm).transform()
         DimacsWriter(temp_file.name, sat).transform()
@@ -1,12 +1,13 @@
 from app.modules.fossils.repositories import FossilsMetaDataRepository, FossilsRepository
 from core.services.BaseService import BaseService
+from core.services.registry import resolve
 from app.modules.hubfile.services import HubfileService
 
 
 class FossilsService(BaseService):
     def __init__(self):
         super().__init__(FossilsRepository())
-        self.hubfile_service = HubfileService()
+        self.hubfile_service = resolve(HubfileService)
     
     def count_fossils_files(self):
         return self.repository.count()
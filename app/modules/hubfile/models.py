@@ -5,6 +5,7 @@ from flask import request
 from app import db
 from app.modules.auth.models import User
 from app.modules.dataset.models import DataSet
+from core.services.registry import resolve
 
 
 class Hubfile(db.Model):
@@ -12,39 +13,48 @@ class Hubfile(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     checksum = db.Column(db.String(120), nullable=False)
+    sha256 = db.Column(db.String(64), nullable=True)
+    blob_key = db.Column(db.String(64), nullable=True, index=True)
+    # Location under uploads/ of files stored before the blob store (user_<id>/dataset_<id>/<name>)
+    storage_path = db.Column(db.String(255), nullable=True)
     size = db.Column(db.Integer, nullable=False)
     fossils_file_id = db.Column(db.Integer, db.ForeignKey("fossils_file.id"), nullable=False)
 
     def get_formatted_size(self):
         from app.modules.dataset.services import SizeService
 
-        return SizeService().get_human_readable_size(self.size)
+        return resolve(SizeService).get_human_readable_size(self.size)
 
     def get_owner_user(self) -> User:
         from app.modules.hubfile.services import HubfileService
 
-        return HubfileService().get_owner_user_by_hubfile(self)
+        return resolve(HubfileService).get_owner_user_by_hubfile(self)
 
     def get_dataset(self) -> DataSet:
         from app.modules.hubfile.services import HubfileService
 
-        return HubfileService().get_dataset_by_hubfile(self)
+        return resolve(HubfileService).get_dataset_by_hubfile(self)
 
     def get_path(self) -> DataSet:
         from app.modules.hubfile.services import HubfileService
 
-        return HubfileService().get_path_by_hubfile(self)
+        return resolve(HubfileService).get_path_by_hubfile(self)
 
-    def to_dict(self):
+    def to_record(self, base_url: str) -> dict:
+        """The to_dict() shape with the download URL under base_url."""
         return {
             "id": self.id,
             "name": self.name,
             "checksum": self.checksum,
+            "sha256": self.sha256,
             "size_in_bytes": self.size,
             "size_in_human_format": self.get_formatted_size(),
-            "url": f'{request.host_url.rstrip("/")}/file/download/{self.id}',
+            "url": f'{base_url.rstrip("/")}/file/download/{self.id}',
         }
 
+    def to_dict(self):
+        return self.to_record(request.host_url)
+
     def __repr__(self):
         return f"File<{self.id}>"
 
@@ -1,4 +1,4 @@
-from sqlalchemy import func
+from sqlalchemy import func, select
 
 from app import db
 from app.modules.auth.models import User
@@ -24,18 +24,47 @@ class HubfileRepository(BaseRepository):
 
     def get_dataset_by_hubfile(self, hubfile: Hubfile) -> DataSet:
         return db.session.query(DataSet).join(FossilsFile).join(Hubfile).filter(Hubfile.id == hubfile.id).first()
+
+    def get_datasets_by_hubfile_ids(self, hubfile_ids: list[int]) -> dict[int, DataSet]:
+        if not hubfile_ids:
+            return {}
+        rows = (
+            db.session.query(Hubfile.id, DataSet)
+            .join(FossilsFile, Hubfile.fossils_file_id == FossilsFile.id)
+            .join(DataSet, FossilsFile.data_set_id == DataSet.id)
+            .filter(Hubfile.id.in_(hubfile_ids))
+        )
+        return dict(rows.all())
+
     def filter_by_ids(self, hubfile_ids: list[int]) -> list[Hubfile]:
         if not hubfile_ids:
             return []
         return self.model.query.filter(self.model.id.in_(hubfile_ids)).all()
 
+    def count_by_blob_key(self, blob_key: str, connection=None) -> int:
+        """Hubfiles pointing at the blob, counted on connection when given (e.g. once a session has committed)."""
+        query = select(func.count()).select_from(self.model).where(self.model.blob_key == blob_key)
+        return (connection or db.session).execute(query).scalar()
+
+    def referenced_blob_keys(self) -> set[str]:
+        rows = db.session.query(self.model.blob_key).filter(self.model.blob_key.isnot(None)).distinct()
+        return {blob_key for (blob_key,) in rows}
+
+    def csv_blob_keys(self) -> set[str]:
+        rows = (
+            db.session.query(self.model.blob_key)
+            .filter(self.model.blob_key.isnot(None), self.model.name.ilike("%.csv"))
+            .distinct()
+        )
+        return {blob_key for (blob_key,) in rows}
+
+
 class HubfileViewRecordRepository(BaseRepository):
     def __init__(self):
         super().__init__(HubfileViewRecord)
 
     def total_hubfile_views(self) -> int:
-        max_id = self.model.query.with_entities(func.max(self.model.id)).scalar()
-        return max_id if max_id is not None else 0
+        return self.model.query.count()
 
 
 class HubfileDownloadRecordRepository(BaseRepository):
@@ -43,5 +72,4 @@ class HubfileDownloadRecordRepository(BaseRepository):
         super().__init__(HubfileDownloadRecord)
 
     def total_hubfile_downloads(self) -> int:
-        max_id = self.model.query.with_entities(func.max(self.model.id)).scalar()
-        return max_id if max_id is not None else 0
+        return self.model.query.count()
@@ -1,46 +1,45 @@
 import os
 import uuid
-from datetime import datetime, timezone
 
-from flask import current_app, jsonify, make_response, request, send_from_directory
-from flask_login import current_user
+from flask import current_app, jsonify, make_response, request
 
-from app import db
 from app.modules.hubfile import hubfile_bp
-from app.modules.hubfile.models import HubfileDownloadRecord, HubfileViewRecord
-from app.modules.hubfile.services import HubfileDownloadRecordService, HubfileService
+from app.modules.hubfile.services import (
+    HubfileDownloadRecordService,
+    HubfileService,
+    HubfileViewRecordService,
+)
+from core.services.registry import resolve
+from core.storage.downloads import send_download
+
+
+def _resolve_file_path(hubfile_service, file):
+    path = hubfile_service.get_path_by_hubfile(file)
+    if os.path.isabs(path):
+        return path
+    return os.path.join(os.path.dirname(current_app.root_path), path)
 
 
 @hubfile_bp.route("/file/download/<int:file_id>", methods=["GET"])
 def download_file(file_id):
-    file = HubfileService().get_or_404(file_id)
-    filename = file.name
+    hubfile_service = resolve(HubfileService)
+    file = hubfile_service.get_or_404(file_id)
+    file_path = _resolve_file_path(hubfile_service, file)
 
-    directory_path = f"uploads/user_{file.fossils_file.data_set.user_id}/dataset_{file.fossils_file.data_set_id}/"
-    parent_directory_path = os.path.dirname(current_app.root_path)
-    file_path = os.path.join(parent_directory_path, directory_path)
+    # Strong ETag from the content digest: answers If-None-Match with 304 and Range with 206
+    resp = make_response(send_download(file_path, file.name, etag=file.sha256 or file.checksum, precompressed=True))
+    if resp.status_code == 304:
+        return resp
 
     # Get the cookie from the request or generate a new one if it does not exist
     user_cookie = request.cookies.get("file_download_cookie")
     if not user_cookie:
         user_cookie = str(uuid.uuid4())
 
-    # Check if the download record already exists for this cookie
-    existing_record = HubfileDownloadRecord.query.filter_by(
-        user_id=current_user.id if current_user.is_authenticated else None, file_id=file_id, download_cookie=user_cookie
-    ).first()
-
-    if not existing_record:
-        # Record the download in your database
-        HubfileDownloadRecordService().create(
-            user_id=current_user.id if current_user.is_authenticated else None,
-            file_id=file_id,
-            download_date=datetime.now(timezone.utc),
-            download_cookie=user_cookie,
-        )
+    # Written in the background, after the response
+    resolve(HubfileDownloadRecordService).record(file_id=file_id, user_cookie=user_cookie)
 
     # Save the cookie to the user's browser
-    resp = make_response(send_from_directory(directory=file_path, path=filename, as_attachment=True))
     resp.set_cookie("file_download_cookie", user_cookie)
 
     return resp
@@ -48,7 +47,7 @@ def download_file(file_id):
 '''
 @hubfile_bp.route("/file/view/<int:file_id>", methods=["GET"])
 def view_file(file_id):
-    file = HubfileService().get_or_404(file_id)
+    file = resolve(HubfileService).get_or_404(file_id)
     filename = file.name
 
     directory_path = f"uploads/user_{file.feature_model.data_set.user_id}/dataset_{file.feature_model.data_set_id}/"
@@ -97,12 +96,9 @@ def view_file(file_id):
 
 @hubfile_bp.route("/file/view/<int:file_id>", methods=["GET"])
 def view_file(file_id):
-    file = HubfileService().get_or_404(file_id)
-    filename = file.name
-
-    directory_path = f"uploads/user_{file.fossils_file.data_set.user_id}/dataset_{file.fossils_file.data_set_id}/"
-    parent_directory_path = os.path.dirname(current_app.root_path)
-    file_path = os.path.join(parent_directory_path, directory_path, filename)
+    hubfile_service = resolve(HubfileService)
+    file = hubfile_service.get_or_404(file_id)
+    file_path = _resolve_file_path(hubfile_service, file)
 
     try:
         if os.path.exists(file_path):
@@ -113,23 +109,8 @@ def view_file(file_id):
             if not user_cookie:
                 user_cookie = str(uuid.uuid4())
 
-            # Check if the view record already exists for this cookie
-            existing_record = HubfileViewRecord.query.filter_by(
-                user_id=current_user.id if current_user.is_authenticated else None,
-                file_id=file_id,
-                view_cookie=user_cookie,
-            ).first()
-
-            if not existing_record:
-                # Register file view
-                new_view_record = HubfileViewRecord(
-                    user_id=current_user.id if current_user.is_authenticated else None,
-                    file_id=file_id,
-                    view_date=datetime.now(),
-                    view_cookie=user_cookie,
-                )
-                db.session.add(new_view_record)
-                db.session.commit()
+            # Register file view (written in the background)
+            resolve(HubfileViewRecordService).record(file_id=file_id, user_cookie=user_cookie)
 
             # Prepare response
             response = jsonify({"success": True, "content": content})
@@ -1,19 +1,42 @@
+import logging
 import os
+from datetime import datetime, timezone
+from typing import Optional
 
+from flask import current_app, has_app_context
+from flask_login import current_user
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app import db
 from app.modules.auth.models import User
 from app.modules.dataset.models import DataSet
-from app.modules.hubfile.models import Hubfile
+from app.modules.hubfile.models import Hubfile, HubfileDownloadRecord, HubfileViewRecord
 from app.modules.hubfile.repositories import (
     HubfileDownloadRecordRepository,
     HubfileRepository,
     HubfileViewRecordRepository,
 )
+from core.managers.analytics_manager import record_event
 from core.services.BaseService import BaseService
+from core.services.registry import resolve
+from core.storage.blob_store import BlobStore
+from core.storage.compression import write_variants
+from core.storage.ingest import digest_file
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOB_GRACE_PERIOD = 15 * 60
+
+
+def legacy_storage_path(user_id: int, dataset_id: int, name: str) -> str:
+    return os.path.join(f"user_{user_id}", f"dataset_{dataset_id}", name)
 
 
 class HubfileService(BaseService):
     def __init__(self):
         super().__init__(HubfileRepository())
+        self.blob_store = BlobStore()
         self.hubfile_view_record_repository = HubfileViewRecordRepository()
         self.hubfile_download_record_repository = HubfileDownloadRecordRepository()
 
@@ -23,17 +46,83 @@ class HubfileService(BaseService):
     def get_dataset_by_hubfile(self, hubfile: Hubfile) -> DataSet:
         return self.repository.get_dataset_by_hubfile(hubfile)
 
-    def get_path_by_hubfile(self, hubfile: Hubfile) -> str:
+    def get_path_by_hubfile(self, hubfile: Hubfile, dataset: Optional[DataSet] = None) -> str:
+        """
+        Where the file is stored, computed from the columns of the hubfile. Only rows without a stored
+        location (neither blob_key nor storage_path) need their dataset, looked up unless given.
+        """
+        if hubfile.blob_key:
+            return self.blob_store.path_for(hubfile.blob_key)
 
-        hubfile_user = self.get_owner_user_by_hubfile(hubfile)
-        hubfile_dataset = self.get_dataset_by_hubfile(hubfile)
-        working_dir = os.getenv("WORKING_DIR")
+        # Files stored before the blob store live under uploads/user_<id>/dataset_<id>/
+        storage_path = hubfile.storage_path
+        if not storage_path:
+            hubfile_dataset = dataset or self.get_dataset_by_hubfile(hubfile)
+            storage_path = legacy_storage_path(hubfile_dataset.user_id, hubfile_dataset.id, hubfile.name)
 
-        path = os.path.join(
-            working_dir, "uploads", f"user_{hubfile_user.id}", f"dataset_{hubfile_dataset.id}", hubfile.name
-        )
+        return os.path.join(os.getenv("WORKING_DIR", ""), "uploads", storage_path)
+
+    def get_paths_by_hubfiles(self, hubfiles: list[Hubfile]) -> dict[int, str]:
+        """Paths of several hubfiles by id, with at most one query for those without a stored location."""
+        missing = [hubfile.id for hubfile in hubfiles if not hubfile.blob_key and not hubfile.storage_path]
+        datasets = self.repository.get_datasets_by_hubfile_ids(missing)
+        return {hubfile.id: self.get_path_by_hubfile(hubfile, dataset=datasets.get(hubfile.id)) for hubfile in hubfiles}
+
+    def store_blob(self, hubfile: Hubfile, source_path: str, keep_source: bool = False) -> str:
+        """
+        Moves source_path into the blob store and points the hubfile at it. Identical content
+        uploaded to several datasets is stored only once. Does not commit.
+        """
+        if not hubfile.sha256:
+            hubfile.sha256 = digest_file(source_path).sha256
 
-        return path
+        blob_path = self.blob_store.put_file(source_path, hubfile.sha256, keep_source=keep_source)
+        hubfile.blob_key = hubfile.sha256
+        if has_app_context() and current_app.config.get("COMPRESSION_PRECOMPRESS"):
+            self.precompress(hubfile)
+        return blob_path
+
+    def precompress(self, hubfile: Hubfile) -> list[str]:
+        """Writes the missing .zst/.br variants of a stored CSV, served to clients accepting them."""
+        if not hubfile.blob_key or not hubfile.name.lower().endswith(".csv"):
+            return []
+        return write_variants(self.blob_store.path_for(hubfile.blob_key))
+
+    def precompress_all(self) -> int:
+        """Writes the missing variants of every stored CSV. Returns the number of variants written."""
+        written = 0
+        for blob_key in self.repository.csv_blob_keys():
+            if self.blob_store.exists(blob_key):
+                written += len(write_variants(self.blob_store.path_for(blob_key)))
+        return written
+
+    def blob_grace_period(self) -> int:
+        if has_app_context():
+            return current_app.config.get("BLOB_GRACE_PERIOD", DEFAULT_BLOB_GRACE_PERIOD)
+        return DEFAULT_BLOB_GRACE_PERIOD
+
+    def release_blob(self, blob_key: str, connection=None) -> bool:
+        """
+        Deletes a blob once no hubfile references it anymore. A blob stored within the grace period
+        is kept (an upload deduplicated onto it may not be committed yet) and left to collect_garbage.
+        """
+        if self.repository.count_by_blob_key(blob_key, connection=connection) > 0:
+            return False
+        if self.blob_store.is_recent(blob_key, self.blob_grace_period()):
+            return False
+        return self.blob_store.delete(blob_key)
+
+    def unreferenced_blobs(self) -> list[str]:
+        """Stored blobs no hubfile references, leaving out those stored within the grace period."""
+        referenced = self.repository.referenced_blob_keys()
+        return [key for key in self.blob_store.keys(self.blob_grace_period()) if key not in referenced]
+
+    def collect_garbage(self) -> list[str]:
+        removed = self.unreferenced_blobs()
+        for key in removed:
+            self.blob_store.delete(key)
+            logger.info(f"Removed unreferenced blob {key}")
+        return removed
 
     def total_hubfile_views(self) -> int:
         return self.hubfile_view_record_repository.total_hubfile_views()
@@ -43,6 +132,71 @@ class HubfileService(BaseService):
         return hubfile_download_record_repository.total_hubfile_downloads()
 
 
+_RELEASED_BLOBS = "released_blob_keys"
+
+
+@event.listens_for(Session, "after_flush")
+def collect_released_blobs(session, flush_context):
+    """Blob keys dropped by deleted hubfiles (or hubfiles moved to another blob), read without loading."""
+    released = set()
+    for instance in session.deleted:
+        if isinstance(instance, Hubfile):
+            released.add(inspect(instance).dict.get("blob_key"))
+    for instance in session.dirty:
+        if isinstance(instance, Hubfile):
+            released.update(inspect(instance).attrs.blob_key.history.deleted or ())
+    released.discard(None)
+    if released:
+        session.info.setdefault(_RELEASED_BLOBS, set()).update(released)
+
+
+@event.listens_for(Session, "after_commit")
+def release_blobs(session):
+    released = session.info.pop(_RELEASED_BLOBS, None)
+    if not released:
+        return
+    # The committed session cannot emit SQL anymore: references are counted on a connection of its own
+    hubfile_service = resolve(HubfileService)
+    with db.engine.connect() as connection:
+        for blob_key in released:
+            try:
+                hubfile_service.release_blob(blob_key, connection=connection)
+            except OSError:
+                logger.exception(f"Could not release blob {blob_key}, left to storage:gc")
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_released_blobs(session):
+    session.info.pop(_RELEASED_BLOBS, None)
+
+
 class HubfileDownloadRecordService(BaseService):
     def __init__(self):
         super().__init__(HubfileDownloadRecordRepository())
+
+    def record(self, file_id: int, user_cookie: str) -> bool:
+        """Queues the download; it is written with the next analytics flush unless already recorded."""
+        return record_event(
+            HubfileDownloadRecord.__tablename__,
+            ("user_id", "file_id", "download_cookie"),
+            user_id=current_user.id if current_user.is_authenticated else None,
+            file_id=file_id,
+            download_date=datetime.now(timezone.utc),
+            download_cookie=user_cookie,
+        )
+
+
+class HubfileViewRecordService(BaseService):
+    def __init__(self):
+        super().__init__(HubfileViewRecordRepository())
+
+    def record(self, file_id: int, user_cookie: str) -> bool:
+        """Queues the view; it is written with the next analytics flush unless already recorded."""
+        return record_event(
+            HubfileViewRecord.__tablename__,
+            ("user_id", "file_id", "view_cookie"),
+            user_id=current_user.id if current_user.is_authenticated else None,
+            file_id=file_id,
+            view_date=datetime.now(timezone.utc),
+            view_cookie=user_cookie,
+        )
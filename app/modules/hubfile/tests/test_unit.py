@@ -1,3 +1,7 @@
+import os
+import time
+from unittest.mock import MagicMock
+
 import pytest
 
 
@@ -22,3 +26,313 @@ def test_sample_assertion(test_client):
     """
     greeting = "Hello, World!"
     assert greeting == "Hello, World!", "The greeting does not coincide with 'Hello, World!'"
+
+
+def test_blob_store_deduplicates_identical_content(tmp_path):
+    from core.storage.blob_store import BlobStore
+
+    store = BlobStore(root=str(tmp_path / "blobs"))
+    key = "ab" + "c" * 62
+
+    first = tmp_path / "first.csv"
+    second = tmp_path / "second.csv"
+    first.write_bytes(b"species,period\n")
+    second.write_bytes(b"species,period\n")
+
+    path = store.put_file(str(first), key)
+    same_path = store.put_file(str(second), key)
+
+    assert path == same_path == str(tmp_path / "blobs" / "ab" / "cc" / key)
+    assert not first.exists() and not second.exists()
+    assert list(store.keys()) == [key]
+
+
+def test_blob_store_keep_source_links_instead_of_copying(tmp_path):
+    from core.storage.blob_store import BlobStore
+
+    store = BlobStore(root=str(tmp_path / "blobs"))
+    source = tmp_path / "source.csv"
+    source.write_bytes(b"species,period\n")
+
+    path = store.put_file(str(source), "d" * 64, keep_source=True)
+
+    assert source.exists()
+    assert os.path.samefile(path, source)
+
+
+def test_get_path_by_hubfile_resolves_blobs_without_queries(tmp_path):
+    from app.modules.hubfile.services import HubfileService
+    from core.storage.blob_store import BlobStore
+
+    service = HubfileService()
+    service.blob_store = BlobStore(root=str(tmp_path))
+    service.repository = MagicMock()
+    hubfile = MagicMock(blob_key="ef" + "0" * 62)
+
+    assert service.get_path_by_hubfile(hubfile) == service.blob_store.path_for(hubfile.blob_key)
+    service.repository.get_dataset_by_hubfile.assert_not_called()
+
+
+def test_paths_of_files_outside_the_blob_store_come_from_their_columns(tmp_path):
+    from app.modules.hubfile.services import HubfileService
+
+    service = HubfileService()
+    service.repository = MagicMock()
+    stored = MagicMock(id=1, blob_key=None, storage_path="user_3/dataset_7/rex.csv")
+    unplaced = MagicMock(id=2, blob_key=None, storage_path=None)
+    unplaced.name = "raptor.csv"
+    service.repository.get_datasets_by_hubfile_ids.return_value = {2: MagicMock(id=8, user_id=3)}
+
+    paths = service.get_paths_by_hubfiles([stored, unplaced])
+
+    assert paths[1].endswith(os.path.join("uploads", "user_3", "dataset_7", "rex.csv"))
+    assert paths[2].endswith(os.path.join("uploads", "user_3", "dataset_8", "raptor.csv"))
+    # One batch lookup for the file without a stored location, none per file
+    service.repository.get_datasets_by_hubfile_ids.assert_called_once_with([2])
+    service.repository.get_dataset_by_hubfile.assert_not_called()
+
+
+def test_release_blob_keeps_referenced_blobs(tmp_path):
+    from app.modules.hubfile.services import HubfileService
+    from core.storage.blob_store import BlobStore
+
+    service = HubfileService()
+    service.blob_store = BlobStore(root=str(tmp_path))
+    service.repository = MagicMock()
+    source = tmp_path / "source.csv"
+    source.write_bytes(b"species,period\n")
+    key = "a" * 64
+    path = service.blob_store.put_file(str(source), key)
+
+    service.repository.count_by_blob_key.return_value = 1
+    assert service.release_blob(key) is False
+    assert service.blob_store.exists(key)
+
+    # Just stored: an upload deduplicated onto it may not be committed yet
+    service.repository.count_by_blob_key.return_value = 0
+    assert service.release_blob(key) is False
+    assert service.blob_store.exists(key)
+
+    an_hour_ago = time.time() - 3600
+    os.utime(path, (an_hour_ago, an_hour_ago))
+    assert service.release_blob(key) is True
+    assert not service.blob_store.exists(key)
+
+
+def test_collect_garbage_spares_blobs_within_the_grace_period(tmp_path):
+    from app.modules.hubfile.services import HubfileService
+    from core.storage.blob_store import BlobStore
+
+    service = HubfileService()
+    service.blob_store = BlobStore(root=str(tmp_path / "blobs"))
+    service.repository = MagicMock()
+    service.repository.referenced_blob_keys.return_value = {"c" * 64}
+    keys = {}
+    for key in ("a" * 64, "b" * 64, "c" * 64):
+        source = tmp_path / f"{key[0]}.csv"
+        source.write_bytes(key.encode())
+        keys[key] = service.blob_store.put_file(str(source), key)
+    an_hour_ago = time.time() - 3600
+    for path in (keys["b" * 64], keys["c" * 64]):
+        os.utime(path, (an_hour_ago, an_hour_ago))
+
+    assert service.collect_garbage() == ["b" * 64]
+    assert sorted(service.blob_store.keys()) == ["a" * 64, "c" * 64]
+
+    # Storing the same content again restarts the grace period of an old blob
+    source = tmp_path / "again.csv"
+    source.write_bytes(b"c" * 64)
+    service.repository.referenced_blob_keys.return_value = set()
+    service.blob_store.put_file(str(source), "c" * 64)
+    assert service.collect_garbage() == []
+
+
+def test_deleted_hubfiles_release_their_blobs_after_commit(test_client, tmp_path):
+    from app import db
+    from app.modules.dataset.models import DataSet, DSMetaData, PublicationType
+    from app.modules.fossils.models import FossilsFile
+    from app.modules.hubfile.models import Hubfile
+    from app.modules.hubfile.services import HubfileService
+    from core.services.registry import resolve
+    from core.storage.blob_store import BlobStore
+
+    service = resolve(HubfileService)
+    blob_store = service.blob_store
+    service.blob_store = BlobStore(root=str(tmp_path / "blobs"))
+    try:
+        shared, own = "1" * 64, "2" * 64
+        an_hour_ago = time.time() - 3600
+        for key in (shared, own):
+            source = tmp_path / f"{key[0]}.csv"
+            source.write_bytes(key.encode())
+            os.utime(service.blob_store.put_file(str(source), key), (an_hour_ago, an_hour_ago))
+
+        meta = DSMetaData(title="Blobs", description="Blob release test", publication_type=PublicationType.NONE)
+        dataset = DataSet(user_id=1, ds_meta_data=meta)
+        kept, deleted = FossilsFile(), FossilsFile()
+        kept.files.append(Hubfile(name="kept.csv", checksum="md5", blob_key=shared, size=64))
+        deleted.files.append(Hubfile(name="copy.csv", checksum="md5", blob_key=shared, size=64))
+        deleted.files.append(Hubfile(name="own.csv", checksum="md5", blob_key=own, size=64))
+        dataset.fossils_files.extend([kept, deleted])
+        db.session.add(dataset)
+        db.session.commit()
+
+        db.session.delete(deleted)
+        db.session.flush()
+        # Nothing is released until the deletion is committed
+        assert service.blob_store.exists(own)
+        db.session.rollback()
+        assert service.blob_store.exists(own)
+
+        db.session.delete(deleted)
+        db.session.commit()
+
+        assert not service.blob_store.exists(own)
+        assert service.blob_store.exists(shared)
+    finally:
+        service.blob_store = blob_store
+
+
+def test_download_file_supports_etag_and_range(test_client, tmp_path):
+    from unittest.mock import patch
+
+    from app import db
+    from app.modules.dataset.models import DataSet, DSMetaData, PublicationType
+    from app.modules.fossils.models import FossilsFile
+    from app.modules.hubfile.models import Hubfile, HubfileDownloadRecord
+
+    content = b"species,period\nT. rex,Cretaceous\n"
+    path = tmp_path / "rex.csv"
+    path.write_bytes(content)
+
+    meta = DSMetaData(title="Range", description="Range test", publication_type=PublicationType.NONE)
+    db.session.add(meta)
+    db.session.commit()
+    dataset = DataSet(user_id=1, ds_meta_data_id=meta.id)
+    db.session.add(dataset)
+    db.session.commit()
+    fossil = FossilsFile(data_set_id=dataset.id)
+    hubfile = Hubfile(name="rex.csv", checksum="md5", sha256="a" * 64, size=len(content))
+    fossil.files.append(hubfile)
+    db.session.add(fossil)
+    db.session.commit()
+
+    with patch("app.modules.hubfile.routes.HubfileService.get_path_by_hubfile", return_value=str(path)):
+        full = test_client.get(f"/file/download/{hubfile.id}")
+        records = HubfileDownloadRecord.query.filter_by(file_id=hubfile.id).count()
+        not_modified = test_client.get(f"/file/download/{hubfile.id}", headers={"If-None-Match": f'"{"a" * 64}"'})
+        partial = test_client.get(f"/file/download/{hubfile.id}", headers={"Range": "bytes=0-6"})
+
+    assert full.status_code == 200
+    assert full.headers["ETag"] == f'"{"a" * 64}"'
+    assert full.data == content
+
+    assert not_modified.status_code == 304
+    assert HubfileDownloadRecord.query.filter_by(file_id=hubfile.id).count() == records
+
+    assert partial.status_code == 206
+    assert partial.data == b"species"
+    assert partial.headers["Content-Range"] == f"bytes 0-6/{len(content)}"
+
+
+def test_send_download_offloads_to_nginx(test_app, tmp_path):
+    from core.storage.downloads import send_download
+
+    stored = tmp_path / "blobs" / "ab" / "cd" / "abcd"
+    stored.parent.mkdir(parents=True)
+    stored.write_bytes(b"species,period\n")
+    outside = tmp_path.parent / "outside.csv"
+    outside.write_bytes(b"species,period\n")
+
+    test_app.config.update(DOWNLOAD_OFFLOAD="nginx", DOWNLOAD_OFFLOAD_ROOT=str(tmp_path))
+    try:
+        with test_app.test_request_context("/file/download/1"):
+            offloaded = send_download(str(stored), "dinó.csv", etag="abcd")
+            fallback = send_download(str(outside), "outside.csv", etag="abcd")
+        with test_app.test_request_context("/file/download/1", headers={"If-None-Match": '"abcd"'}):
+            not_modified = send_download(str(stored), "dinó.csv", etag="abcd")
+    finally:
+        test_app.config.update(DOWNLOAD_OFFLOAD="", DOWNLOAD_OFFLOAD_ROOT=None)
+
+    assert offloaded.headers["X-Accel-Redirect"] == "/_protected/uploads/blobs/ab/cd/abcd"
+    assert offloaded.get_data() == b""
+    assert offloaded.headers["ETag"] == '"abcd"'
+    assert "filename*=UTF-8''din%C3%B3.csv" in offloaded.headers["Content-Disposition"]
+
+    assert "X-Accel-Redirect" not in fallback.headers
+    fallback.direct_passthrough = False
+    assert fallback.get_data() == b"species,period\n"
+    fallback.close()
+
+    assert not_modified.status_code == 304
+    assert "X-Accel-Redirect" not in not_modified.headers
+
+
+def test_send_download_serves_precompressed_variants(test_app, tmp_path):
+    import brotli
+    import zstandard
+
+    from core.storage.blob_store import BlobStore
+    from core.storage.compression import write_variants
+    from core.storage.downloads import send_download
+
+    content = b"species,period\nT. rex,Cretaceous\n" * 500
+    store = BlobStore(root=str(tmp_path / "blobs"))
+    source = tmp_path / "rex.csv"
+    source.write_bytes(content)
+    path = store.put_file(str(source), "e" * 64)
+
+    assert sorted(write_variants(path)) == [path + ".br", path + ".zst"]
+    # Variants neither look like blobs nor outlive theirs
+    assert list(store.keys()) == ["e" * 64]
+
+    with test_app.test_request_context("/file/download/1", headers={"Accept-Encoding": "gzip, br, zstd"}):
+        zstd_resp = send_download(path, "rex.csv", etag="abc", precompressed=True)
+        zstd_resp.direct_passthrough = False
+    with test_app.test_request_context("/file/download/1", headers={"Accept-Encoding": "gzip, br"}):
+        br_resp = send_download(path, "rex.csv", etag="abc", precompressed=True)
+        br_resp.direct_passthrough = False
+    with test_app.test_request_context("/file/download/1", headers={"Accept-Encoding": "gzip"}):
+        plain_resp = send_download(path, "rex.csv", etag="abc", precompressed=True)
+
+    assert zstd_resp.headers["Content-Encoding"] == "zstd"
+    assert zstd_resp.get_etag() == ("abc.zstd", False)
+    assert zstd_resp.mimetype == "text/csv"
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(zstd_resp.get_data()) == content
+    assert br_resp.headers["Content-Encoding"] == "br"
+    assert brotli.decompress(br_resp.get_data()) == content
+    assert "Content-Encoding" not in plain_resp.headers
+
+    store.delete("e" * 64)
+    assert not os.path.exists(path + ".zst") and not os.path.exists(path + ".br")
+
+
+def test_responses_are_compressed_for_clients_accepting_it(test_client):
+    import gzip
+    import json
+
+    import brotli
+    from werkzeug.datastructures import MIMEAccept
+    from werkzeug.http import parse_accept_header
+
+    from core.storage.compression import negotiate
+
+    assert negotiate(parse_accept_header("gzip;q=1.0, zstd;q=0.5")) == "gzip"
+    assert negotiate(parse_accept_header("br, zstd")) == "zstd"
+    assert negotiate(parse_accept_header("identity")) is None
+    assert negotiate(parse_accept_header("", MIMEAccept)) is None
+
+    plain = test_client.get("/api/v1/datasets/export.ndjson")
+    streamed = test_client.get("/api/v1/datasets/export.ndjson", headers={"Accept-Encoding": "gzip"})
+    page = test_client.get("/", headers={"Accept-Encoding": "br"})
+    small = test_client.post("/explore", json={"query": "nothing-matches"}, headers={"Accept-Encoding": "br"})
+
+    assert "Content-Encoding" not in plain.headers
+    assert streamed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(streamed.data) == plain.data
+    assert page.headers["Content-Encoding"] == "br"
+    assert b"</html>" in brotli.decompress(page.data)
+    assert "Accept-Encoding" in page.headers["Vary"]
+    # Under COMPRESSION_MIN_SIZE
+    assert "Content-Encoding" not in small.headers
+    assert json.loads(small.data)["results"] == []
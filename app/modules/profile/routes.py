@@ -8,24 +8,25 @@ from flask_login import current_user, login_required
 
 from app import db
 from app.modules.auth.services import AuthenticationService
-from app.modules.dataset.models import DataSet
+from app.modules.dataset.services import DataSetService
 from app.modules.profile import profile_bp
 from app.modules.profile.forms import UserProfileForm
 from app.modules.profile.services import UserProfileService
 from app.modules.auth.forms import Enable2FAForm
+from core.services.registry import resolve
 
 
 @profile_bp.route("/profile/edit", methods=["GET", "POST"])
 @login_required
 def edit_profile():
-    auth_service = AuthenticationService()
+    auth_service = resolve(AuthenticationService)
     profile = auth_service.get_authenticated_user_profile()
     if not profile:
         return redirect(url_for("public.index"))
 
     form = UserProfileForm()
     if request.method == "POST":
-        service = UserProfileService()
+        service = resolve(UserProfileService)
         result, errors = service.update_profile(profile.id, form)
         return service.handle_service_response(
             result, errors, "profile.edit_profile", "Profile updated successfully", "profile/edit.html", form
@@ -40,16 +41,7 @@ def my_profile():
     page = request.args.get("page", 1, type=int)
     per_page = 5
 
-    user_datasets_pagination = (
-        db.session.query(DataSet)
-        .filter(DataSet.user_id == current_user.id)
-        .order_by(DataSet.created_at.desc())
-        .paginate(page=page, per_page=per_page, error_out=False)
-    )
-
-    total_datasets_count = db.session.query(DataSet).filter(DataSet.user_id == current_user.id).count()
-
-    print(user_datasets_pagination.items)
+    user_datasets_pagination = resolve(DataSetService).paginate_by_user(current_user.id, page, per_page)
 
     return render_template(
         "profile/summary.html",
@@ -57,7 +49,7 @@ def my_profile():
         user=current_user,
         datasets=user_datasets_pagination.items,
         pagination=user_datasets_pagination,
-        total_datasets=total_datasets_count,
+        total_datasets=user_datasets_pagination.total,
     )
 
 @profile_bp.route("/2fa/enable", methods=["GET", "POST"])
@@ -23,7 +23,11 @@
 
     function buildSubtitle(metric, period, count) {
         const metricText = metric === "views" ? "views" : "downloads";
-        const periodText = period === "month" ? "this month" : "this week";
+        const periodText = getText(
+            { day: "today", week: "this week", month: "this month", year: "this year" },
+            period,
+            `the last ${parseInt(period, 10)} days`
+        );
         if (count === 0) {
             return `No ${metricText} recorded for ${periodText}.`;
         }
@@ -2,16 +2,22 @@ import logging
 import os
 
 from flask import render_template
-from app.modules.dataset.services import DataSetService
-from app.modules.fossils.services import FossilsService
+from app.modules.dataset.counters import (
+    DATASET_DOWNLOADS,
+    DATASET_VIEWS,
+    FILE_DOWNLOADS,
+    FILE_VIEWS,
+    FOSSILS_FILES,
+    SYNCHRONIZED_DATASETS,
+)
+from app.modules.dataset.services import DataSetService, HubCounterService
 from app.modules.public import public_bp
 
 from flask import redirect, url_for, request
 from flask_login import current_user
 from app.modules.profile.services import UserProfileService
-from app.modules.dataset.models import DataSet
 from app.modules.auth.models import User  #
-from app import db
+from core.services.registry import resolve
 
 
 logger = logging.getLogger(__name__)
@@ -20,30 +26,20 @@ logger = logging.getLogger(__name__)
 @public_bp.route("/")
 def index():
     logger.info("Access index")
-    dataset_service = DataSetService()
-    fossils_service = FossilsService()
-
-
-    datasets_counter = dataset_service.count_synchronized_datasets()
-    fossils_files_counter = fossils_service.count_fossils_files()
-
-    total_dataset_downloads = dataset_service.total_dataset_downloads()
-    total_fossils_file_downloads = fossils_service.total_fossils_file_downloads()
-
-    total_dataset_views = dataset_service.total_dataset_views()
-    total_fossils_file_views = fossils_service.total_fossils_file_views()
+    dataset_service = resolve(DataSetService)
+    counters = resolve(HubCounterService).values()
 
     trending_list = dataset_service.get_trending(metric="downloads", period="week", limit=5)
 
     return render_template(
         "public/index.html",
         datasets=dataset_service.latest_synchronized(),
-        datasets_counter=datasets_counter,
-        fossils_files_counter=fossils_files_counter,
-        total_dataset_downloads=total_dataset_downloads,
-        total_fossils_file_downloads=total_fossils_file_downloads,
-        total_dataset_views=total_dataset_views,
-        total_fossils_file_views=total_fossils_file_views,
+        datasets_counter=counters[SYNCHRONIZED_DATASETS],
+        fossils_files_counter=counters[FOSSILS_FILES],
+        total_dataset_downloads=counters[DATASET_DOWNLOADS],
+        total_fossils_file_downloads=counters[FILE_DOWNLOADS],
+        total_dataset_views=counters[DATASET_VIEWS],
+        total_fossils_file_views=counters[FILE_VIEWS],
         trending_datasets=trending_list
     )
 
@@ -65,7 +61,7 @@ def view_user_profile(user_id):
         return redirect(url_for('profile.my_profile'))
 
    
-    profile_service = UserProfileService()
+    profile_service = resolve(UserProfileService)
     user_profile = profile_service.get_user_profile(user_id) # Usamos el servicio de perfil
     
     if not user_profile:
@@ -76,14 +72,7 @@ def view_user_profile(user_id):
     page = request.args.get('page', 1, type=int)
     per_page = 5  
 
-    user_datasets_pagination = db.session.query(DataSet) \
-        .filter(DataSet.user_id == user_id) \
-        .order_by(DataSet.created_at.desc()) \
-        .paginate(page=page, per_page=per_page, error_out=False)
-
-    total_datasets_count = db.session.query(DataSet) \
-        .filter(DataSet.user_id == user_id) \
-        .count()
+    user_datasets_pagination = resolve(DataSetService).paginate_by_user(user_id, page, per_page)
 
     
     return render_template(
@@ -92,7 +81,7 @@ def view_user_profile(user_id):
         user=user_profile.user, 
         datasets=user_datasets_pagination.items,
         pagination=user_datasets_pagination,
-        total_datasets=total_datasets_count
+        total_datasets=user_datasets_pagination.total
     )
 @public_bp.route("/version")
 def show_version():
@@ -5,6 +5,7 @@ from flask import abort, request
 
 from app.modules.webhook import webhook_bp
 from app.modules.webhook.services import WebhookService
+from core.services.registry import resolve
 
 load_dotenv()
 
@@ -18,7 +19,7 @@ def deploy():
     if token != f"Bearer {WEBHOOK_TOKEN}":
         abort(403, description="Unauthorized")
 
-    service = WebhookService()
+    service = resolve(WebhookService)
 
     web_container = service.get_web_container()
 
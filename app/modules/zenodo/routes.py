@@ -2,6 +2,7 @@ from flask import render_template
 
 from app.modules.zenodo import zenodo_bp
 from app.modules.zenodo.services import ZenodoService
+from core.services.registry import resolve
 
 
 @zenodo_bp.route("/zenodo", methods=["GET"])
@@ -11,5 +12,5 @@ def index():
 
 @zenodo_bp.route("/zenodo/test", methods=["GET"])
 def zenodo_test() -> dict:
-    service = ZenodoService()
+    service = resolve(ZenodoService)
     return service.test_full_connection()
@@ -8,9 +8,11 @@ from flask_login import current_user
 
 from app.modules.dataset.models import DataSet
 from app.modules.fossils.models import FossilsFile
+from app.modules.hubfile.services import HubfileService
 from app.modules.zenodo.repositories import ZenodoRepository
 from core.configuration.configuration import uploads_folder_name
 from core.services.BaseService import BaseService
+from core.services.registry import resolve
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +44,7 @@ class ZenodoService(BaseService):
         self.ZENODO_API_URL = self.get_zenodo_url()
         self.headers = {"Content-Type": "application/json"}
         self.params = {"access_token": self.ZENODO_ACCESS_TOKEN}
+        self.hubfile_service = resolve(HubfileService)
 
     def test_connection(self) -> bool:
         """
@@ -192,12 +195,19 @@ class ZenodoService(BaseService):
         """
         csv_filename = fossils_file.fossils_meta_data.csv_filename
         data = {"name": csv_filename}
-        user_id = current_user.id if user is None else user.id
-        file_path = os.path.join(uploads_folder_name(), f"user_{str(user_id)}", f"dataset_{dataset.id}/", csv_filename)
-        files = {"file": open(file_path, "rb")}
+        hubfile = next(iter(fossils_file.files), None)
+        if hubfile is not None:
+            # Moved files live in the blob store, the hubfile knows where
+            file_path = self.hubfile_service.get_path_by_hubfile(hubfile, dataset=dataset)
+        else:
+            user_id = current_user.id if user is None else user.id
+            file_path = os.path.join(
+                uploads_folder_name(), f"user_{str(user_id)}", f"dataset_{dataset.id}/", csv_filename
+            )
 
         publish_url = f"{self.ZENODO_API_URL}/{deposition_id}/files"
-        response = requests.post(publish_url, params=self.params, data=data, files=files)
+        with open(file_path, "rb") as f:
+            response = requests.post(publish_url, params=self.params, data=data, files={"file": f})
         if response.status_code != 201:
             error_message = f"Failed to upload files. Error details: {response.json()}"
             raise Exception(error_message)
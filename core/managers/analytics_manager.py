@@ -0,0 +1,246 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import insert, select
+
+from core.configuration.configuration import uploads_folder_name
+
+logger = logging.getLogger(__name__)
+
+# A flush deletes the spool files it claimed within one transaction; older claims belong to a dead process
+STALE_REPLAY_AGE = 300
+
+_insert_hooks: Dict[str, List[Callable]] = defaultdict(list)
+
+
+def analytics_spool_folder_name():
+    return os.path.join(os.getenv("WORKING_DIR", ""), uploads_folder_name(), "spool", "analytics")
+
+
+def on_insert(table: str):
+    """
+    Registers fn(connection, rows) to run after the buffer inserts rows into table, in the same
+    transaction (e.g. to keep aggregates in step with the records).
+    """
+
+    def decorator(fn):
+        _insert_hooks[table].append(fn)
+        return fn
+
+    return decorator
+
+
+def _encode(row: dict) -> dict:
+    return {key: {"$dt": value.isoformat()} if isinstance(value, datetime) else value for key, value in row.items()}
+
+
+def _decode(row: dict) -> dict:
+    return {
+        key: datetime.fromisoformat(value["$dt"]) if isinstance(value, dict) and "$dt" in value else value
+        for key, value in row.items()
+    }
+
+
+class AnalyticsBuffer:
+    """
+    Write-behind buffer for view and download records.
+
+    record() never touches the database: it drops events already seen within the dedupe window and
+    queues the rest. A background thread flushes the queue every few seconds, one multi-row INSERT
+    per table, after removing the events whose key is already stored (one SELECT per table and
+    batch instead of one per hit). When the database is unavailable, or the queue is full, events
+    are appended to a JSONL spool that the next successful flush replays. Spool files claimed by a
+    process that died mid-flush are replayed once their claim is STALE_REPLAY_AGE seconds old.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.sync = app.config.get("ANALYTICS_SYNC", False)
+        self.flush_interval = app.config.get("ANALYTICS_FLUSH_INTERVAL", 2.0)
+        self.max_pending = app.config.get("ANALYTICS_MAX_PENDING", 10000)
+        self.dedupe_window = app.config.get("ANALYTICS_DEDUPE_WINDOW", 3600)
+        self.spool_dir = app.config.get("ANALYTICS_SPOOL_DIR") or analytics_spool_folder_name()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: List[Tuple[str, Tuple[str, ...], dict]] = []
+        self._seen: Dict[tuple, float] = {}
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, table: str, key_fields: Tuple[str, ...], **row) -> bool:
+        """
+        Queues a row for table. key_fields identify duplicates (the last one should be selective,
+        e.g. the cookie). Returns False when the event was dropped as a duplicate.
+        """
+        if self._pid != os.getpid():
+            # Forked worker: the parent's thread and queue do not exist here
+            self._reset()
+
+        key = (table,) + tuple(row.get(field) for field in key_fields)
+        now = time.monotonic()
+        spill = None
+        with self._lock:
+            if self._seen.get(key, 0) > now:
+                return False
+            self._seen[key] = now + self.dedupe_window
+            if len(self._pending) >= self.max_pending:
+                spill = [(table, key_fields, row)]
+            else:
+                self._pending.append((table, key_fields, row))
+
+        if spill:
+            self._spool(spill)
+        if self.sync:
+            self.flush()
+        else:
+            self._ensure_thread()
+        return True
+
+    def flush(self) -> int:
+        """Writes the queued and spooled events. Returns the number of rows inserted."""
+        with self._flush_lock:
+            with self._lock:
+                events, self._pending = self._pending, []
+                self._purge_seen()
+
+            spooled = self._claim_spool()
+            events = [event for _, batch in spooled for event in batch] + events
+            if not events:
+                return 0
+
+            try:
+                with self.app.app_context():
+                    inserted = self._write(events)
+            except Exception as exc:
+                logger.warning(f"Analytics flush failed, spooling {len(events)} events: {exc}")
+                self._spool(events)
+                inserted = 0
+
+            for path, _ in spooled:
+                os.remove(path)
+            return inserted
+
+    def _write(self, events) -> int:
+        db = self.app.extensions["sqlalchemy"]
+        batches = defaultdict(list)
+        for table, key_fields, row in events:
+            batches[(table, key_fields)].append(row)
+
+        inserted = 0
+        with db.engine.begin() as conn:
+            for (table_name, key_fields), rows in batches.items():
+                table = db.metadata.tables[table_name]
+                key_columns = [table.c[field] for field in key_fields]
+
+                stored = {
+                    tuple(existing)
+                    for existing in conn.execute(
+                        select(*key_columns).where(key_columns[-1].in_({row[key_fields[-1]] for row in rows}))
+                    )
+                }
+                new_rows = []
+                for row in rows:
+                    key = tuple(row.get(field) for field in key_fields)
+                    if key not in stored:
+                        stored.add(key)
+                        new_rows.append(row)
+
+                if new_rows:
+                    conn.execute(insert(table), new_rows)
+                    for hook in _insert_hooks[table_name]:
+                        hook(conn, new_rows)
+                    inserted += len(new_rows)
+        return inserted
+
+    def _purge_seen(self):
+        now = time.monotonic()
+        self._seen = {key: expires for key, expires in self._seen.items() if expires > now}
+
+    def _spool(self, events):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        path = os.path.join(self.spool_dir, f"events-{os.getpid()}.jsonl")
+        with open(path, "a") as f:
+            for table, key_fields, row in events:
+                f.write(json.dumps({"table": table, "key": list(key_fields), "row": _encode(row)}) + "\n")
+
+    def _claim_spool(self):
+        """
+        Takes ownership of the spool files (rename is atomic, so two workers never replay the same one),
+        starting with the claims left behind by dead processes.
+        """
+        stale_before = time.time() - STALE_REPLAY_AGE
+        paths = [
+            path
+            for path in glob.glob(os.path.join(self.spool_dir, "events-*.jsonl.*.replay"))
+            if self._mtime(path) < stale_before
+        ]
+        paths += glob.glob(os.path.join(self.spool_dir, "events-*.jsonl"))
+
+        claimed = []
+        for path in paths:
+            spool_path = path[: path.index(".jsonl") + len(".jsonl")]
+            claimed_path = f"{spool_path}.{os.getpid()}.{time.time_ns()}.replay"
+            try:
+                # The claim starts now (a rename keeps the mtime of the last append)
+                os.utime(path)
+                os.rename(path, claimed_path)
+            except FileNotFoundError:
+                continue
+            with open(claimed_path) as f:
+                batch = []
+                for line in f:
+                    entry = json.loads(line)
+                    batch.append((entry["table"], tuple(entry["key"]), _decode(entry["row"])))
+            claimed.append((claimed_path, batch))
+        return claimed
+
+    @staticmethod
+    def _mtime(path: str) -> float:
+        try:
+            return os.path.getmtime(path)
+        except FileNotFoundError:
+            return time.time()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="analytics-flush", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Analytics flush thread error")
+
+
+class AnalyticsManager:
+    def __init__(self, app):
+        self.app = app
+
+    def init_buffer(self):
+        buffer = AnalyticsBuffer(self.app)
+        self.app.extensions["analytics"] = buffer
+        # Whatever is still queued when the process stops goes to the database (or the spool)
+        atexit.register(buffer.flush)
+        return buffer
+
+
+def record_event(table: str, key_fields: Tuple[str, ...], **row) -> bool:
+    return current_app.extensions["analytics"].record(table, key_fields, **row)
@@ -0,0 +1,73 @@
+from flask import request
+
+from core.storage.compression import compress, compress_stream, negotiate
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/javascript",
+    "application/json",
+    "application/x-ndjson",
+    "application/xml",
+    "image/svg+xml",
+}
+
+
+def is_compressible(mimetype) -> bool:
+    return bool(mimetype) and (mimetype.startswith("text/") or mimetype in COMPRESSIBLE_MIMETYPES)
+
+
+class CompressionManager:
+    """
+    Compresses responses with the best encoding the client accepts (zstd, brotli or gzip). Buffered
+    bodies under COMPRESSION_MIN_SIZE are left alone; streamed bodies and files are compressed chunk
+    by chunk as they are sent. Responses that already carry a Content-Encoding (e.g. precompressed
+    variants served by send_download) or a byte range go out untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def init_compression(self):
+        if not self.app.config.get("COMPRESSION", True):
+            return
+
+        min_size = self.app.config.get("COMPRESSION_MIN_SIZE", 1024)
+
+        @self.app.after_request
+        def compress_response(response):
+            if (
+                request.method == "HEAD"
+                or not is_compressible(response.mimetype)
+                or response.status_code < 200
+                or response.status_code in (204, 206, 304)
+                or "Content-Encoding" in response.headers
+                or "Content-Range" in response.headers
+                or "X-Accel-Redirect" in response.headers
+            ):
+                return response
+
+            response.vary.add("Accept-Encoding")
+            streamed = response.is_streamed or response.direct_passthrough
+            if not streamed and (response.content_length or 0) < min_size:
+                return response
+
+            encoding = negotiate(request.accept_encodings)
+            if encoding is None:
+                return response
+
+            if streamed:
+                original = response.response
+                response.response = compress_stream(response.iter_encoded(), encoding)
+                response.direct_passthrough = False
+                if hasattr(original, "close"):
+                    response.call_on_close(original.close)
+                response.headers.pop("Content-Length", None)
+            else:
+                response.set_data(compress(response.get_data(), encoding))
+
+            response.headers["Content-Encoding"] = encoding
+            response.headers.pop("Accept-Ranges", None)
+            # Another representation of the same content (as nginx does with gzip)
+            etag, weak = response.get_etag()
+            if etag and not weak:
+                response.set_etag(etag, weak=True)
+            return response
@@ -33,10 +33,41 @@ class Config:
     TIMEZONE = "Europe/Madrid"
     TEMPLATES_AUTO_RELOAD = True
     UPLOAD_FOLDER = "uploads"
+    ZIP_IMPORT_MAX_MEMBERS = int(os.getenv("ZIP_IMPORT_MAX_MEMBERS", 5000))
+    ZIP_IMPORT_MAX_MEMBER_SIZE = int(os.getenv("ZIP_IMPORT_MAX_MEMBER_SIZE", 100 * 1024 * 1024))
+    ZIP_IMPORT_MAX_TOTAL_SIZE = int(os.getenv("ZIP_IMPORT_MAX_TOTAL_SIZE", 1024 * 1024 * 1024))
+    ZIP_IMPORT_MAX_RATIO = int(os.getenv("ZIP_IMPORT_MAX_RATIO", 100))
+    ZIP_IMPORT_WORKERS = int(os.getenv("ZIP_IMPORT_WORKERS", 4))
+    ARCHIVE_CACHE_DIR = os.getenv("ARCHIVE_CACHE_DIR")
+    ARCHIVE_CACHE_MAX_BYTES = int(os.getenv("ARCHIVE_CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+    # Seconds a download waits for another worker building the same archive before streaming its own
+    ARCHIVE_CACHE_LOCK_TIMEOUT = float(os.getenv("ARCHIVE_CACHE_LOCK_TIMEOUT", 10.0))
+    # "nginx" hands file downloads to nginx through X-Accel-Redirect (see docker/nginx/*.conf)
+    DOWNLOAD_OFFLOAD = os.getenv("DOWNLOAD_OFFLOAD", "")
+    DOWNLOAD_OFFLOAD_ROOT = os.getenv("DOWNLOAD_OFFLOAD_ROOT")
+    DOWNLOAD_OFFLOAD_LOCATION = os.getenv("DOWNLOAD_OFFLOAD_LOCATION", "/_protected/uploads/")
+    # View/download records are buffered in memory and written in batches (see core/managers/analytics_manager.py)
+    ANALYTICS_SYNC = os.getenv("ANALYTICS_SYNC", "False").lower() == "true"
+    ANALYTICS_FLUSH_INTERVAL = float(os.getenv("ANALYTICS_FLUSH_INTERVAL", 2.0))
+    ANALYTICS_MAX_PENDING = int(os.getenv("ANALYTICS_MAX_PENDING", 10000))
+    ANALYTICS_DEDUPE_WINDOW = int(os.getenv("ANALYTICS_DEDUPE_WINDOW", 3600))
+    ANALYTICS_SPOOL_DIR = os.getenv("ANALYTICS_SPOOL_DIR")
+    # Per-request query count, DB time and N+1 warnings (see core/managers/query_stats_manager.py)
+    SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "True").lower() == "true"
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 5))
+    SQL_STATS_HEADER = os.getenv("SQL_STATS_HEADER", "False").lower() == "true"
+    # zstd/brotli/gzip responses negotiated from Accept-Encoding (see core/managers/compression_manager.py)
+    COMPRESSION = os.getenv("COMPRESSION", "True").lower() == "true"
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+    # Write the .zst/.br variants of stored CSVs as they are uploaded (`rosemary storage:precompress` does it offline)
+    COMPRESSION_PRECOMPRESS = os.getenv("COMPRESSION_PRECOMPRESS", "False").lower() == "true"
+    # Seconds a newly stored blob is kept even when unreferenced: its upload may not be committed yet
+    BLOB_GRACE_PERIOD = int(os.getenv("BLOB_GRACE_PERIOD", 15 * 60))
 
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    SQL_STATS_HEADER = True
 
 
 class TestingConfig(Config):
@@ -49,6 +80,8 @@ class TestingConfig(Config):
         f"{os.getenv('MARIADB_TEST_DATABASE', 'default_db')}"
     )
     WTF_CSRF_ENABLED = False
+    ANALYTICS_SYNC = True
+    SQL_STATS_HEADER = True
 
 
 class ProductionConfig(Config):
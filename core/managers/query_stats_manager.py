@@ -0,0 +1,157 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Tuple
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_STATS = "query_stats"
+_STARTED = "query_stats_started"
+_captures = threading.local()
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """The statement with literals and IN (...) placeholder lists collapsed, so repeats of a query match."""
+    statement = _LITERALS.sub("?", statement)
+    statement = _PLACEHOLDER_LISTS.sub("(...)", statement)
+    return _SPACES.sub(" ", statement).strip()
+
+
+class QueryStats:
+    """
+    Queries run while collecting: how many, the time spent in the database and how often each
+    statement fingerprint repeated. A SELECT repeated n_plus_one_threshold times or more is most
+    likely a relationship loaded row by row (N+1).
+    """
+
+    def __init__(self, n_plus_one_threshold: int = 5):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[fingerprint(statement)] += 1
+
+    @property
+    def n_plus_one(self) -> List[Tuple[str, int]]:
+        return [
+            (statement, count)
+            for statement, count in self.fingerprints.most_common()
+            if count >= self.n_plus_one_threshold and statement.upper().startswith("SELECT")
+        ]
+
+    def to_dict(self) -> dict:
+        return {
+            "queries": self.count,
+            "db_time_ms": round(self.duration * 1000, 2),
+            "n_plus_one": [{"statement": statement[:300], "count": count} for statement, count in self.n_plus_one],
+        }
+
+    def header(self) -> str:
+        return f"count={self.count}; time_ms={self.duration * 1000:.2f}; n_plus_one={len(self.n_plus_one)}"
+
+
+def _collectors() -> list:
+    collectors = list(getattr(_captures, "stack", ()))
+    if has_app_context() and _STATS in g:
+        collectors.append(g.get(_STATS))
+    return collectors
+
+
+@contextmanager
+def capture_queries(n_plus_one_threshold: int = 5):
+    """Collects the queries run by this thread inside the block (with or without a request)."""
+    stats = QueryStats(n_plus_one_threshold)
+    stack = _captures.__dict__.setdefault("stack", [])
+    stack.append(stats)
+    try:
+        yield stats
+    finally:
+        stack.remove(stats)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_STARTED, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get(_STARTED)
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    for stats in _collectors():
+        stats.record(statement, duration)
+
+
+def _handle_error(context):
+    # A failing statement never reaches after_cursor_execute: drop its start time from the (pooled) connection
+    if context.connection is not None and context.execution_context is not None:
+        _after_cursor_execute(context.connection, None, context.statement or "", None, None, False)
+
+
+class QueryStatsManager:
+    """
+    Per-request SQL instrumentation. Each request gets its own QueryStats, fed by cursor listeners;
+    after the request the totals and the suspected N+1 statements are logged as JSON (a warning
+    when there are any) and, with SQL_STATS_HEADER, returned in an X-DB-Queries header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def init_query_stats(self):
+        if not self.app.config.get("SQL_INSTRUMENTATION", True):
+            return
+
+        # Registered on the Engine class, once per process: queries only count while a collector is active
+        if not event.contains(Engine, "after_cursor_execute", _after_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+            event.listen(Engine, "handle_error", _handle_error)
+
+        threshold = self.app.config.get("SQL_N_PLUS_ONE_THRESHOLD", 5)
+        send_header = self.app.config.get("SQL_STATS_HEADER", False)
+
+        @self.app.before_request
+        def start_query_stats():
+            g.setdefault(_STATS, QueryStats(threshold))
+
+        @self.app.after_request
+        def report_query_stats(response):
+            stats = g.pop(_STATS, None)
+            if stats is None or not stats.count:
+                return response
+
+            summary = stats.to_dict()
+            level = logging.WARNING if summary["n_plus_one"] else logging.INFO
+            logger.log(
+                level,
+                json.dumps(
+                    {
+                        "event": "sql_stats",
+                        "method": request.method,
+                        "path": request.path,
+                        "endpoint": request.endpoint,
+                        "status": response.status_code,
+                        **summary,
+                    }
+                ),
+            )
+            if send_header:
+                response.headers["X-DB-Queries"] = stats.header()
+            return response
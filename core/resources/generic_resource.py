@@ -1,10 +1,16 @@
+import base64
+import json
 from datetime import datetime
+from urllib.parse import urlencode
 
 from flask import request
 from flask_restful import Resource
 
 from app import db
 
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
 
 def convert_value(value):
     if isinstance(value, datetime):
@@ -12,21 +18,96 @@ def convert_value(value):
     return value
 
 
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([last_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        (last_id,) = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(last_id)
+    except (TypeError, ValueError, UnicodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def page_size(limit) -> int:
+    if limit is None or limit == "":
+        return PAGE_SIZE
+    try:
+        limit = int(limit)
+    except ValueError as exc:
+        raise ValueError("Invalid limit") from exc
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
 class GenericResource(Resource):
-    def __init__(self, model, serializer):
+    """
+    CRUD resource over model. Listings keep their {"items": [...]} body and come in pages of `limit` items
+    ordered by id; the next page is only announced in headers, as a Link rel="next" URL and as the opaque
+    `cursor` it carries in X-Next-Cursor. `fields` selects a subset of the serialized fields, and each
+    query argument named in filters (a name -> condition factory mapping, e.g.
+    {"user_id": lambda value: Model.user_id == int(value)}) narrows the listing.
+    """
+
+    def __init__(self, model, serializer, query_options=None, filters=None):
         self.model = model
         self.model_name = model.__name__
         self.serializer = serializer
+        self.query_options = query_options
+        self.filters = filters or {}
+
+    def _read_query(self):
+        """Query for GET: with the loader options of the serialized relationships, when given."""
+        if self.query_options:
+            return self.model.query.options(*self.query_options())
+        return self.model.query
+
+    def _fields(self):
+        """Fields asked for with ?fields=a,b (None for all of them). Raises ValueError for unknown ones."""
+        fields = request.args.get("fields")
+        if not fields:
+            return None
+        fields = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in fields if field not in self.serializer.serialization_fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return fields
+
+    def _list_query(self):
+        query = self._read_query()
+        for name, condition in self.filters.items():
+            value = request.args.get(name)
+            if value:
+                query = query.filter(condition(value))
+        return query
 
     def get(self, id=None):
-        if id:
-            item = self.model.query.get(id)
-            if not item:
-                return {"message": f"{self.model_name} not found"}, 404
-            return self.serializer.serialize(item), 200
-        else:
-            items = self.model.query.all()
-            return {"items": [self.serializer.serialize(i) for i in items]}, 200
+        try:
+            fields = self._fields()
+            if id:
+                item = self._read_query().get(id)
+                if not item:
+                    return {"message": f"{self.model_name} not found"}, 404
+                return self.serializer.serialize(item, fields), 200
+
+            limit = page_size(request.args.get("limit"))
+            cursor = request.args.get("cursor")
+            query = self._list_query()
+            if cursor:
+                query = query.filter(self.model.id > decode_cursor(cursor))
+        except ValueError as exc:
+            return {"message": str(exc)}, 400
+
+        items = query.order_by(self.model.id).limit(limit + 1).all()
+        body = {"items": self.serializer.serialize_many(items[:limit], fields)}
+        if len(items) <= limit:
+            return body, 200
+
+        next_cursor = encode_cursor(items[limit - 1].id)
+        next_url = f"{request.base_url}?{urlencode({**request.args.to_dict(), 'cursor': next_cursor})}"
+        return body, 200, {"Link": f'<{next_url}>; rel="next"', "X-Next-Cursor": next_cursor}
 
     def post(self):
         data = request.get_json()
@@ -63,9 +144,9 @@ class GenericResource(Resource):
         return {"message": f"{self.model_name} deleted successfully"}, 204
 
 
-def create_resource(model, serialization_fields=None):
+def create_resource(model, serialization_fields=None, query_options=None, filters=None):
     class Resource(GenericResource):
         def __init__(self):
-            super().__init__(model, serialization_fields)
+            super().__init__(model, serialization_fields, query_options, filters)
 
     return Resource
@@ -0,0 +1,134 @@
+"""
+Micro-benchmark of Serializer against the field-by-field implementation it replaced.
+
+    python -m core.serialisers.benchmark [--items 2000] [--files 5] [--repeat 5]
+
+Serializes a listing shaped like /api/v1/datasets/ (mapped objects, no database) with both and
+prints the best time of each.
+"""
+
+import argparse
+import timeit
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy.orm import DeclarativeBase, relationship
+
+from core.serialisers.serializer import Serializer, convert_value
+
+
+class ReferenceSerializer:
+    """The previous implementation: looks every field up on every instance."""
+
+    def __init__(self, serialization_fields, related_serializers=None):
+        self.serialization_fields = serialization_fields
+        self.related_serializers = related_serializers or {}
+
+    def serialize(self, instance):
+        serialized_data = {}
+        for key, attr_name in self.serialization_fields.items():
+            if key in self.related_serializers:
+                related_data = getattr(instance, attr_name)()
+                if isinstance(related_data, list):
+                    serialized_data[key] = [
+                        self.related_serializers[key].serialize(sub_instance) for sub_instance in related_data
+                    ]
+                else:
+                    serialized_data[key] = self.related_serializers[key].serialize(related_data)
+            else:
+                attr = getattr(instance, attr_name, None)
+                if callable(attr):
+                    attr = attr()
+                serialized_data[key] = convert_value(attr)
+        return serialized_data
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class File(Base):
+    __tablename__ = "benchmark_file"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(120))
+    size = Column(Integer)
+    dataset_id = Column(Integer, ForeignKey("benchmark_dataset.id"))
+
+    def get_formatted_size(self):
+        return f"{self.size} bytes"
+
+
+class Dataset(Base):
+    __tablename__ = "benchmark_dataset"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime)
+    title = Column(String(120))
+    file_rows = relationship(File)
+
+    def name(self):
+        return self.title
+
+    def get_dinosaurhub_doi(self):
+        return f"http://localhost/doi/10.1234/{self.id}"
+
+    def files(self):
+        return list(self.file_rows)
+
+
+def build(items: int, files: int) -> list:
+    """Transient mapped instances, so attributes are read through SQLAlchemy like in the API."""
+    return [
+        Dataset(
+            id=id,
+            created_at=datetime(2024, 1, 1),
+            title=f"Dataset {id}",
+            file_rows=[File(id=id * 100 + index, name=f"{index}.csv", size=1024 * index) for index in range(files)],
+        )
+        for id in range(items)
+    ]
+
+
+FILE_FIELDS = {"file_id": "id", "file_name": "name", "size": "get_formatted_size"}
+DATASET_FIELDS = {
+    "dataset_id": "id",
+    "created": "created_at",
+    "name": "name",
+    "doi": "get_dinosaurhub_doi",
+    "files": "files",
+}
+
+
+def run(items: int = 2000, files: int = 5, repeat: int = 5) -> dict:
+    """Best time in seconds of each implementation over repeat runs."""
+    datasets = build(items, files)
+    reference = ReferenceSerializer(DATASET_FIELDS, {"files": ReferenceSerializer(FILE_FIELDS)})
+    planned = Serializer(DATASET_FIELDS, {"files": Serializer(FILE_FIELDS)})
+
+    expected = [reference.serialize(dataset) for dataset in datasets]
+    if planned.serialize_many(datasets) != expected:
+        raise AssertionError("Serializer output differs from the reference implementation")
+
+    return {
+        "reference": min(timeit.repeat(lambda: [reference.serialize(d) for d in datasets], number=1, repeat=repeat)),
+        "serialize": min(timeit.repeat(lambda: [planned.serialize(d) for d in datasets], number=1, repeat=repeat)),
+        "serialize_many": min(timeit.repeat(lambda: planned.serialize_many(datasets), number=1, repeat=repeat)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--files", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    timings = run(args.items, args.files, args.repeat)
+    for name, seconds in timings.items():
+        speedup = timings["reference"] / seconds
+        print(f"{name:>15}: {seconds * 1000:8.2f} ms  ({speedup:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
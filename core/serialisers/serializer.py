@@ -1,4 +1,9 @@
-from datetime import datetime
+import inspect
+import operator
+from datetime import date, datetime, time
+from types import FunctionType
+
+from sqlalchemy import inspect as sa_inspect
 
 
 def convert_value(value):
@@ -7,25 +12,119 @@ def convert_value(value):
     return value
 
 
+def _read_any(attr_name):
+    def read(instance):
+        attr = getattr(instance, attr_name, None)
+        if callable(attr):
+            attr = attr()
+        return attr
+
+    return read
+
+
+def _read_column(attr_name):
+    def read(instance):
+        # Loaded column values sit in the instance __dict__; expired or deferred ones go through the ORM
+        values = instance.__dict__
+        return values[attr_name] if attr_name in values else getattr(instance, attr_name)
+
+    return read
+
+
+def _converted(read):
+    def read_converted(instance):
+        value = read(instance)
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    return read_converted
+
+
+def _columns(cls) -> dict:
+    """
+    Mapped column attributes of cls, each with whether its values never need converting (anything
+    but dates and times). Empty for classes not mapped by SQLAlchemy.
+    """
+    mapper = sa_inspect(cls, raiseerr=False)
+    if mapper is None or not hasattr(mapper, "column_attrs"):
+        return {}
+    columns = {}
+    for attr in mapper.column_attrs:
+        try:
+            python_type = attr.columns[0].type.python_type
+        except NotImplementedError:
+            python_type = object
+        columns[attr.key] = not issubclass(python_type, (date, datetime, time))
+    return columns
+
+
 class Serializer:
+    """
+    Turns instances into dicts of serialization_fields (key -> attribute or method name), using
+    related_serializers for the fields holding other instances. For each instance class (and field
+    selection) the field map is resolved once into a plan of (key, getter) pairs, so serializing does
+    no per-field lookups, callable checks or related_serializers walks.
+    """
+
     def __init__(self, serialization_fields, related_serializers=None):
         self.serialization_fields = serialization_fields
         self.related_serializers = related_serializers or {}
+        self._plans = {}
+
+    def _related(self, key, attr_name):
+        related = self.related_serializers[key]
+
+        def serialize_related(instance):
+            related_data = getattr(instance, attr_name)()
+            if isinstance(related_data, list):
+                return related.serialize_many(related_data)
+            return related.serialize(related_data)
+
+        return serialize_related
 
-    def serialize(self, instance):
-        serialized_data = {}
+    def _plan(self, cls, fields):
+        columns = _columns(cls)
+        plan = []
         for key, attr_name in self.serialization_fields.items():
+            if fields is not None and key not in fields:
+                continue
             if key in self.related_serializers:
-                related_data = getattr(instance, attr_name)()
-                if isinstance(related_data, list):
-                    serialized_data[key] = [
-                        self.related_serializers[key].serialize(sub_instance) for sub_instance in related_data
-                    ]
-                else:
-                    serialized_data[key] = self.related_serializers[key].serialize(related_data)
+                plan.append((key, self._related(key, attr_name)))
+                continue
+
+            member = inspect.getattr_static(cls, attr_name, None)
+            if isinstance(member, FunctionType):
+                read = member
+            elif attr_name in columns:
+                read = _read_column(attr_name)
+            elif member is not None and not callable(member):
+                # Properties: read as attributes, never callable
+                read = operator.attrgetter(attr_name)
             else:
-                attr = getattr(instance, attr_name, None)
-                if callable(attr):
-                    attr = attr()
-                serialized_data[key] = convert_value(attr)
-        return serialized_data
+                read = _read_any(attr_name)
+
+            if not columns.get(attr_name, False):
+                read = _converted(read)
+            plan.append((key, read))
+        return tuple(plan)
+
+    def _plan_for(self, cls, fields=None):
+        fields = None if fields is None else frozenset(fields)
+        plan = self._plans.get((cls, fields))
+        if plan is None:
+            plan = self._plans[(cls, fields)] = self._plan(cls, fields)
+        return plan
+
+    def serialize(self, instance, fields=None):
+        """Serializes instance, limited to the keys in fields when given."""
+        return {key: read(instance) for key, read in self._plan_for(type(instance), fields)}
+
+    def serialize_many(self, instances, fields=None):
+        """Serializes a batch of instances, looking the plan up once per run of one class."""
+        serialized = []
+        cls = plan = None
+        for instance in instances:
+            if type(instance) is not cls:
+                cls = type(instance)
+                plan = self._plan_for(cls, fields)
+            serialized.append({key: read(instance) for key, read in plan})
+        return serialized
@@ -0,0 +1,66 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe in-process cache of at most max_entries values (least recently used first out), each
+    kept for ttl seconds. The ttl bounds how long a change made by another process goes unnoticed.
+    """
+
+    _instances = weakref.WeakSet()
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        LRUCache._instances.add(self)
+
+    @classmethod
+    def clear_all(cls):
+        """Empties every cache of the process (e.g. once the database they mirror is rebuilt)."""
+        for cache in list(cls._instances):
+            cache.clear()
+
+    def get(self, key: Hashable) -> Optional[object]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def replace(self, key: Hashable, update):
+        """Replaces a cached value with update(value), keeping its expiry (nothing to do when not cached)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                self._entries[key] = (update(value), expires)
+
+    def discard(self, *keys: Hashable):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
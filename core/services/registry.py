@@ -0,0 +1,27 @@
+"""
+Process-wide instances of services and repositories.
+
+Services and repositories keep no per-request state: repositories reach the database through
+`db.session`, a scoped session that resolves to the session of the current context on every use,
+so a single instance can serve every request and thread. resolve(SomeService) returns the shared
+instance of the class, building it the first time it is asked for, instead of constructing a new
+service (and every repository it wraps) at each call site.
+"""
+
+import threading
+from typing import Dict, Type, TypeVar
+
+T = TypeVar("T")
+
+_instances: Dict[type, object] = {}
+_lock = threading.Lock()
+
+
+def resolve(cls: Type[T]) -> T:
+    instance = _instances.get(cls)
+    if instance is None:
+        # Built outside the lock: constructors resolve the services they depend on
+        built = cls()
+        with _lock:
+            instance = _instances.setdefault(cls, built)
+    return instance
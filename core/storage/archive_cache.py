@@ -0,0 +1,189 @@
+import fcntl
+import hashlib
+import logging
+import os
+import time
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+from core.configuration.configuration import uploads_folder_name
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT_VERSION = "1"
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+DEFAULT_LOCK_TIMEOUT = 10.0
+LOCK_POLL_INTERVAL = 0.1
+
+
+def archive_cache_folder_name():
+    return os.path.join(os.getenv("WORKING_DIR", ""), uploads_folder_name(), "cache", "archives")
+
+
+class CachedArchive:
+    """Result of an ArchiveCache lookup: either the path of a ready archive or a stream that is filling the cache."""
+
+    def __init__(self, key: str, path: Optional[str] = None, chunks: Optional[Iterator[bytes]] = None):
+        self.key = key
+        self.path = path
+        self.chunks = chunks
+
+    @property
+    def hit(self) -> bool:
+        return self.path is not None
+
+
+class ArchiveCache:
+    """
+    On-disk cache of prebuilt archives, keyed by the manifest of their contents.
+
+    The key is a hash of every (arcname, checksum) pair, so any change to the files of a dataset
+    produces a new key and the stale archive simply ages out. The cache keeps at most max_bytes;
+    the least recently served archives are evicted first (a hit refreshes the file's mtime).
+
+    Concurrent misses are coalesced with a per-key lock file: the first worker streams the archive
+    to its client while writing it to the cache, the others wait for it and serve the result. The
+    builder holds the lock for as long as its client takes to download, so the others wait at most
+    lock_timeout seconds and then stream an archive of their own without caching it.
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        lock_timeout: float = DEFAULT_LOCK_TIMEOUT,
+    ):
+        self.root = root or archive_cache_folder_name()
+        self.max_bytes = max_bytes
+        self.lock_timeout = lock_timeout
+
+    @classmethod
+    def from_config(cls, config) -> "ArchiveCache":
+        return cls(
+            root=config.get("ARCHIVE_CACHE_DIR"),
+            max_bytes=config.get("ARCHIVE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES),
+            lock_timeout=config.get("ARCHIVE_CACHE_LOCK_TIMEOUT", DEFAULT_LOCK_TIMEOUT),
+        )
+
+    @staticmethod
+    def key_for(manifest: Iterable[Tuple[str, str]]) -> str:
+        digest = hashlib.sha256(ARCHIVE_FORMAT_VERSION.encode())
+        for arcname, checksum in manifest:
+            digest.update(f"\n{arcname}\0{checksum}".encode())
+        return digest.hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.zip")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def fetch(self, key: str, build: Callable[[], Iterator[bytes]]) -> CachedArchive:
+        """
+        Returns the cached archive for key. On a miss, the caller either becomes the builder and
+        gets a stream that fills the cache as it is consumed, or waits for the worker already
+        building it. If that build was abandoned or outlasts lock_timeout, the archive is streamed
+        without being cached.
+        """
+        path = self.get(key)
+        if path:
+            return CachedArchive(key, path=path)
+
+        os.makedirs(self.root, exist_ok=True)
+        lock = open(os.path.join(self.root, f"{key}.lock"), "w")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            try:
+                path = self._wait_for(key, lock)
+            finally:
+                lock.close()
+            if path:
+                return CachedArchive(key, path=path)
+            return CachedArchive(key, chunks=build())
+        except BaseException:
+            lock.close()
+            raise
+
+        # The previous holder may have finished between our lookup and taking the lock
+        path = self.get(key)
+        if path:
+            lock.close()
+            return CachedArchive(key, path=path)
+        try:
+            chunks = build()
+        except BaseException:
+            lock.close()
+            raise
+        return CachedArchive(key, chunks=self._store(key, chunks, lock))
+
+    def _wait_for(self, key: str, lock) -> Optional[str]:
+        """
+        Waits, for lock_timeout seconds at most, until the worker building the archive releases the
+        lock. Returns the path of the archive it cached, or None (abandoned build or timeout).
+        """
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    logger.info(f"Archive {key} still being built after {self.lock_timeout}s, streaming it uncached")
+                    return None
+                time.sleep(LOCK_POLL_INTERVAL)
+            else:
+                return self.get(key)
+
+    def _store(self, key: str, chunks: Iterator[bytes], lock) -> Iterator[bytes]:
+        path = self.path_for(key)
+        part_path = f"{path}.{os.getpid()}.part"
+        try:
+            with open(part_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            os.replace(part_path, path)
+            self.evict(keep=key)
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            lock.close()
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Deletes the least recently used archives until the cache fits in max_bytes. Returns the bytes freed."""
+        archives = []
+        for filename in os.listdir(self.root):
+            if not filename.endswith(".zip"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.root, filename))
+            except FileNotFoundError:
+                continue
+            archives.append((stat.st_mtime, stat.st_size, filename))
+
+        total = sum(size for _, size, _ in archives)
+        freed = 0
+        for _, size, filename in sorted(archives):
+            if total <= self.max_bytes:
+                break
+            if filename == f"{keep}.zip":
+                continue
+            try:
+                os.remove(os.path.join(self.root, filename))
+            except FileNotFoundError:
+                pass
+            # Worst case a worker still holding the old lock rebuilds the same archive, which is harmless
+            try:
+                os.remove(os.path.join(self.root, f"{filename[:-4]}.lock"))
+            except FileNotFoundError:
+                pass
+            total -= size
+            freed += size
+
+        if freed:
+            logger.info(f"Archive cache evicted {freed} bytes")
+        return freed
@@ -0,0 +1,101 @@
+import os
+import shutil
+import time
+from typing import Iterator, Optional
+
+from core.configuration.configuration import uploads_folder_name
+from core.storage.compression import VARIANT_SUFFIXES, is_variant
+
+
+def blobs_folder_name():
+    return os.path.join(os.getenv("WORKING_DIR", ""), uploads_folder_name(), "blobs")
+
+
+class BlobStore:
+    """
+    Content-addressed storage for uploaded files.
+
+    Every blob is stored once under its SHA-256, sharded in two directory levels
+    (blobs/ab/cd/abcd...) so no directory grows unbounded. Storing a file that is
+    already present only drops the duplicate, and moving a file in is a rename.
+    Reference counting lives in the database: a blob is referenced by every
+    Hubfile row whose blob_key points at it. Precompressed variants of a blob
+    (abcd....zst, abcd....br) live next to it and go away with it.
+
+    A blob is stored before the row referencing it is committed, so its mtime is
+    refreshed every time it is stored again: blobs younger than a grace period may
+    belong to an upload still in flight and must not be reclaimed.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or blobs_folder_name()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path_for(key))
+
+    def put_file(self, source_path: str, key: str, keep_source: bool = False) -> str:
+        """
+        Stores source_path under key and returns the blob path.
+
+        The source is renamed into place (or hard-linked when keep_source is set), so
+        no bytes are copied unless the store lives on another filesystem. When the
+        blob already exists the source is simply discarded.
+        """
+        blob_path = self.path_for(key)
+
+        if os.path.exists(blob_path):
+            # Restarts its grace period: the upload referencing it is not committed yet
+            os.utime(blob_path)
+            if not keep_source:
+                os.remove(source_path)
+            return blob_path
+
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        part_path = f"{blob_path}.{os.getpid()}.part"
+        try:
+            if keep_source:
+                os.link(source_path, part_path)
+            else:
+                os.rename(source_path, part_path)
+        except OSError:
+            # Different filesystem (or no hard link support): fall back to a byte copy
+            shutil.copyfile(source_path, part_path)
+            if not keep_source:
+                os.remove(source_path)
+
+        # Another worker may have stored the same content meanwhile, both copies are identical
+        os.replace(part_path, blob_path)
+        return blob_path
+
+    def delete(self, key: str) -> bool:
+        blob_path = self.path_for(key)
+        for suffix in VARIANT_SUFFIXES.values():
+            if os.path.exists(blob_path + suffix):
+                os.remove(blob_path + suffix)
+        if not os.path.exists(blob_path):
+            return False
+        os.remove(blob_path)
+        return True
+
+    def is_recent(self, key: str, grace_period: float) -> bool:
+        """Whether the blob was stored less than grace_period seconds ago."""
+        try:
+            return os.path.getmtime(self.path_for(key)) > time.time() - grace_period
+        except FileNotFoundError:
+            return False
+
+    def keys(self, grace_period: float = 0) -> Iterator[str]:
+        """Keys of the stored blobs, leaving out those stored less than grace_period seconds ago."""
+        if not os.path.isdir(self.root):
+            return
+        cutoff = time.time() - grace_period
+        for dirpath, _, files in os.walk(self.root):
+            for filename in files:
+                if filename.endswith(".part") or is_variant(filename):
+                    continue
+                if grace_period and os.path.getmtime(os.path.join(dirpath, filename)) > cutoff:
+                    continue
+                yield filename
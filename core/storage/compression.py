@@ -0,0 +1,96 @@
+import os
+import zlib
+from typing import Iterable, Iterator, Optional
+
+import brotli
+import zstandard
+
+# Preferred first when the client accepts several with the same quality
+ENCODINGS = ("zstd", "br", "gzip")
+
+# Files stored next to a blob with its content already compressed (blob.zst, blob.br)
+VARIANT_SUFFIXES = {"zstd": ".zst", "br": ".br"}
+
+# Per-request compression favours speed, precompressed variants are written once and favour size
+DYNAMIC_LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+STATIC_LEVELS = {"zstd": 19, "br": 11, "gzip": 9}
+
+CHUNK_SIZE = 64 * 1024
+
+
+def negotiate(accept_encodings, encodings=ENCODINGS) -> Optional[str]:
+    """Best of encodings for a request's Accept-Encoding (werkzeug's request.accept_encodings), or None."""
+    return accept_encodings.best_match(encodings)
+
+
+class _Compressor:
+    """Incremental compressor with the same two calls for every encoding."""
+
+    def __init__(self, encoding: str, level: int):
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+            self.compress, self.flush = self._obj.compress, self._obj.flush
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=level)
+            self.compress, self.flush = self._obj.process, self._obj.finish
+        elif encoding == "gzip":
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+            self.compress, self.flush = self._obj.compress, self._obj.flush
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    compressor = _Compressor(encoding, DYNAMIC_LEVELS[encoding] if level is None else level)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str, level: Optional[int] = None) -> Iterator[bytes]:
+    """Compresses chunks as they come, yielding output whenever the compressor has some."""
+    compressor = _Compressor(encoding, DYNAMIC_LEVELS[encoding] if level is None else level)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def variant_path(path: str, encoding: str) -> str:
+    return path + VARIANT_SUFFIXES[encoding]
+
+
+def precompressed_variant(path: str, encoding: Optional[str]) -> Optional[str]:
+    """The stored variant of path compressed with encoding, when there is one."""
+    if encoding not in VARIANT_SUFFIXES:
+        return None
+    variant = variant_path(path, encoding)
+    return variant if os.path.exists(variant) else None
+
+
+def write_variants(path: str, encodings: Iterable[str] = VARIANT_SUFFIXES) -> list:
+    """
+    Writes the precompressed variants of path that are missing (path.zst, path.br) and returns
+    their paths. A variant that would not be smaller than the file is not kept.
+    """
+    written = []
+    for encoding in encodings:
+        target = variant_path(path, encoding)
+        if os.path.exists(target):
+            continue
+
+        part_path = f"{target}.{os.getpid()}.part"
+        with open(path, "rb") as source, open(part_path, "wb") as part:
+            chunks = iter(lambda: source.read(CHUNK_SIZE), b"")
+            for compressed in compress_stream(chunks, encoding, STATIC_LEVELS[encoding]):
+                part.write(compressed)
+
+        if os.path.getsize(part_path) >= os.path.getsize(path):
+            os.remove(part_path)
+            continue
+        os.replace(part_path, target)
+        written.append(target)
+    return written
+
+
+def is_variant(filename: str) -> bool:
+    return filename.endswith(tuple(VARIANT_SUFFIXES.values()))
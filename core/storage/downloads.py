@@ -0,0 +1,161 @@
+import mimetypes
+import os
+import unicodedata
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import quote
+
+from flask import Response, current_app, request, send_file
+from werkzeug.http import is_resource_modified
+
+from core.configuration.configuration import uploads_folder_name
+from core.storage.archive_cache import ArchiveCache, CachedArchive
+from core.storage.compression import VARIANT_SUFFIXES, negotiate, precompressed_variant
+
+DEFAULT_OFFLOAD_LOCATION = "/_protected/uploads/"
+
+
+def offload_root() -> str:
+    return os.path.abspath(
+        current_app.config.get("DOWNLOAD_OFFLOAD_ROOT")
+        or os.path.join(os.getenv("WORKING_DIR", ""), uploads_folder_name())
+    )
+
+
+def offload_uri(path: str) -> Optional[str]:
+    """Internal nginx URI serving path, or None when offloading is off or path is outside the offload root."""
+    if current_app.config.get("DOWNLOAD_OFFLOAD") != "nginx":
+        return None
+
+    root = offload_root()
+    path = os.path.abspath(path)
+    if os.path.commonpath([root, path]) != root:
+        return None
+
+    location = current_app.config.get("DOWNLOAD_OFFLOAD_LOCATION") or DEFAULT_OFFLOAD_LOCATION
+    return location.rstrip("/") + "/" + quote(os.path.relpath(path, root).replace(os.sep, "/"))
+
+
+def _filename_options(download_name: str) -> dict:
+    # Same encoding as send_file: plain ASCII name plus an RFC 5987 variant when needed
+    simple = unicodedata.normalize("NFKD", download_name).encode("ascii", "ignore").decode("ascii")
+    if simple == download_name:
+        return {"filename": download_name}
+    return {"filename": simple, "filename*": f"UTF-8''{quote(download_name, safe='!#$&+^`|~')}"}
+
+
+def send_download(
+    path: str,
+    download_name: str,
+    mimetype: Optional[str] = None,
+    etag: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+    precompressed: bool = False,
+) -> Response:
+    """
+    Sends path as an attachment. With DOWNLOAD_OFFLOAD = "nginx" the response only carries an
+    X-Accel-Redirect header and nginx streams the bytes (and answers Range requests), so the
+    worker is released at once. Otherwise it falls back to send_file. Conditional requests are
+    answered here in both cases, against the strong ETag given by the caller.
+
+    With precompressed, a stored .zst/.br variant of path the client accepts is sent as is, with
+    its Content-Encoding and an ETag of its own, instead of compressing the file again.
+    """
+    uri = offload_uri(path)
+    if uri is None:
+        if precompressed:
+            variant = _send_variant(path, download_name, mimetype, etag, last_modified)
+            if variant is not None:
+                return variant
+        return send_file(
+            path,
+            mimetype=mimetype,
+            as_attachment=True,
+            download_name=download_name,
+            conditional=True,
+            etag=etag if etag is not None else True,
+            last_modified=last_modified,
+        )
+
+    if last_modified is None:
+        last_modified = datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc)
+
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        resp = Response(status=304)
+    else:
+        resp = Response(mimetype=mimetype or mimetypes.guess_type(download_name)[0] or "application/octet-stream")
+        resp.headers["X-Accel-Redirect"] = uri
+        resp.headers.set("Content-Disposition", "attachment", **_filename_options(download_name))
+
+    if etag:
+        resp.set_etag(etag)
+    resp.last_modified = last_modified
+    return resp
+
+
+def _send_variant(path, download_name, mimetype, etag, last_modified) -> Optional[Response]:
+    available = [encoding for encoding in VARIANT_SUFFIXES if precompressed_variant(path, encoding)]
+    encoding = negotiate(request.accept_encodings, available) if available else None
+    if encoding is None:
+        return None
+
+    resp = send_file(
+        precompressed_variant(path, encoding),
+        mimetype=mimetype or mimetypes.guess_type(download_name)[0] or "application/octet-stream",
+        as_attachment=True,
+        download_name=download_name,
+        conditional=True,
+        etag=f"{etag}.{encoding}" if etag else True,
+        last_modified=last_modified,
+    )
+    resp.headers["Content-Encoding"] = encoding
+    resp.vary.add("Accept-Encoding")
+    return resp
+
+
+def fetch_archive(archive, whole_file: bool = False) -> CachedArchive:
+    """
+    Looks the archive (a ZipArchive) up in the archive cache. On a miss the returned stream builds it
+    while it is sent; with whole_file (e.g. to answer a Range request) the build is completed first so
+    the cached file can be served instead.
+    """
+    archive_cache = ArchiveCache.from_config(current_app.config)
+    cached = archive_cache.fetch(archive.etag, archive.stream)
+    if cached.hit or not whole_file:
+        return cached
+
+    for _ in cached.chunks:
+        pass
+    path = archive_cache.get(archive.etag)
+    if path:
+        return CachedArchive(archive.etag, path=path)
+    return CachedArchive(archive.etag, chunks=archive.stream())
+
+
+def send_archive(archive) -> Response:
+    """
+    Sends a ZipArchive: 304 when the client already has it, the cached file when there is one
+    (through send_download, so Range and offloading work), otherwise a stream of the archive while
+    it is built and stored in the cache.
+    """
+    if not is_resource_modified(request.environ, etag=archive.etag, last_modified=archive.last_modified):
+        resp = Response(status=304)
+        resp.set_etag(archive.etag)
+        resp.last_modified = archive.last_modified
+        return resp
+
+    cached = fetch_archive(archive, whole_file=request.range is not None)
+    if cached.hit:
+        return send_download(
+            cached.path,
+            archive.name,
+            mimetype="application/zip",
+            etag=archive.etag,
+            last_modified=archive.last_modified,
+        )
+
+    resp = Response(cached.chunks, mimetype="application/zip")
+    resp.headers["Content-Disposition"] = f'attachment; filename="{archive.name}"'
+    resp.set_etag(archive.etag)
+    resp.last_modified = archive.last_modified
+    return resp
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+from typing import Optional
+
+CHUNK_SIZE = 1024 * 1024
+DIGEST_SUFFIX = ".digest.json"
+
+
+class IngestedFile:
+    """Size and digests of a file, computed while its bytes were being written."""
+
+    def __init__(self, size: int, md5: str, sha256: str):
+        self.size = size
+        self.md5 = md5
+        self.sha256 = sha256
+
+    def to_dict(self) -> dict:
+        return {"size": self.size, "md5": self.md5, "sha256": self.sha256}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "IngestedFile":
+        return cls(size=int(data["size"]), md5=data["md5"], sha256=data["sha256"])
+
+    def __repr__(self):
+        return f"IngestedFile<size={self.size} sha256={self.sha256}>"
+
+
+class HashingWriter:
+    """Wraps a writable binary file and hashes every chunk that goes through it."""
+
+    def __init__(self, target):
+        self.target = target
+        self.size = 0
+        self._md5 = hashlib.md5()
+        self._sha256 = hashlib.sha256()
+
+    def write(self, chunk: bytes) -> int:
+        self._md5.update(chunk)
+        self._sha256.update(chunk)
+        self.size += len(chunk)
+        return self.target.write(chunk)
+
+    def result(self) -> IngestedFile:
+        return IngestedFile(size=self.size, md5=self._md5.hexdigest(), sha256=self._sha256.hexdigest())
+
+
+def copy_stream(source, target, chunk_size: int = CHUNK_SIZE) -> None:
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        target.write(chunk)
+
+
+def ingest_stream(source, dest_path: str, chunk_size: int = CHUNK_SIZE) -> IngestedFile:
+    """
+    Copies a readable binary stream to dest_path in fixed-size chunks, computing size, MD5 and SHA-256
+    in the same pass. The data is written to a '.part' file first so a failed upload never leaves a
+    truncated file under the final name.
+    """
+    part_path = f"{dest_path}.part"
+    try:
+        with open(part_path, "wb") as target:
+            writer = HashingWriter(target)
+            copy_stream(source, writer, chunk_size)
+        os.replace(part_path, dest_path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    return writer.result()
+
+
+def digest_file(file_path: str, chunk_size: int = CHUNK_SIZE) -> IngestedFile:
+    """Streams an existing file through the hashers without holding it in memory."""
+
+    class _NullTarget:
+        def write(self, chunk):
+            return len(chunk)
+
+    writer = HashingWriter(_NullTarget())
+    with open(file_path, "rb") as source:
+        copy_stream(source, writer, chunk_size)
+    return writer.result()
+
+
+def digest_path_for(file_path: str) -> str:
+    directory, filename = os.path.split(file_path)
+    return os.path.join(directory, f".{filename}{DIGEST_SUFFIX}")
+
+
+def save_digest(file_path: str, ingested: IngestedFile) -> None:
+    with open(digest_path_for(file_path), "w") as f:
+        json.dump(ingested.to_dict(), f)
+
+
+def load_digest(file_path: str) -> Optional[IngestedFile]:
+    """
+    Returns the digests recorded when file_path was ingested, or None when there is no record or the
+    file changed size since then.
+    """
+    try:
+        with open(digest_path_for(file_path), "r") as f:
+            ingested = IngestedFile.from_dict(json.load(f))
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+    if not os.path.exists(file_path) or os.path.getsize(file_path) != ingested.size:
+        return None
+    return ingested
+
+
+def discard_digest(file_path: str) -> None:
+    digest_path = digest_path_for(file_path)
+    if os.path.exists(digest_path):
+        os.remove(digest_path)
+
+
+def ingested_file_for(file_path: str) -> IngestedFile:
+    """Recorded digests for file_path, falling back to a single streaming pass over it."""
+    return load_digest(file_path) or digest_file(file_path)
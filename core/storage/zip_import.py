@@ -0,0 +1,126 @@
+import logging
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from core.storage.ingest import CHUNK_SIZE, IngestedFile, ingest_stream
+
+logger = logging.getLogger(__name__)
+
+
+class ZipImportError(ValueError):
+    """The archive was rejected before any member was extracted."""
+
+
+class ZipImportLimits:
+    """Upper bounds an archive must respect to be imported, checked against its central directory."""
+
+    def __init__(
+        self,
+        max_members: int = 5000,
+        max_member_size: int = 100 * 1024 * 1024,
+        max_total_size: int = 1024 * 1024 * 1024,
+        max_ratio: int = 100,
+    ):
+        self.max_members = max_members
+        self.max_member_size = max_member_size
+        self.max_total_size = max_total_size
+        self.max_ratio = max_ratio
+
+    @classmethod
+    def from_config(cls, config) -> "ZipImportLimits":
+        defaults = cls()
+        return cls(
+            max_members=config.get("ZIP_IMPORT_MAX_MEMBERS", defaults.max_members),
+            max_member_size=config.get("ZIP_IMPORT_MAX_MEMBER_SIZE", defaults.max_member_size),
+            max_total_size=config.get("ZIP_IMPORT_MAX_TOTAL_SIZE", defaults.max_total_size),
+            max_ratio=config.get("ZIP_IMPORT_MAX_RATIO", defaults.max_ratio),
+        )
+
+
+def is_csv_member(info: zipfile.ZipInfo) -> bool:
+    return (
+        not info.is_dir()
+        and info.filename.endswith(".csv")
+        and not info.filename.startswith("__MACOSX")
+        and bool(os.path.basename(info.filename))
+    )
+
+
+def select_csv_members(zip_ref: zipfile.ZipFile, limits: ZipImportLimits) -> List[zipfile.ZipInfo]:
+    """
+    Validates the archive against limits and returns its CSV members, one per file name.
+
+    Sizes come from the central directory; zipfile never yields more bytes than the declared size
+    of a member, so checking them up front is enough to bound what extraction will write.
+    """
+    infos = zip_ref.infolist()
+    if len(infos) > limits.max_members:
+        raise ZipImportError(f"ZIP archive has {len(infos)} entries, the limit is {limits.max_members}.")
+
+    members = []
+    seen = set()
+    total_size = 0
+    for info in infos:
+        if not is_csv_member(info):
+            continue
+
+        if info.file_size > limits.max_member_size:
+            raise ZipImportError(f"'{info.filename}' is larger than {limits.max_member_size} bytes.")
+        if info.compress_size and info.file_size / info.compress_size > limits.max_ratio:
+            raise ZipImportError(f"'{info.filename}' exceeds the maximum compression ratio of {limits.max_ratio}.")
+
+        total_size += info.file_size
+        if total_size > limits.max_total_size:
+            raise ZipImportError(f"ZIP archive expands to more than {limits.max_total_size} bytes.")
+
+        filename = os.path.basename(info.filename)
+        if filename in seen:
+            logger.warning(f"Skipping '{info.filename}' from ZIP: another member is already named '{filename}'.")
+            continue
+        seen.add(filename)
+        members.append(info)
+
+    return members
+
+
+def extract_csv_members(
+    zip_file_obj,
+    dest_dir: str,
+    limits: Optional[ZipImportLimits] = None,
+    workers: int = 4,
+    chunk_size: int = CHUNK_SIZE,
+) -> List[Tuple[str, IngestedFile]]:
+    """
+    Streams the CSV members of a ZIP archive into dest_dir and returns (filename, digests) pairs
+    in archive order.
+
+    Members are decompressed in chunks through a bounded thread pool and hashed while they are
+    written, so memory stays flat regardless of the archive size. A member that fails to extract
+    is logged and left out; limit violations reject the whole archive.
+    """
+    limits = limits or ZipImportLimits()
+
+    zip_file_obj.seek(0)
+    if not zipfile.is_zipfile(zip_file_obj):
+        raise ZipImportError("File is not a valid ZIP archive.")
+
+    with zipfile.ZipFile(zip_file_obj, "r") as zip_ref:
+        members = select_csv_members(zip_ref, limits)
+
+        def extract(info: zipfile.ZipInfo) -> Optional[Tuple[str, IngestedFile]]:
+            filename = os.path.basename(info.filename)
+            try:
+                with zip_ref.open(info) as source:
+                    ingested = ingest_stream(source, os.path.join(dest_dir, filename), chunk_size)
+                return filename, ingested
+            except Exception as e:
+                logger.warning(f"Failed to process file '{filename}' from ZIP: {e}")
+                return None
+
+        # ZipFile serializes seeks on the underlying file, decompression and hashing run in parallel
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            results = list(executor.map(extract, members))
+
+    return [result for result in results if result is not None]
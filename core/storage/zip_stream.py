@@ -0,0 +1,102 @@
+import os
+import zipfile
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Tuple
+
+from core.storage.archive_cache import ArchiveCache
+from core.storage.ingest import CHUNK_SIZE
+
+# Fixed member metadata, so the archive depends on the file contents only (not on when or how they were stored)
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+ZIP_EXTERNAL_ATTR = 0o100644 << 16
+
+
+class _ChunkBuffer:
+    """
+    Write-only, unseekable sink for ZipFile. Because it cannot seek, zipfile writes a data
+    descriptor after each member instead of going back to patch its local header, so every
+    byte can be handed to the client as soon as it is produced.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(
+    entries: Iterable[Tuple[str, str]],
+    compression: int = zipfile.ZIP_STORED,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Yields a ZIP archive of the (arcname, path) entries while it is being built: local header,
+    file data in chunk_size pieces and data descriptor for each file, then the central directory.
+    Nothing is written to disk and memory use is bounded by chunk_size.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, mode="w", compression=compression, allowZip64=True) as zipf:
+        for arcname, path in entries:
+            zinfo = zipfile.ZipInfo(arcname, date_time=ZIP_DATE_TIME)
+            zinfo.external_attr = ZIP_EXTERNAL_ATTR
+            zinfo.file_size = os.path.getsize(path)
+            zinfo.compress_type = compression
+            with open(path, "rb") as source, zipf.open(zinfo, mode="w") as dest:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    dest.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            # Local header of empty files and data descriptor
+            data = buffer.drain()
+            if data:
+                yield data
+    # Central directory
+    yield buffer.drain()
+
+
+class ZipArchive:
+    """
+    A ZIP download built from (arcname, path, checksum) entries. Its ETag (also the archive cache
+    key) is the hash of the checksum manifest, and the archive is byte-for-byte reproducible from
+    it, so the ETag stays valid even if the cached copy is evicted and rebuilt.
+    """
+
+    def __init__(self, name: str, entries: List[Tuple[str, str, str]]):
+        self.name = name
+        self.entries = entries
+        self.etag = ArchiveCache.key_for((arcname, checksum) for arcname, _, checksum in entries)
+        mtimes = [os.path.getmtime(path) for _, path, _ in entries]
+        self.last_modified = datetime.fromtimestamp(max(mtimes), tz=timezone.utc) if mtimes else None
+
+    def stream(self) -> Iterator[bytes]:
+        return stream_zip([(arcname, path) for arcname, path, _ in self.entries])
+
+
+def unique_arcname(name: str, taken: set) -> str:
+    """name, or "stem (2).ext", "stem (3).ext"... if an entry already uses it (case-insensitively). Adds it to taken."""
+    stem, ext = os.path.splitext(name)
+    candidate, copy = name, 1
+    while candidate.lower() in taken:
+        copy += 1
+        candidate = f"{stem} ({copy}){ext}"
+    taken.add(candidate.lower())
+    return candidate
@@ -63,5 +63,8 @@ else
     flask db upgrade
 fi
 
+# Build the explore search index for datasets created before it existed
+rosemary explore:reindex --if-empty
+
 # Start the Flask application with specified host and port, enabling reload and debug mode
 exec flask run --host=0.0.0.0 --port=5000 --no-reload --no-debugger
@@ -54,6 +54,9 @@ else
     flask db upgrade
 fi
 
+# Build the explore search index for datasets created before it existed
+python -m rosemary explore:reindex --if-empty
+
 # Start the application using Gunicorn, binding it to port 5000
 # Set the logging level to info and the timeout to 3600 seconds
 exec gunicorn --bind 0.0.0.0:5000 app:app --log-level info --timeout 3600
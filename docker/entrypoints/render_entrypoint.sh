@@ -68,6 +68,9 @@ echo "Running database seeders..."
 python -m rosemary db:seed || true
 # --------------------------------
 
+# Build the explore search index for datasets created before it existed
+python -m rosemary explore:reindex --if-empty
+
 # Start the application using Gunicorn, binding it to port 80
 # Set the logging level to info and the timeout to 3600 seconds
 exec gunicorn --bind 0.0.0.0:80 app:app --log-level info --timeout 3600
\ No newline at end of file
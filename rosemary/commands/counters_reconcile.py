@@ -0,0 +1,15 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command("counters:reconcile", help="Rebuilds the home page counters from their source tables.")
+@with_appcontext
+def counters_reconcile():
+    from app.modules.dataset.services import HubCounterService
+
+    try:
+        for name, value in HubCounterService().reconcile().items():
+            click.echo(f"{name}: {value}")
+        click.echo(click.style("Counters reconciled.", fg="green"))
+    except Exception as e:
+        click.echo(click.style(f"Error reconciling counters: {e}", fg="red"))
@@ -0,0 +1,24 @@
+import os
+
+import click
+from flask.cli import with_appcontext
+
+
+@click.command("dataset:export", help="Writes the dataset catalogue to PATH as NDJSON (one JSON document per dataset).")
+@click.argument("path", default="datasets.ndjson", type=click.Path(dir_okay=False, writable=True))
+@click.option("--base-url", default=None, help="Host of the download and file URLs (default: http://$DOMAIN/).")
+@click.option("--batch-size", default=500, show_default=True, help="Datasets read from the database at a time.")
+@with_appcontext
+def dataset_export(path, base_url, batch_size):
+    from app.modules.dataset.services import DataSetService
+
+    base_url = base_url or f"http://{os.getenv('DOMAIN', 'localhost')}/"
+    exported = 0
+    try:
+        with open(path, "w", encoding="utf-8") as export_file:
+            for line in DataSetService().export_ndjson(base_url, batch_size):
+                export_file.write(line)
+                exported += 1
+        click.echo(click.style(f"{exported} dataset(s) exported to {path}.", fg="green"))
+    except Exception as e:
+        click.echo(click.style(f"Error exporting datasets: {e}", fg="red"))
@@ -0,0 +1,14 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command("deposition:worker", help="Synchronizes pending datasets with Zenodo/Fakenodo.")
+@click.option("--burst", is_flag=True, help="Exit once there are no due jobs left.")
+@click.option("--interval", default=5.0, show_default=True, help="Seconds to wait when the queue is empty.")
+@with_appcontext
+def deposition_worker(burst, interval):
+    from app.modules.dataset.services import DepositionJobService
+
+    click.echo(click.style("Deposition worker started.", fg="green"))
+    processed = DepositionJobService().work(burst=burst, poll_interval=interval)
+    click.echo(click.style(f"Deposition worker processed {processed} job(s).", fg="green"))
@@ -0,0 +1,20 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command("explore:reindex", help="Rebuilds the explore search index.")
+@click.option("--if-empty", is_flag=True, help="Only build the index when it has no terms yet.")
+@with_appcontext
+def explore_reindex(if_empty):
+    from app.modules.explore.services import ExploreService
+
+    service = ExploreService()
+    if if_empty and service.is_indexed():
+        click.echo("Search index already built.")
+        return
+
+    try:
+        terms = service.reindex()
+        click.echo(click.style(f"Search index rebuilt ({terms} terms).", fg="green"))
+    except Exception as e:
+        click.echo(click.style(f"Error rebuilding the search index: {e}", fg="red"))
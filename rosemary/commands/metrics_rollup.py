@@ -0,0 +1,15 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command("metrics:rollup", help="Rebuilds the daily download/view rollups used for trending.")
+@click.option("--days", type=int, default=None, help="Only rebuild the last N days (default: everything).")
+@with_appcontext
+def metrics_rollup(days):
+    from app.modules.dataset.services import DSDailyMetricService
+
+    try:
+        buckets = DSDailyMetricService().rebuild(days=days)
+        click.echo(click.style(f"Rebuilt {buckets} daily bucket(s).", fg="green"))
+    except Exception as e:
+        click.echo(click.style(f"Error rebuilding the daily rollups: {e}", fg="red"))
@@ -0,0 +1,24 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command("storage:gc", help="Deletes blobs in the uploads blob store that no file references anymore.")
+@click.option("--dry-run", is_flag=True, help="Only list the blobs that would be deleted.")
+@with_appcontext
+def storage_gc(dry_run):
+    from app.modules.hubfile.services import HubfileService
+
+    hubfile_service = HubfileService()
+
+    if dry_run:
+        orphans = hubfile_service.unreferenced_blobs()
+        for key in orphans:
+            click.echo(key)
+        click.echo(click.style(f"{len(orphans)} unreferenced blob(s) found.", fg="yellow"))
+        return
+
+    try:
+        removed = hubfile_service.collect_garbage()
+        click.echo(click.style(f"{len(removed)} unreferenced blob(s) deleted.", fg="green"))
+    except Exception as e:
+        click.echo(click.style(f"Error collecting unreferenced blobs: {e}", fg="red"))
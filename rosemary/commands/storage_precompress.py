@@ -0,0 +1,14 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command("storage:precompress", help="Writes the missing .zst/.br variants of the CSVs in the blob store.")
+@with_appcontext
+def storage_precompress():
+    from app.modules.hubfile.services import HubfileService
+
+    try:
+        written = HubfileService().precompress_all()
+        click.echo(click.style(f"{written} precompressed variant(s) written.", fg="green"))
+    except Exception as e:
+        click.echo(click.style(f"Error precompressing blobs: {e}", fg="red"))